@@ -0,0 +1,257 @@
+import asyncio
+import fcntl
+import json
+import os
+import struct
+from collections import deque
+
+# Frames between workers and the hub: 4-byte length, 1-byte kind, payload
+HEADER = struct.Struct("<IB")
+RECORDS, LISTEN, PEERS = 1, 2, 3
+BACKENDS = ("local", "unix")
+
+
+def _frame(kind, payload=b""):
+    return HEADER.pack(len(payload), kind) + payload
+
+
+async def _read_frame(reader):
+    length, kind = HEADER.unpack(await reader.readexactly(HEADER.size))
+    return kind, await reader.readexactly(length)
+
+
+class LocalBroadcast:
+    """Records only reach WebSocket clients of the process that classified them (single worker)."""
+
+    name = "local"
+    outbox = None  # ConnectionManager.broadcast skips the cross-process path
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def listening_changed(self):
+        pass
+
+    def stats(self):
+        return {"backend": self.name}
+
+
+class BroadcastHub:
+    """Relays record frames between worker connections on a Unix-domain socket.
+
+    Frames are forwarded as received, without decoding, and only to workers
+    that currently have WebSocket clients; each worker is told how many other
+    workers are listening so it does not publish when nobody is.
+    """
+
+    def __init__(self, path, max_buffer):
+        self.path = path
+        self.max_buffer = max_buffer
+        self.listening = {}  # writer -> has WebSocket clients
+        self.relayed = 0
+        self.dropped = 0
+        self._server = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # left behind by a hub that died
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self.listening):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def _announce(self):
+        for writer in self.listening:
+            others = sum(on for other, on in self.listening.items() if other is not writer)
+            writer.write(_frame(PEERS, str(others).encode()))
+
+    async def _serve(self, reader, writer):
+        self.listening[writer] = False
+        self._announce()
+        try:
+            while True:
+                kind, payload = await _read_frame(reader)
+                if kind == LISTEN:
+                    self.listening[writer] = payload == b"1"
+                    self._announce()
+                elif kind == RECORDS:
+                    frame = _frame(RECORDS, payload)
+                    for other, on in self.listening.items():
+                        if other is writer or not on:
+                            continue
+                        # A worker that stops reading loses frames instead of growing the hub's memory
+                        if other.transport.get_write_buffer_size() > self.max_buffer:
+                            self.dropped += 1
+                            continue
+                        other.write(frame)
+                        self.relayed += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.listening.pop(writer, None)
+            writer.close()
+            self._announce()
+
+
+class UnixSocketBroadcast:
+    """Shares records between uvicorn workers through a hub on a Unix-domain socket.
+
+    Every worker runs one of these. The first to take an flock on
+    ``<path>.lock`` also runs the BroadcastHub; all of them, hub included,
+    connect to the socket as clients. Records a worker classifies go to its
+    own WebSocket clients directly and, every ``window`` seconds, as one
+    serialized frame to the hub for the other workers. If the hub's worker
+    exits, the lock is released, another worker takes it over and the rest
+    reconnect; records published in between are lost, as they would be for
+    a dashboard that was reconnecting.
+    """
+
+    name = "unix"
+
+    def __init__(self, manager, path, window=0.25, max_pending=10000, max_buffer=8 * 1024 * 1024):
+        self.manager = manager
+        self.path = path
+        self.window = window
+        self.max_buffer = max_buffer
+        self.outbox = None  # a deque while other workers are listening
+        self._pending = deque(maxlen=max_pending)
+        self._lock_file = None
+        self.hub = None
+        self._writer = None
+        self._tasks = []
+
+        self.peers = 0
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+        self.reconnects = 0
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._connection_loop()), asyncio.create_task(self._publish_loop())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self._writer is not None:
+            self._writer.close()
+        if self.hub is not None:
+            await self.hub.stop()
+            self.hub = None
+        if self._lock_file is not None:
+            self._lock_file.close()  # releases the flock
+            self._lock_file = None
+
+    async def _take_hub(self):
+        """Starts the hub here if no other worker holds the lock."""
+        if self.hub is not None:
+            return
+        lock_file = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return
+        self._lock_file = lock_file
+        self.hub = BroadcastHub(self.path, self.max_buffer)
+        await self.hub.start()
+        print(f" Broadcast hub listening on {self.path} (pid {os.getpid()})")
+
+    async def _connection_loop(self):
+        backoff = 0.05
+        while True:
+            await self._take_hub()
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                # The hub's worker is starting up, or has just exited
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 2.0)
+                continue
+            backoff = 0.05
+            self.listening_changed()
+            try:
+                while True:
+                    kind, payload = await _read_frame(reader)
+                    if kind == PEERS:
+                        self.peers = int(payload)
+                        self._set_outbox()
+                    elif kind == RECORDS:
+                        records = json.loads(payload)
+                        self.received += len(records)
+                        self.manager.receive(records)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            finally:
+                self._writer.close()
+                self._writer = None
+                self.peers = 0
+                self._set_outbox()
+            self.reconnects += 1
+
+    def _set_outbox(self):
+        self.outbox = self._pending if self.peers else None
+        if self.outbox is None:
+            self._pending.clear()
+
+    def listening_changed(self):
+        """Tells the hub whether this worker has WebSocket clients to forward records to."""
+        if self._writer is not None:
+            self._writer.write(_frame(LISTEN, b"1" if self.manager.clients else b"0"))
+
+    async def _publish_loop(self):
+        while True:
+            await asyncio.sleep(self.window)
+            if not self._pending or self._writer is None:
+                continue
+            records = list(self._pending)
+            self._pending.clear()
+            if self._writer.transport.get_write_buffer_size() > self.max_buffer:
+                self.dropped += len(records)
+                continue
+            payload = json.dumps(records, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+            self._writer.write(_frame(RECORDS, payload))
+            self.published += len(records)
+
+    def stats(self):
+        stats = {
+            "backend": self.name,
+            "path": self.path,
+            "hub": self.hub is not None,
+            "connected": self._writer is not None,
+            "listening_peers": self.peers,
+            "published": self.published,
+            "received": self.received,
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+        }
+        if self.hub is not None:
+            stats["hub_relayed_frames"] = self.hub.relayed
+            stats["hub_dropped_frames"] = self.hub.dropped
+        return stats
+
+
+def create_backend(name, manager, path=None, window=0.25, max_pending=10000):
+    if name == "local":
+        return LocalBroadcast(manager)
+    if name == "unix":
+        return UnixSocketBroadcast(manager, path, window, max_pending)
+    raise ValueError(f"Unsupported broadcast backend: {name} (expected one of {', '.join(BACKENDS)})")
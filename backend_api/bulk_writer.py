@@ -0,0 +1,84 @@
+from elasticsearch.helpers import async_streaming_bulk
+
+from config import (
+    BULK_MAX_DOCS, BULK_MAX_BYTES, BULK_FLUSH_SECONDS,
+    BULK_MAX_RETRIES, BULK_INITIAL_BACKOFF, BULK_MAX_BACKOFF,
+)
+
+
+class DocumentRejected(Exception):
+    """Elasticsearch did not index a document; ``retryable`` for 429, 5xx and transport failures."""
+
+    def __init__(self, status, error=None):
+        super().__init__(f"Elasticsearch rejected the document ({status}): {error}")
+        self.status = status
+        self.retryable = is_retryable(status)
+
+
+def is_retryable(status):
+    return status == 429 or not isinstance(status, int) or status >= 500
+
+
+async def iter_upload_lines(file, chunk_size):
+    """Yields decoded lines from an UploadFile, reading at most chunk_size bytes at a time."""
+    pending = b""
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r").decode("utf-8", errors="replace")
+    if pending:
+        yield pending.rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+async def iter_batches(lines, size):
+    batch = []
+    async for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def bulk_index(client, actions, stats, failed=None):
+    """Streams actions into Elasticsearch in size-, byte- and time-bounded bulk requests.
+
+    Per-document results are tallied into stats["indexed"] / stats["errors"]
+    as they arrive, so callers still see partial progress if the transport
+    fails mid-stream. Rejected documents are counted, not raised; "create"
+    actions whose _id already exists count as stats["duplicates"], and
+    errors worth retrying later (429, 5xx) also as stats["retryable"].
+    ``failed``, when given, maps the _id of every rejected document to a
+    DocumentRejected.
+    """
+    async for ok, item in async_streaming_bulk(
+        client,
+        actions,
+        chunk_size=BULK_MAX_DOCS,
+        max_chunk_bytes=BULK_MAX_BYTES,
+        flush_after_seconds=BULK_FLUSH_SECONDS,
+        max_retries=BULK_MAX_RETRIES,
+        initial_backoff=BULK_INITIAL_BACKOFF,
+        max_backoff=BULK_MAX_BACKOFF,
+        raise_on_error=False,
+        raise_on_exception=False,
+    ):
+        if ok:
+            stats["indexed"] += 1
+        else:
+            info = next(iter(item.values()))
+            status = info.get("status")
+            if status == 409:
+                stats["duplicates"] = stats.get("duplicates", 0) + 1
+                continue
+            stats["errors"] += 1
+            if is_retryable(status):
+                stats["retryable"] = stats.get("retryable", 0) + 1
+            if failed is not None:
+                failed[info.get("_id")] = DocumentRejected(status, info.get("error"))
+    return stats
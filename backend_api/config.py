@@ -0,0 +1,124 @@
+import os
+
+# Every setting can be overridden with an environment variable of the same name.
+ES_URL = os.getenv("ES_URL", "http://localhost:9200")
+ES_INDEX = os.getenv("ES_INDEX", "classified-logs")
+
+# Index management: at startup install a lifecycle policy and an index template
+# for ES_INDEX-* and write through the alias ES_INDEX, which rolls over to a new
+# backing index at ES_ROLLOVER_MAX_SIZE (primary shard) or ES_ROLLOVER_MAX_AGE.
+# ES_RETENTION_DAYS > 0 deletes a backing index that many days after it rolled
+# over. ES_MANAGE_INDEX=false leaves index setup to the cluster admin.
+ES_MANAGE_INDEX = os.getenv("ES_MANAGE_INDEX", "true").lower() == "true"
+ES_ROLLOVER_MAX_SIZE = os.getenv("ES_ROLLOVER_MAX_SIZE", "25gb")
+ES_ROLLOVER_MAX_AGE = os.getenv("ES_ROLLOVER_MAX_AGE", "7d")
+ES_RETENTION_DAYS = int(os.getenv("ES_RETENTION_DAYS", 0))
+ES_REFRESH_INTERVAL = os.getenv("ES_REFRESH_INTERVAL", "5s")
+
+# /upload streaming
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", 1024 * 1024))
+UPLOAD_BATCH_LINES = int(os.getenv("UPLOAD_BATCH_LINES", 1000))
+
+# Bulk flushes: whichever limit is reached first sends the chunk
+BULK_MAX_DOCS = int(os.getenv("BULK_MAX_DOCS", 500))
+BULK_MAX_BYTES = int(os.getenv("BULK_MAX_BYTES", 5 * 1024 * 1024))
+BULK_FLUSH_SECONDS = float(os.getenv("BULK_FLUSH_SECONDS", 1.0))
+
+# Elasticsearch transport: ES_URL may list several nodes, comma separated
+ES_CONNECTIONS_PER_NODE = int(os.getenv("ES_CONNECTIONS_PER_NODE", 10))
+ES_REQUEST_TIMEOUT = float(os.getenv("ES_REQUEST_TIMEOUT", 10.0))
+ES_MAX_RETRIES = int(os.getenv("ES_MAX_RETRIES", 3))
+ES_RETRY_ON_TIMEOUT = os.getenv("ES_RETRY_ON_TIMEOUT", "true").lower() == "true"
+ES_DEAD_NODE_BACKOFF = float(os.getenv("ES_DEAD_NODE_BACKOFF", 1.0))
+ES_MAX_DEAD_NODE_BACKOFF = float(os.getenv("ES_MAX_DEAD_NODE_BACKOFF", 30.0))
+
+# Retries for documents the bulk API rejects with 429, with exponential backoff
+BULK_MAX_RETRIES = int(os.getenv("BULK_MAX_RETRIES", 3))
+BULK_INITIAL_BACKOFF = float(os.getenv("BULK_INITIAL_BACKOFF", 0.5))
+BULK_MAX_BACKOFF = float(os.getenv("BULK_MAX_BACKOFF", 10.0))
+
+# Write-ahead spool, off by default: with SPOOL_ENABLED=true classified events
+# are appended to segment files under SPOOL_DIR (one fsync per batch) and
+# acknowledged at once, while a background drainer ships them to ES in
+# SPOOL_DRAIN_BATCH bulk batches, backing off from SPOOL_INITIAL_BACKOFF up to
+# SPOOL_MAX_BACKOFF seconds while ES is down. Segments roll at
+# SPOOL_SEGMENT_MB; past SPOOL_MAX_MB on disk, ingest answers 503. Each
+# uvicorn worker spools to its own SPOOL_DIR/worker-N (SPOOL_MAX_MB applies to
+# each), and drains any slot a worker that is gone left behind.
+SPOOL_ENABLED = os.getenv("SPOOL_ENABLED", "false").lower() == "true"
+SPOOL_DIR = os.getenv("SPOOL_DIR", "data/spool")
+SPOOL_SEGMENT_MB = float(os.getenv("SPOOL_SEGMENT_MB", 16))
+SPOOL_MAX_MB = float(os.getenv("SPOOL_MAX_MB", 1024))
+SPOOL_FSYNC = os.getenv("SPOOL_FSYNC", "true").lower() == "true"
+SPOOL_DRAIN_BATCH = int(os.getenv("SPOOL_DRAIN_BATCH", 1000))
+SPOOL_INITIAL_BACKOFF = float(os.getenv("SPOOL_INITIAL_BACKOFF", 0.5))
+SPOOL_MAX_BACKOFF = float(os.getenv("SPOOL_MAX_BACKOFF", 30.0))
+
+# /ingest micro-batching: flush on INGEST_MAX_BATCH events or INGEST_MAX_LATENCY_MS,
+# answer 429 once INGEST_QUEUE_SIZE events are waiting
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", 10000))
+INGEST_MAX_BATCH = int(os.getenv("INGEST_MAX_BATCH", 500))
+INGEST_MAX_LATENCY_MS = float(os.getenv("INGEST_MAX_LATENCY_MS", 50))
+
+# Where model inference runs: inline (on the event loop), thread or process
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "thread")
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 0)) or None
+INFERENCE_CHUNK_SIZE = int(os.getenv("INFERENCE_CHUNK_SIZE", 2000))
+
+# How often the model registry (MODEL_REGISTRY_DIR) is checked for a new
+# current version; 0 turns hot reloading off
+MODEL_POLL_SECONDS = float(os.getenv("MODEL_POLL_SECONDS", 10))
+
+# Sliding-window rate detection per source IP / user (ml_pipeline/window_detector.py):
+# counters over WINDOW_SECONDS in WINDOW_BUCKET_SECONDS buckets, at most
+# WINDOW_MAX_KEYS keys of each kind, and the counts that raise an alert
+WINDOW_SECONDS = float(os.getenv("WINDOW_SECONDS", 60))
+WINDOW_BUCKET_SECONDS = float(os.getenv("WINDOW_BUCKET_SECONDS", 5))
+WINDOW_MAX_KEYS = int(os.getenv("WINDOW_MAX_KEYS", 100000))
+WINDOW_BRUTE_FORCE_FAILURES = int(os.getenv("WINDOW_BRUTE_FORCE_FAILURES", 5))
+WINDOW_SCAN_PROBES = int(os.getenv("WINDOW_SCAN_PROBES", 10))
+WINDOW_USER_FAILURES = int(os.getenv("WINDOW_USER_FAILURES", 10))
+
+# /logs and /logs/search: page size cap, how long a cursor's point in time
+# stays open between pages, and the response cache for repeated polling
+# (LOGS_CACHE_TTL seconds, 0 turns it off)
+LOGS_MAX_SIZE = int(os.getenv("LOGS_MAX_SIZE", 1000))
+LOGS_PIT_KEEP_ALIVE = os.getenv("LOGS_PIT_KEEP_ALIVE", "1m")
+LOGS_CACHE_TTL = float(os.getenv("LOGS_CACHE_TTL", 2.0))
+LOGS_CACHE_SIZE = int(os.getenv("LOGS_CACHE_SIZE", 256))
+
+# /stats aggregations are cached for STATS_CACHE_TTL seconds, or until
+# ingest indexes a new anomaly
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", 30.0))
+STATS_CACHE_SIZE = int(os.getenv("STATS_CACHE_SIZE", 128))
+
+# Sampling profiler: cProfile one in every PROFILE_EVERY_N HTTP requests and
+# write the stats to PROFILE_DIR; 0 (the default) turns it off. With
+# PROFILE_CONTROL_ENABLED=true it can also be switched at runtime with
+# POST /debug/profile?every=N; the endpoint is unauthenticated, so it is off
+# by default
+PROFILE_EVERY_N = int(os.getenv("PROFILE_EVERY_N", 0))
+PROFILE_CONTROL_ENABLED = os.getenv("PROFILE_CONTROL_ENABLED", "false").lower() == "true"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# WebSocket fan-out: each client gets a bounded send queue; when it is full the
+# oldest message is dropped, and a client that stays full for WS_MAX_LAG_SECONDS
+# (or whose send blocks for WS_SEND_TIMEOUT) is disconnected
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", 1000))
+WS_MAX_LAG_SECONDS = float(os.getenv("WS_MAX_LAG_SECONDS", 10.0))
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", 5.0))
+
+# Records are buffered for WS_BATCH_WINDOW_MS and sent as one JSON array frame
+# per subscription; at most WS_MAX_PENDING records wait between flushes
+WS_BATCH_WINDOW_MS = float(os.getenv("WS_BATCH_WINDOW_MS", 250))
+WS_MAX_PENDING = int(os.getenv("WS_MAX_PENDING", 10000))
+
+
+# Who else sees classified records: "local" keeps them in this process; "unix"
+# shares them between uvicorn workers (--workers N) through a hub on the
+# Unix-domain socket BROADCAST_SOCKET, so every dashboard gets the full stream.
+# Only records are shared: each worker keeps its own WINDOW_* rate counters
+# over the events it classified, so with N workers an attacker's events are
+# split N ways and may each stay under the alert thresholds
+BROADCAST_BACKEND = os.getenv("BROADCAST_BACKEND", "local")
+BROADCAST_SOCKET = os.getenv("BROADCAST_SOCKET", "/tmp/log-analyzer-broadcast.sock")
\ No newline at end of file
@@ -0,0 +1,25 @@
+from elasticsearch import AsyncElasticsearch
+
+import config
+
+
+def create_es_client(hosts=None):
+    """Builds the pooled AsyncElasticsearch client the backend shares across requests.
+
+    Connection errors, timeouts and 429/502/503/504 responses are retried on
+    another node (or the same one) up to ES_MAX_RETRIES times; failed nodes
+    are parked with exponential backoff before they are tried again.
+    """
+    if hosts is None:
+        hosts = [url.strip() for url in config.ES_URL.split(",") if url.strip()]
+
+    return AsyncElasticsearch(
+        hosts,
+        connections_per_node=config.ES_CONNECTIONS_PER_NODE,
+        request_timeout=config.ES_REQUEST_TIMEOUT,
+        max_retries=config.ES_MAX_RETRIES,
+        retry_on_timeout=config.ES_RETRY_ON_TIMEOUT,
+        retry_on_status=(429, 502, 503, 504),
+        dead_node_backoff_factor=config.ES_DEAD_NODE_BACKOFF,
+        max_dead_node_backoff=config.ES_MAX_DEAD_NODE_BACKOFF,
+    )
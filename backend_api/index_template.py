@@ -0,0 +1,92 @@
+import hashlib
+
+from elasticsearch import BadRequestError
+
+import config
+
+# Fields parsed out of the raw line (parser.log_parser) and stored alongside it
+EXTRACTED_FIELDS = ("service", "src_ip", "user")
+
+# Explicit types instead of dynamic mapping, which made every string both
+# text and a .keyword sub-field. raw is kept in _source and indexed once,
+# without positions; any other string a client sends becomes a keyword.
+MAPPINGS = {
+    "dynamic_templates": [
+        {"strings_as_keywords": {"match_mapping_type": "string",
+                                 "mapping": {"type": "keyword", "ignore_above": 1024}}},
+    ],
+    "properties": {
+        "raw": {"type": "match_only_text"},
+        "timestamp": {"type": "date", "ignore_malformed": True},
+        "ingested_at": {"type": "date"},
+        "prediction": {"type": "keyword"},
+        "threat_type": {"type": "keyword"},
+        "model_version": {"type": "keyword"},
+        "anomaly_score": {"type": "float"},
+        "source": {"type": "keyword"},
+        **{field: {"type": "keyword"} for field in EXTRACTED_FIELDS},
+    },
+}
+
+
+def document_id(*parts):
+    """Stable _id from the parts that identify an event, so a replay maps onto the same document."""
+    return hashlib.sha1("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+def extract_fields(record, entry):
+    """Copies the EXTRACTED_FIELDS a parser found (``entry``) onto the record."""
+    for field in EXTRACTED_FIELDS:
+        if entry.get(field) and field not in record:
+            record[field] = entry[field]
+    return record
+
+
+def lifecycle_policy():
+    hot = {"rollover": {"max_primary_shard_size": config.ES_ROLLOVER_MAX_SIZE, "max_age": config.ES_ROLLOVER_MAX_AGE}}
+    phases = {"hot": {"actions": hot}}
+    if config.ES_RETENTION_DAYS > 0:
+        phases["delete"] = {"min_age": f"{config.ES_RETENTION_DAYS}d", "actions": {"delete": {}}}
+    return {"phases": phases}
+
+
+def index_settings(alias):
+    return {
+        "index.lifecycle.name": alias,
+        "index.lifecycle.rollover_alias": alias,
+        "index.codec": "best_compression",
+        "index.refresh_interval": config.ES_REFRESH_INTERVAL,
+    }
+
+
+async def ensure_index(es, alias):
+    """Installs the lifecycle policy and the <alias>-* template, then bootstraps the write alias.
+
+    Documents are written to ``alias``, which points at <alias>-000001 and,
+    after each rollover, at the next backing index; searches through it see
+    all of them. Returns True when ``alias`` is (now) that managed alias, or
+    False when a plain index of that name already exists from before: it is
+    left alone, keeps its dynamic mapping, and only indices created from now
+    on under <alias>-* get the template. _id deduplication works within one
+    backing index, so a replay that crosses a rollover is not caught.
+    """
+    await es.ilm.put_lifecycle(name=alias, policy=lifecycle_policy())
+    await es.indices.put_index_template(
+        name=alias,
+        index_patterns=[f"{alias}-*"],
+        template={"settings": index_settings(alias), "mappings": MAPPINGS},
+        priority=100,
+    )
+    if await es.indices.exists_alias(name=alias):
+        return True
+    if await es.indices.exists(index=alias):
+        print(f" {alias} is a plain index with dynamic mapping; reindex it into {alias}-000001 to use the template")
+        return False
+    try:
+        await es.indices.create(index=f"{alias}-000001", aliases={alias: {"is_write_index": True}})
+    except BadRequestError as e:
+        # Another worker bootstrapped it first
+        if e.error != "resource_already_exists_exception":
+            raise
+    print(f" Index template installed; writing to {alias}-000001 through alias {alias}")
+    return True
@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+
+class IngestQueue:
+    """Coalesces single /ingest events into micro-batches.
+
+    Events wait in a bounded asyncio.Queue; one worker task drains it and
+    hands batches to ``handle_batch`` as soon as ``max_batch`` events are
+    waiting or the oldest one has waited ``max_latency`` seconds. Each
+    ``submit`` returns a future that resolves to that event's enriched record.
+    ``handle_batch`` returns one result per event; an Exception in place of
+    a record fails only that event's future, and one raised fails them all.
+    """
+
+    def __init__(self, handle_batch, max_size=10000, max_batch=500, max_latency=0.05):
+        self.handle_batch = handle_batch
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.queue = asyncio.Queue(maxsize=max_size)
+        self._worker = None
+
+        self.accepted = 0
+        self.rejected = 0
+        self.batches = 0
+        self.processed = 0
+        self.failed = 0
+        self.last_batch_size = 0
+        self.last_batch_seconds = 0.0
+
+    def start(self):
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flushes whatever is still queued, then stops the worker."""
+        if self._worker is None:
+            return
+        await self.queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    def submit(self, log_dict):
+        """Enqueues one event; raises asyncio.QueueFull when the queue is at capacity."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((log_dict, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+        self.accepted += 1
+        return future
+
+    async def _next_batch(self):
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.max_latency
+
+        while len(batch) < self.max_batch:
+            # Take whatever is already waiting without yielding to the loop
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            started = time.perf_counter()
+            try:
+                results = await self.handle_batch([log_dict for log_dict, _ in batch])
+                for (_, future), result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        self.failed += 1
+                        if not future.done():
+                            future.set_exception(result)
+                        continue
+                    self.processed += 1
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                self.failed += len(batch)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                self.batches += 1
+                self.last_batch_size = len(batch)
+                self.last_batch_seconds = time.perf_counter() - started
+                for _ in batch:
+                    self.queue.task_done()
+
+    def stats(self):
+        return {
+            "depth": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "processed": self.processed,
+            "failed": self.failed,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_ms": round(self.last_batch_seconds * 1000, 3),
+        }
@@ -0,0 +1,95 @@
+import base64
+import json
+
+from elasticsearch import NotFoundError
+
+from stats_queries import KEYWORD_SUFFIX, keyword
+
+# Newest first; _shard_doc breaks ties between equal timestamps inside a
+# point in time, so search_after never skips or repeats a document
+LOGS_SORT = [{"timestamp": {"order": "desc"}}, {"_shard_doc": "desc"}]
+
+
+class CursorError(ValueError):
+    """The cursor is malformed or its point in time has expired."""
+
+
+def build_query(start=None, end=None, prediction=None, threat_type=None, src_ip=None, source=None,
+                keyword_suffix=KEYWORD_SUFFIX):
+    """Bool filter for the /logs/search parameters; list-valued ones match any of their values.
+
+    Terms filters go to keyword fields: pass "" for an index under the
+    template, ".keyword" (the default) for one with dynamic mapping.
+    """
+    filters = []
+    if start or end:
+        bounds = {"gte": start} if start else {}
+        if end:
+            bounds["lte"] = end
+        filters.append({"range": {"timestamp": bounds}})
+    for field, values in (("prediction", prediction), ("threat_type", threat_type),
+                          ("src_ip", src_ip), ("source", source)):
+        if values:
+            filters.append({"terms": {keyword(field, keyword_suffix): list(values)}})
+    return {"bool": {"filter": filters}} if filters else {"match_all": {}}
+
+
+def encode_cursor(pit_id, search_after):
+    payload = json.dumps({"pit": pit_id, "after": search_after}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return payload["pit"], payload["after"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise CursorError(f"invalid cursor: {e}") from None
+
+
+async def close_pit(es, pit_id):
+    try:
+        await es.close_point_in_time(id=pit_id)
+    except Exception:
+        pass  # it expires on its own
+
+
+async def search_logs(es, index, query, size, fields=None, cursor=None, keep_alive="1m"):
+    """One page of logs, newest first, from a point in time opened on the first page.
+
+    Returns {"hits", "next_cursor"}. One hit past the page is fetched to
+    tell whether another page follows; whenever none does (or the first
+    page fails) no cursor is returned and the point in time is closed, so
+    only clients that can ask for a next page keep one open.
+    """
+    if cursor is None:
+        pit_id = (await es.open_point_in_time(index=index, keep_alive=keep_alive))["id"]
+        search_after = None
+    else:
+        pit_id, search_after = decode_cursor(cursor)
+
+    body = {"pit": {"id": pit_id, "keep_alive": keep_alive}, "query": query, "sort": LOGS_SORT,
+            "size": size + 1, "track_total_hits": False}
+    if search_after is not None:
+        body["search_after"] = search_after
+    if fields:
+        body["_source"] = {"includes": list(fields)}
+    try:
+        res = await es.search(body=body)
+    except Exception as e:
+        if cursor is None:
+            await close_pit(es, pit_id)  # the client never got a cursor for it
+        elif isinstance(e, NotFoundError):
+            raise CursorError("cursor expired; start again without one") from None
+        raise
+
+    hits = res["hits"]["hits"]
+    # ES may hand back a new id for the same point in time
+    pit_id = res.get("pit_id", pit_id)
+    if len(hits) <= size:
+        await close_pit(es, pit_id)
+        next_cursor = None
+    else:
+        hits = hits[:size]
+        next_cursor = encode_cursor(pit_id, hits[-1]["sort"])
+    return {"hits": [hit.get("_source", {}) for hit in hits], "next_cursor": next_cursor}
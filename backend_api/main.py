@@ -1,17 +1,211 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from elasticsearch import Elasticsearch
+from contextlib import asynccontextmanager
 from datetime import datetime
+import asyncio
 import json
 import os, sys
+import time
 from websocket_manager import manager
+from broadcast import create_backend
+from bulk_writer import DocumentRejected, iter_upload_lines, iter_batches, bulk_index
+from es_client import create_es_client
+from ingest_queue import IngestQueue
+from model_watcher import ModelWatcher
+from log_queries import CursorError, build_query, search_logs
+from response_cache import ResponseCache
+import stats_queries
+from index_template import ensure_index, document_id, extract_fields
+from spool import SpoolDrainer, SpoolFull, open_worker_spools
+import metrics
+from metrics import timed, STAGE_SECONDS, BATCH_SIZE, ES_ERRORS, DUPLICATES
+from config import (
+    ES_INDEX, ES_MANAGE_INDEX, UPLOAD_CHUNK_BYTES, UPLOAD_BATCH_LINES,
+    INGEST_QUEUE_SIZE, INGEST_MAX_BATCH, INGEST_MAX_LATENCY_MS,
+    INFERENCE_MODE, INFERENCE_WORKERS, INFERENCE_CHUNK_SIZE, MODEL_POLL_SECONDS,
+    WINDOW_SECONDS, WINDOW_BUCKET_SECONDS, WINDOW_MAX_KEYS,
+    WINDOW_BRUTE_FORCE_FAILURES, WINDOW_SCAN_PROBES, WINDOW_USER_FAILURES,
+    LOGS_MAX_SIZE, LOGS_PIT_KEEP_ALIVE, LOGS_CACHE_TTL, LOGS_CACHE_SIZE,
+    STATS_CACHE_TTL, STATS_CACHE_SIZE, PROFILE_EVERY_N, PROFILE_DIR, PROFILE_CONTROL_ENABLED,
+    SPOOL_ENABLED, SPOOL_DIR, SPOOL_SEGMENT_MB, SPOOL_MAX_MB, SPOOL_FSYNC,
+    SPOOL_DRAIN_BATCH, SPOOL_INITIAL_BACKOFF, SPOOL_MAX_BACKOFF,
+    BROADCAST_BACKEND, BROADCAST_SOCKET, WS_BATCH_WINDOW_MS, WS_MAX_PENDING,
+)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from ml_pipeline.infer import infer_log
+from ml_pipeline.executor import InferenceExecutor
+from ml_pipeline import model_registry
+from ml_pipeline.window_detector import WindowDetector
+from parser.log_parser import parse_line
+
+
+async def classify_and_index(log_dicts, path="ingest", stats=None):
+    """Classifies a batch, bulk-indexes it and broadcasts the records that were stored.
+
+    Returns one result per log: its record, or the DocumentRejected
+    Elasticsearch answered it with. Index outcomes are tallied into
+    ``stats`` when given.
+    """
+    BATCH_SIZE.observe(len(log_dicts), path)
+    for log_dict in log_dicts:
+        if "timestamp" not in log_dict:
+            log_dict["timestamp"] = datetime.utcnow().isoformat()
+
+    enriched = await app.state.inference.infer(log_dicts)
+    # Rate state lives here, on the event loop, whichever worker classified the batch
+    with timed("detect"):
+        app.state.detector.process_batch(enriched)
+    ingested_at = datetime.utcnow().isoformat()
+    with timed("extract"):
+        for log_dict, record in zip(log_dicts, enriched):
+            if log_dict.get("source"):
+                record["source"] = log_dict["source"]
+            extract_fields(record, parse_line(record["raw"], record.get("source")))
+            record["ingested_at"] = ingested_at
+    metrics.count_records(enriched)
+
+    # Same source, timestamp and line -> same _id, so a client replaying a
+    # batch does not index it twice
+    ids = [document_id(record.get("source", ""), record["timestamp"], record["raw"]) for record in enriched]
+    actions = [{"_op_type": "create", "_index": ES_INDEX, "_id": _id, "_source": record}
+               for _id, record in zip(ids, enriched)]
+    if stats is None:
+        stats = {}
+    for key in ("indexed", "errors", "duplicates"):
+        stats.setdefault(key, 0)
+    failed = {}
+    if app.state.spool is not None:
+        await spool_actions(actions, stats)
+    else:
+        with timed("es_write"):
+            await bulk_index(app.state.es, actions, stats, failed)
+        ES_ERRORS.inc(stats["errors"])
+        DUPLICATES.inc(stats["duplicates"])
+
+    results = [failed.get(_id, record) for _id, record in zip(ids, enriched)]
+    stored = [record for record in results if not isinstance(record, Exception)]
+    if any(record["prediction"] == "anomaly" for record in stored):
+        app.state.stats_cache.clear()
+    for record in stored:
+        manager.broadcast(record)  # ✅ WebSocket broadcast
+    return results
+
+
+async def spool_actions(actions, stats):
+    """Appends actions to the spool for the drainer to ship; raises SpoolFull when it is at its limit."""
+    with timed("spool_write"):
+        await app.state.spool.append_async(actions)
+    stats["spooled"] = stats.get("spooled", 0) + len(actions)
+    app.state.drainer.notify()
+
+
+async def ship_spooled(actions, stats):
+    with timed("es_write"):
+        await bulk_index(app.state.es, actions, stats)
+    # Retryable failures are sent again by the drainer, so only final outcomes count
+    ES_ERRORS.inc(stats["errors"] - stats["retryable"])
+    DUPLICATES.inc(stats["duplicates"])
+    return stats
+
+
+def record_inference_timings(timings):
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.observe(seconds, stage)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled client for the whole process, closed cleanly on shutdown
+    app.state.es = create_es_client()
+    managed = False
+    if ES_MANAGE_INDEX:
+        try:
+            managed = await ensure_index(app.state.es, ES_INDEX)
+        except Exception as e:
+            print(f" Index setup failed, writing to {ES_INDEX} as is: {e}")
+    # Typed keyword fields under the template; .keyword sub-fields otherwise
+    app.state.keyword_suffix = "" if managed else stats_queries.KEYWORD_SUFFIX
+    app.state.spool = app.state.drainer = None
+    app.state.orphan_drainers = []
+    if SPOOL_ENABLED:
+        # One spool directory per worker; slots left by workers that are gone are drained here too
+        app.state.spool, orphans = open_worker_spools(
+            SPOOL_DIR, int(SPOOL_SEGMENT_MB * 1024 * 1024), int(SPOOL_MAX_MB * 1024 * 1024), SPOOL_FSYNC)
+        app.state.drainer, *app.state.orphan_drainers = [
+            SpoolDrainer(spool, ship_spooled, SPOOL_DRAIN_BATCH,
+                         initial_backoff=SPOOL_INITIAL_BACKOFF, max_backoff=SPOOL_MAX_BACKOFF)
+            for spool in [app.state.spool, *orphans]
+        ]
+        for drainer in [app.state.drainer, *app.state.orphan_drainers]:
+            drainer.start()
+    app.state.inference = InferenceExecutor(INFERENCE_MODE, INFERENCE_WORKERS, INFERENCE_CHUNK_SIZE,
+                                            on_timings=record_inference_timings)
+    app.state.inference.warm_up()
+    app.state.model_watcher = ModelWatcher(app.state.inference, MODEL_POLL_SECONDS)
+    app.state.model_watcher.start()
+    app.state.detector = WindowDetector(
+        WINDOW_SECONDS, WINDOW_BUCKET_SECONDS, WINDOW_MAX_KEYS,
+        WINDOW_BRUTE_FORCE_FAILURES, WINDOW_SCAN_PROBES, WINDOW_USER_FAILURES,
+    )
+    app.state.logs_cache = ResponseCache(LOGS_CACHE_TTL, LOGS_CACHE_SIZE)
+    app.state.stats_cache = ResponseCache(STATS_CACHE_TTL, STATS_CACHE_SIZE)
+    app.state.ingest_queue = IngestQueue(
+        classify_and_index,
+        max_size=INGEST_QUEUE_SIZE,
+        max_batch=INGEST_MAX_BATCH,
+        max_latency=INGEST_MAX_LATENCY_MS / 1000,
+    )
+    app.state.ingest_queue.start()
+    # With several uvicorn workers, "unix" gives each one's dashboards the records of all of them
+    manager.backend = create_backend(BROADCAST_BACKEND, manager, BROADCAST_SOCKET,
+                                     WS_BATCH_WINDOW_MS / 1000, WS_MAX_PENDING)
+    await manager.backend.start()
+    try:
+        yield
+    finally:
+        await manager.backend.stop()
+        await app.state.ingest_queue.stop()
+        if app.state.drainer is not None:
+            # Whatever is still spooled is shipped after the next start
+            for drainer in [app.state.drainer, *app.state.orphan_drainers]:
+                await drainer.stop()
+                drainer.spool.close()
+        await app.state.model_watcher.stop()
+        app.state.inference.shutdown()
+        await app.state.es.close()
 
-  
-app = FastAPI()
-es = Elasticsearch("http://localhost:9200")
+
+app = FastAPI(lifespan=lifespan)
+profiler = metrics.SamplingProfiler(PROFILE_EVERY_N, PROFILE_DIR)
+app.add_middleware(metrics.MetricsMiddleware, profiler=profiler)
+
+# Values owned by other components, read when /metrics is scraped
+metrics.register(metrics.Gauge(
+    "log_analyzer_ingest_queue_depth", "Events waiting in the /ingest queue",
+    callback=lambda: {(): app.state.ingest_queue.queue.qsize()}))
+metrics.register(metrics.Gauge(
+    "log_analyzer_websocket_clients", "Connected WebSocket clients",
+    callback=lambda: {(): len(manager.clients)}))
+metrics.register(metrics.Gauge(
+    "log_analyzer_websocket_queue_depth", "Frames waiting in WebSocket client queues",
+    callback=lambda: {(): manager.stats()["queue_depth"]}))
+metrics.register(metrics.Gauge(
+    "log_analyzer_websocket_pending", "Records buffered for the next WebSocket frame",
+    callback=lambda: {(): len(manager.pending)}))
+for name, key, help in (
+    ("log_analyzer_spool_pending", "pending", "Spooled events not yet shipped to Elasticsearch"),
+    ("log_analyzer_spool_pending_bytes", "pending_bytes", "Bytes of spooled events not yet shipped"),
+    ("log_analyzer_spool_disk_bytes", "disk_bytes", "Bytes the spool segments take on disk"),
+    ("log_analyzer_spool_segments", "segments", "Spool segment files"),
+):
+    metrics.register(metrics.Gauge(name, help, callback=lambda key=key: (
+        {(): app.state.spool.stats()[key]} if app.state.spool is not None else {})))
+metrics.register(metrics.Gauge(
+    "log_analyzer_model_info", "Model version new batches are classified with", ["version"],
+    callback=lambda: {(app.state.inference.model_version,): 1}))
+metrics.register(metrics.Gauge(
+    "log_analyzer_inference_cache_hit_rate", "Prediction cache hit rate per worker", ["worker"],
+    callback=lambda: {(owner,): stats["hit_rate"] for owner, stats in app.state.inference.cache.items() if stats}))
 
 # Enable CORS
 app.add_middleware(
@@ -24,58 +218,372 @@ app.add_middleware(
 
 @app.websocket("/ws/logs")  # ✅ NEW WebSocket route
 async def websocket_endpoint(websocket: WebSocket):
+    """Streams JSON array frames of classified logs.
+
+    Clients may send a subscription at any time, e.g.
+    {"prediction": "anomaly", "threat_type": ["brute_force"], "normal_sample_rate": 0.01}
+    """
     await manager.connect(websocket)
     try:
         while True:
-            await websocket.receive_text()
+            text = await websocket.receive_text()
+            try:
+                manager.subscribe(websocket, json.loads(text))
+            except (ValueError, TypeError, AttributeError) as e:
+                await websocket.send_json({"error": f"invalid subscription: {e}"})
     except Exception:
         manager.disconnect(websocket)
 
 @app.post("/upload")
 async def upload_log_file(file: UploadFile = File(...)):
-    contents = await file.read()
-    lines = contents.decode("utf-8").splitlines()
+    started = time.perf_counter()
+    counts = {"lines": 0, "skipped": 0, "classified": 0, "anomalies": 0, "indexed": 0, "duplicates": 0, "errors": 0}
+    source = file.filename or "upload"
+    if app.state.spool is not None:
+        counts["spooled"] = 0
+
+    async def classified_actions():
+        key = source
+        lines = iter_upload_lines(file, UPLOAD_CHUNK_BYTES)
+        async for batch in iter_batches(lines, UPLOAD_BATCH_LINES):
+            with timed("parse"):
+                keyed = []
+                for line in batch:
+                    # Each key covers the file's content up to and including the line
+                    key = document_id(key, line)
+                    if line.strip():
+                        keyed.append((key, line))
+                log_dicts = [{"raw": line, "timestamp": datetime.utcnow().isoformat()} for _, line in keyed]
+            counts["lines"] += len(batch)
+            counts["skipped"] += len(batch) - len(log_dicts)
+            BATCH_SIZE.observe(len(log_dicts), "upload")
 
-    for line in lines:
-        if not line.strip():
-            continue
+            enriched_batch = await app.state.inference.infer(log_dicts)
+            with timed("detect"):
+                enriched_batch = app.state.detector.process_batch(enriched_batch)
+            with timed("extract"):
+                for enriched in enriched_batch:
+                    enriched["source"] = source
+                    extract_fields(enriched, parse_line(enriched["raw"], source))
+            metrics.count_records(enriched_batch)
+            for (key, line), enriched in zip(keyed, enriched_batch):
+                enriched["ingested_at"] = datetime.utcnow().isoformat()
+                counts["classified"] += 1
+                counts["anomalies"] += enriched["prediction"] == "anomaly"
+                manager.broadcast(enriched)  # ✅ WebSocket broadcast
+                # Re-uploading the same file (or a longer copy of it) maps every line it
+                # already had onto the existing document; a different file under the
+                # same name gets new keys from its first differing line on
+                yield {"_op_type": "create", "_index": ES_INDEX, "_id": key,
+                       "_source": enriched}
 
-        log_dict = {
-            "raw": line,
-            "timestamp": datetime.utcnow().isoformat()
-        }
+    status = "uploaded"
+    try:
+        # Upload batches are classified as bulk_index pulls them, so es_write
+        # is not timed here; its own batches and /ingest cover that stage
+        if app.state.spool is None:
+            await bulk_index(app.state.es, classified_actions(), counts)
+        else:
+            async for batch in iter_batches(classified_actions(), UPLOAD_BATCH_LINES):
+                await spool_actions(batch, counts)
+    except Exception as e:
+        # Transport failures (ES down) abort the stream; whatever was
+        # classified but not acknowledged counts as an error
+        status = "failed"
+        counts["errors"] = counts["classified"] - counts["indexed"] - counts["duplicates"] - counts.get("spooled", 0)
+        counts["error"] = str(e)
+    ES_ERRORS.inc(counts["errors"])
+    DUPLICATES.inc(counts["duplicates"])
+    if counts["anomalies"]:
+        app.state.stats_cache.clear()
+    elapsed = time.perf_counter() - started
 
-        enriched = infer_log(log_dict)
-        enriched["ingested_at"] = datetime.utcnow().isoformat()
+    return {
+        "status": status,
+        **counts,
+        "elapsed_seconds": round(elapsed, 3),
+        "lines_per_second": round(counts["lines"] / elapsed, 1) if elapsed else None,
+    }
 
-        es.index(index="classified-logs", document=enriched)
-        await manager.broadcast(enriched)  # ✅ WebSocket broadcast
+def spool_full(error):
+    return JSONResponse(status_code=503, content={"status": "rejected", "error": str(error)},
+                        headers={"Retry-After": "5"})
 
-    return {"status": "uploaded"}
+def index_failed(error, content=None):
+    """503 with Retry-After while Elasticsearch is unavailable, 502 when it refused the documents for good."""
+    content = {**(content or {}), "status": "failed", "error": str(error)}
+    if error.retryable:
+        return JSONResponse(status_code=503, content=content, headers={"Retry-After": "5"})
+    return JSONResponse(status_code=502, content=content)
+
+def invalid_log(log_dict):
+    """Why an ingested event cannot be classified, or None."""
+    if not isinstance(log_dict, dict):
+        return "expected a JSON object"
+    if not isinstance(log_dict.get("raw"), str):
+        return "raw must be a string"
+    if log_dict.get("source") is not None and not isinstance(log_dict["source"], str):
+        return "source must be a string"
+    return None
 
 @app.post("/ingest")
 async def ingest_log(request: Request):
-    log_data = await request.json()
+    try:
+        log_data = await request.json()
+    except ValueError:
+        log_data = None
+    error = invalid_log(log_data)
+    if error is not None:
+        return JSONResponse(status_code=400, content={"status": "rejected", "error": error})
 
     if "timestamp" not in log_data:
         log_data["timestamp"] = datetime.utcnow().isoformat()
 
-    parsed = infer_log(log_data)
-    parsed["ingested_at"] = datetime.utcnow().isoformat()
+    try:
+        pending = app.state.ingest_queue.submit(log_data)
+    except asyncio.QueueFull:
+        return JSONResponse(
+            status_code=429,
+            content={"status": "rejected", "error": "ingest queue full"},
+            headers={"Retry-After": "1"},
+        )
 
-    es.index(index="classified-logs", document=parsed)
-    await manager.broadcast(parsed)  # ✅ WebSocket broadcast
+    try:
+        parsed = await pending
+    except SpoolFull as e:
+        return spool_full(e)
+    except DocumentRejected as e:
+        return index_failed(e)
     return {"status": "received", "label": parsed["prediction"], "threat_type": parsed["threat_type"]}
 
+@app.post("/ingest/batch")
+async def ingest_batch(request: Request):
+    """Accepts NDJSON, one log object per line, and processes it as one batch."""
+    body = await request.body()
+    log_dicts, invalid = [], 0
+
+    with timed("parse"):
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                log_dict = json.loads(line)
+            except json.JSONDecodeError:
+                invalid += 1
+                continue
+            if invalid_log(log_dict) is None:
+                log_dicts.append(log_dict)
+            else:
+                invalid += 1
+
+    stats = {"indexed": 0, "errors": 0, "duplicates": 0}
+    try:
+        results = await classify_and_index(log_dicts, "batch", stats) if log_dicts else []
+    except SpoolFull as e:
+        return spool_full(e)
+    stored = [record for record in results if not isinstance(record, Exception)]
+    rejected = [error for error in results if isinstance(error, Exception)]
+    body = {
+        "status": "partial" if rejected else "received",
+        "received": len(log_dicts),
+        **stats,
+        "invalid": invalid,
+        "anomalies": sum(1 for record in stored if record["prediction"] == "anomaly"),
+    }
+    if rejected and not stored:
+        return index_failed(rejected[0], body)
+    return body
+
+@app.get("/ingest/stats")
+def ingest_stats():
+    return app.state.ingest_queue.stats()
+
+@app.get("/spool/stats")
+def spool_stats():
+    if app.state.drainer is None:
+        return {"enabled": False}
+    orphaned = sum(drainer.spool.stats()["pending"] for drainer in app.state.orphan_drainers)
+    return {"enabled": True, **app.state.drainer.stats(), "orphaned_pending": orphaned}
+
+@app.get("/ws/stats")
+def websocket_stats():
+    return manager.stats()
+
+@app.get("/detector/stats")
+def detector_stats():
+    return app.state.detector.stats()
+
+@app.get("/inference/stats")
+def inference_stats():
+    return app.state.inference.stats()
+
+@app.get("/model")
+def model_info():
+    version = app.state.inference.model_version
+    try:
+        metadata = model_registry.read_metadata(version)
+    except KeyError:
+        metadata = None
+    return {
+        "version": version,
+        "metadata": metadata,
+        "versions": model_registry.list_versions(),
+        "watcher": app.state.model_watcher.stats(),
+    }
+
+@app.post("/model/rollback")
+async def rollback_model(version: str = None):
+    """Points the registry back at ``version`` (default: the one before current) and swaps to it."""
+    target = version or model_registry.previous_version()
+    if target is None:
+        return JSONResponse(status_code=409, content={"status": "failed", "error": "no earlier model version"})
+    if target not in model_registry.list_versions():
+        return JSONResponse(status_code=404, content={"status": "failed", "error": f"unknown model version: {target}"})
+
+    previous = app.state.inference.model_version
+    registry_current = model_registry.current_version()
+    # Move CURRENT first so the watcher does not swap straight back
+    model_registry.set_current(target)
+    try:
+        await app.state.model_watcher.activate(target)
+    except Exception as e:
+        if registry_current is not None:
+            model_registry.set_current(registry_current)
+        return JSONResponse(status_code=500, content={"status": "failed", "error": str(e)})
+    return {"status": "rolled_back", "version": target, "previous": previous}
+
+def split_param(value):
+    """'a,b' -> ['a', 'b']; None stays None."""
+    return [part.strip() for part in value.split(",") if part.strip()] if value else None
+
 @app.get("/logs")
-def get_logs(size: int = 100):
+async def get_logs(size: int = 100):
+    size = max(1, min(size, LOGS_MAX_SIZE))
+    cached = app.state.logs_cache.get(("logs", size))
+    if cached is not None:
+        return JSONResponse(content=cached)
     try:
-        res = es.search(
-            index="classified-logs",
+        res = await app.state.es.search(
+            index=ES_INDEX,
             size=size,
             sort=[{"timestamp": {"order": "desc"}}]
         )
         hits = [doc["_source"] for doc in res["hits"]["hits"]]
+        app.state.logs_cache.put(("logs", size), hits)
         return JSONResponse(content=hits)
     except Exception as e:
         return {"error": str(e)}
+
+@app.get("/logs/search")
+async def search_logs_page(
+    size: int = 100,
+    start: str = None,
+    end: str = None,
+    prediction: str = None,
+    threat_type: str = None,
+    src_ip: str = None,
+    source: str = None,
+    fields: str = None,
+    cursor: str = None,
+):
+    """One page of logs, newest first.
+
+    start / end bound the timestamp (ISO or ES date math such as now-1h);
+    prediction, threat_type, src_ip and source take comma-separated values;
+    fields picks the _source fields to return. Pass the returned
+    next_cursor back as cursor for the next page; it is null on the last.
+    """
+    size = max(1, min(size, LOGS_MAX_SIZE))
+    query = build_query(start, end, split_param(prediction), split_param(threat_type),
+                        split_param(src_ip), split_param(source), app.state.keyword_suffix)
+    fields = split_param(fields)
+    # Only first pages repeat (dashboard polling); cursors are one-off
+    key = None if cursor else ("search", size, json.dumps(query, sort_keys=True), tuple(fields or ()))
+    if key is not None:
+        cached = app.state.logs_cache.get(key)
+        if cached is not None:
+            return cached
+
+    try:
+        page = await search_logs(app.state.es, ES_INDEX, query, size, fields, cursor, LOGS_PIT_KEEP_ALIVE)
+    except CursorError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=502, content={"error": str(e)})
+    page["size"] = len(page["hits"])
+    if key is not None:
+        app.state.logs_cache.put(key, page)
+    return page
+
+@app.get("/logs/cache")
+def logs_cache_stats():
+    return app.state.logs_cache.stats()
+
+
+async def cached_stats(name, params, compute):
+    """Serves an aggregation from stats_cache, computing it on a miss."""
+    key = (name, json.dumps(params, sort_keys=True))
+    cached = app.state.stats_cache.get(key)
+    if cached is not None:
+        return cached
+    try:
+        result = await compute()
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=502, content={"error": str(e)})
+    app.state.stats_cache.put(key, result)
+    return result
+
+def stats_query(start, end, prediction, threat_type, src_ip, source):
+    return build_query(start, end, split_param(prediction), split_param(threat_type),
+                       split_param(src_ip), split_param(source), app.state.keyword_suffix)
+
+@app.get("/stats/timeline")
+async def stats_timeline(interval: str = "1h", start: str = None, end: str = None, prediction: str = None,
+                         threat_type: str = None, src_ip: str = None, source: str = None):
+    """Event counts per ``interval`` bucket (e.g. 5m, 1h, 1d), split by threat_type."""
+    query = stats_query(start, end, prediction, threat_type, src_ip, source)
+    return await cached_stats("timeline", [interval, query],
+                              lambda: stats_queries.timeline(app.state.es, ES_INDEX, query, interval,
+                                                             app.state.keyword_suffix))
+
+@app.get("/stats/top-sources")
+async def stats_top_sources(size: int = 10, start: str = None, end: str = None, prediction: str = None,
+                            threat_type: str = None, source: str = None):
+    size = max(1, min(size, 1000))
+    query = stats_query(start, end, prediction, threat_type, None, source)
+    return await cached_stats("top-sources", [size, query],
+                              lambda: stats_queries.top_sources(app.state.es, ES_INDEX, query, size,
+                                                                app.state.keyword_suffix))
+
+@app.get("/stats/predictions")
+async def stats_predictions(start: str = None, end: str = None, src_ip: str = None, source: str = None):
+    query = stats_query(start, end, None, None, src_ip, source)
+    return await cached_stats("predictions", [query],
+                              lambda: stats_queries.prediction_counts(app.state.es, ES_INDEX, query,
+                                                                      app.state.keyword_suffix))
+
+@app.get("/stats/cache")
+def stats_cache_stats():
+    return app.state.stats_cache.stats()
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profile")
+def profile_stats():
+    return profiler.stats()
+
+@app.post("/debug/profile")
+def set_profile_rate(every: int = 0):
+    """Profiles one in every ``every`` requests from now on; 0 turns the profiler off."""
+    if not PROFILE_CONTROL_ENABLED:
+        return JSONResponse(status_code=403,
+                            content={"error": "set PROFILE_CONTROL_ENABLED=true to change the profiler at runtime"})
+    if every < 0:
+        return JSONResponse(status_code=400, content={"error": "every must be 0 or more"})
+    profiler.every = every
+    return profiler.stats()
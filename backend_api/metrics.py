@@ -0,0 +1,221 @@
+"""In-process metrics rendered in the Prometheus text format, plus an opt-in profiler.
+
+Metrics are plain dicts keyed by label values, updated on the event loop (or
+under the GIL from worker threads), so recording one costs a dict lookup and
+an add. Gauges whose value lives elsewhere (queue depths, the model version)
+are read by callbacks when /metrics is scraped.
+
+    STAGE_SECONDS.observe(0.012, "predict")
+    with timed("es_write"):
+        ...
+
+MetricsMiddleware times every HTTP request; its profiler runs cProfile around
+1 in every ``every`` requests and dumps the stats to ``directory``. With
+every=0 (the default) that costs one comparison per request.
+"""
+import bisect
+import cProfile
+import os
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.values = {}
+
+    def inc(self, amount=1, *labels):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield self.name, _labels(self.labelnames, labels), value
+
+
+class Gauge:
+    """A set() value, or a callback returning {label tuple: value} read at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), callback=None):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.callback = callback
+        self.values = {}
+
+    def set(self, value, *labels):
+        self.values[labels] = value
+
+    def samples(self):
+        values = self.values
+        if self.callback is not None:
+            try:
+                values = self.callback()
+            except Exception:
+                values = {}  # the app is not started (or is shutting down)
+        for labels, value in values.items():
+            if value is not None:
+                yield self.name, _labels(self.labelnames, labels), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, value, *labels):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                yield self.name + "_bucket", _labels(self.labelnames + ("le",), labels + (bound,)), cumulative
+            yield self.name + "_sum", _labels(self.labelnames, labels), series[-1]
+            yield self.name + "_count", _labels(self.labelnames, labels), cumulative
+
+
+REGISTRY = []
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{labels} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = register(Histogram(
+    "log_analyzer_stage_seconds", "Time per batch spent in each ingest stage", ["stage"]))
+BATCH_SIZE = register(Histogram(
+    "log_analyzer_batch_size", "Records per batch entering classification", ["path"], SIZE_BUCKETS))
+RECORDS = register(Counter(
+    "log_analyzer_records_total", "Classified records", ["prediction", "threat_type"]))
+HTTP_SECONDS = register(Histogram(
+    "log_analyzer_http_request_seconds", "HTTP request latency", ["method", "route", "status"]))
+ES_ERRORS = register(Counter(
+    "log_analyzer_es_write_errors_total", "Documents Elasticsearch did not accept"))
+DUPLICATES = register(Counter(
+    "log_analyzer_duplicates_total", "Replayed documents dropped because their _id was already indexed"))
+
+
+@contextmanager
+def timed(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage)
+
+
+def count_records(records):
+    counts = {}
+    for record in records:
+        key = (record.get("prediction"), record.get("threat_type"))
+        counts[key] = counts.get(key, 0) + 1
+    for key, n in counts.items():
+        RECORDS.inc(n, *key)
+
+
+class SamplingProfiler:
+    """cProfile on 1 in ``every`` requests; one request at a time, stats dumped to directory."""
+
+    def __init__(self, every=0, directory="profiles"):
+        self.every = every
+        self.directory = directory
+        self.seen = 0
+        self.dumps = 0
+        self._active = False
+
+    def should_profile(self):
+        if not self.every or self._active:
+            return False
+        self.seen += 1
+        return self.seen % self.every == 0
+
+    @contextmanager
+    def profile(self, name):
+        # The event loop runs other requests meanwhile, so the profile covers
+        # everything on this thread while the sampled request is in flight
+        self._active = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self._active = False
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.dumps:04d}-{name}.prof")
+            profiler.dump_stats(path)
+            self.dumps += 1
+
+    def stats(self):
+        return {"every": self.every, "directory": self.directory, "sampled": self.dumps}
+
+
+class MetricsMiddleware:
+    """ASGI middleware: request latency by route template, and the sampling profiler."""
+
+    def __init__(self, app, profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            if self.profiler.should_profile():
+                with self.profiler.profile(scope["path"].strip("/").replace("/", "_") or "root"):
+                    await self.app(scope, receive, send_with_status)
+            else:
+                await self.app(scope, receive, send_with_status)
+        finally:
+            # The router leaves the matched route in the scope; label by its
+            # template so /logs?size=N does not make a series per query
+            route = scope.get("route")
+            HTTP_SECONDS.observe(time.perf_counter() - started, scope["method"],
+                                 getattr(route, "path", "unmatched"), status[0])
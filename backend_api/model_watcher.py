@@ -0,0 +1,87 @@
+import asyncio
+import os, sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ml_pipeline import model_registry
+
+
+class ModelWatcher:
+    """Polls the model registry and hot-swaps the executor to its current version.
+
+    The new version is loaded and warmed in the inference workers while the
+    old one keeps serving; a version that fails to load is reported in
+    ``stats`` and not retried until CURRENT changes again.
+    """
+
+    def __init__(self, executor, poll_interval=10.0, registry_dir=None):
+        self.executor = executor
+        self.poll_interval = poll_interval
+        self.registry_dir = registry_dir
+        self._task = None
+        self._lock = asyncio.Lock()
+
+        self.checks = 0
+        self.swaps = 0
+        self.failed_version = None
+        self.last_error = None
+        self.last_swap_at = None
+
+    def start(self):
+        if self._task is None and self.poll_interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self.check()
+
+    async def check(self):
+        """Swaps to the registry's current version if it differs; returns the active version."""
+        self.checks += 1
+        version = model_registry.current_version(self.registry_dir)
+        if version is not None and version not in (self.executor.model_version, self.failed_version):
+            try:
+                await self.activate(version)
+            except Exception:
+                pass  # logged and recorded by activate; keep serving the old version
+        return self.executor.model_version
+
+    async def activate(self, version):
+        """Loads, warms and switches to version; raises if it cannot be loaded."""
+        async with self._lock:
+            if version == self.executor.model_version:
+                return version
+            try:
+                previous = await self.executor.reload(version)
+            except Exception as e:
+                self.failed_version, self.last_error = version, f"{version}: {e}"
+                print(f" Model {version} failed to load, staying on {self.executor.model_version}: {e}")
+                raise
+            self.failed_version = None
+            self.swaps += 1
+            self.last_swap_at = time.time()
+            print(f" Model swapped {previous} -> {version}")
+            return previous
+
+    def stats(self):
+        return {
+            "model_version": self.executor.model_version,
+            "registry_version": model_registry.current_version(self.registry_dir),
+            "poll_interval": self.poll_interval,
+            "checks": self.checks,
+            "swaps": self.swaps,
+            "failed_version": self.failed_version,
+            "last_error": self.last_error,
+            "last_swap_at": self.last_swap_at,
+        }
@@ -0,0 +1,385 @@
+import asyncio
+import fcntl
+import json
+import os
+import struct
+import threading
+import zlib
+
+FRAME = struct.Struct("<II")  # payload length, crc32 of the payload
+
+
+class SpoolFull(Exception):
+    """The spool is at its disk budget and compaction could not make room."""
+
+
+class SpoolLocked(Exception):
+    """Another process has the spool directory open."""
+
+
+class Spool:
+    """Local write-ahead buffer for bulk actions, drained to Elasticsearch in the background.
+
+    Actions are appended to numbered segment files as length-prefixed,
+    CRC-checked JSON frames; each ``append`` is one write and one fsync, so
+    a batch costs a single disk flush. A cursor file records how far the
+    drainer has got: segments wholly before it are deleted, and when the
+    spool reaches ``max_bytes`` the drained head of the oldest segment is
+    compacted away before appends are refused with SpoolFull.
+
+    Positions handed out by ``read`` (and the cursor) are logical offsets:
+    bytes compacted off a segment's head still count, so a batch read before
+    a compaction commits to the right place after it.
+
+    On open, a frame torn by a crash (short or failing its CRC) is cut off,
+    and the drainer resumes from the cursor. Anything shipped but not yet
+    recorded in the cursor is shipped again; actions carry deterministic
+    _ids and op_type create, so Elasticsearch answers those with 409s.
+
+    Calls come from the event loop and from worker threads (``append_async``),
+    so file state is guarded by a lock. Only one process may have a spool
+    directory open: an flock on its ``lock`` file is taken before anything
+    is read or cut, and a second opener gets SpoolLocked.
+    """
+
+    def __init__(self, directory, segment_bytes=16 * 1024 * 1024, max_bytes=1024 * 1024 * 1024, fsync=True):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = open(os.path.join(directory, "lock"), "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise SpoolLocked(f"{directory} is in use by another process") from None
+
+        self.appended = 0
+        self.committed = 0
+        self.compactions = 0
+        self.truncated = 0
+        self.corrupt = 0
+        self.rejected = 0
+
+        self.segments = sorted(int(name[:-4]) for name in os.listdir(directory) if name.endswith(".seg"))
+        self.compacted = {}  # segment -> bytes compacted off its head since open
+        self.cursor = self._load_cursor()
+        self.pending = 0
+        for segment in self.segments:
+            self.pending += self._recover(segment, self.cursor[1] if segment == self.cursor[0] else 0,
+                                          counted=segment >= self.cursor[0])
+        if not self.segments:
+            self.segments = [self.cursor[0]]
+        self._file = open(self._path(self.segments[-1]), "ab")
+        self.write_offset = self._file.tell()
+
+    def _path(self, segment):
+        return os.path.join(self.directory, f"{segment:010d}.seg")
+
+    def _load_cursor(self):
+        try:
+            with open(os.path.join(self.directory, "cursor")) as f:
+                cursor = json.load(f)
+            segment, offset = cursor["segment"], cursor["offset"]
+        except (OSError, ValueError, KeyError):
+            return (self.segments[0] if self.segments else 0), 0
+        if segment not in self.segments:
+            # The cursor's segment was drained and deleted; resume at the next one
+            later = [s for s in self.segments if s > segment]
+            return (later[0] if later else self.segments[-1] if self.segments else segment), 0
+        return segment, offset
+
+    def _file_offset(self, segment, offset):
+        """Where a logical offset is in the segment's file now."""
+        return offset - self.compacted.get(segment, 0)
+
+    def _save_cursor(self):
+        path = os.path.join(self.directory, "cursor")
+        segment, offset = self.cursor
+        with open(path + ".tmp", "w") as f:
+            json.dump({"segment": segment, "offset": self._file_offset(segment, offset)}, f)
+        os.replace(path + ".tmp", path)
+
+    def _recover(self, segment, start, counted):
+        """Cuts a torn tail off the segment; returns how many whole frames follow ``start``."""
+        path = self._path(segment)
+        with open(path, "rb") as f:
+            data = f.read()
+        offset, frames = 0, 0
+        while offset + FRAME.size <= len(data):
+            length, crc = FRAME.unpack_from(data, offset)
+            payload = data[offset + FRAME.size:offset + FRAME.size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            offset += FRAME.size + length
+            frames += offset > start
+        if offset < len(data):
+            print(f" Spool segment {segment}: cut {len(data) - offset} bytes of torn or corrupt data")
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+            self.truncated += 1
+        return frames if counted else 0
+
+    # --- Appending ---
+
+    def append(self, actions):
+        """Appends a batch of bulk actions durably; raises SpoolFull when over the disk budget."""
+        data = bytearray()
+        for action in actions:
+            payload = json.dumps(action, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+            data += FRAME.pack(len(payload), zlib.crc32(payload))
+            data += payload
+        if not data:
+            return 0
+
+        with self._lock:
+            if self.disk_bytes() + len(data) > self.max_bytes:
+                self._compact()
+                if self.disk_bytes() + len(data) > self.max_bytes:
+                    self.rejected += len(actions)
+                    raise SpoolFull(f"spool is at its {self.max_bytes} byte limit")
+            if self.write_offset >= self.segment_bytes:
+                self._roll()
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.write_offset += len(data)
+            self.appended += len(actions)
+            self.pending += len(actions)
+        return len(actions)
+
+    async def append_async(self, actions):
+        """append() on a worker thread, so the fsync does not stall the event loop."""
+        return await asyncio.to_thread(self.append, actions)
+
+    def _roll(self):
+        self._file.close()
+        self.segments.append(self.segments[-1] + 1)
+        self._file = open(self._path(self.segments[-1]), "ab")
+        self.write_offset = 0
+
+    # --- Draining ---
+
+    def read(self, limit):
+        """Up to ``limit`` actions from the cursor on, plus the position just past them."""
+        actions = []
+        with self._lock:
+            segment = self.cursor[0]
+            offset = self._file_offset(*self.cursor)
+            while len(actions) < limit:
+                active = segment == self.segments[-1]
+                end = self.write_offset if active else os.path.getsize(self._path(segment))
+                if offset >= end:
+                    if active:
+                        break
+                    segment, offset = self.segments[self.segments.index(segment) + 1], 0
+                    continue
+                with open(self._path(segment), "rb") as f:
+                    f.seek(offset)
+                    while len(actions) < limit and offset < end:
+                        header = f.read(FRAME.size)
+                        length, crc = FRAME.unpack(header) if len(header) == FRAME.size else (end, 0)
+                        payload = f.read(length) if offset + FRAME.size + length <= end else b""
+                        if len(payload) < length or zlib.crc32(payload) != crc:
+                            # Damaged after it was written; give up on the rest of the segment
+                            print(f" Spool segment {segment}: corrupt frame at {offset}, skipping the rest")
+                            self.corrupt += 1
+                            offset = end
+                            break
+                        actions.append(json.loads(payload))
+                        offset += FRAME.size + length
+            return actions, (segment, offset + self.compacted.get(segment, 0))
+
+    def commit(self, position, count):
+        """Marks everything before ``position`` as shipped and deletes the segments it has passed."""
+        with self._lock:
+            self.cursor = position
+            self._save_cursor()
+            while self.segments[0] < position[0]:
+                segment = self.segments.pop(0)
+                os.remove(self._path(segment))
+                self.compacted.pop(segment, None)
+            self.committed += count
+            self.pending -= count
+
+    def _compact(self):
+        """Rewrites the oldest segment without its drained head; called with the lock held."""
+        segment = self.cursor[0]
+        offset = self._file_offset(*self.cursor)
+        if offset == 0:
+            return
+        path = self._path(segment)
+        with open(path, "rb") as f:
+            f.seek(offset)
+            tail = f.read()
+        with open(path + ".tmp", "wb") as f:
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+        # Cursor first: a crash between the two steps only re-ships the drained head.
+        # The logical cursor stays put; only where it falls in the file moves
+        self.compacted[segment] = self.compacted.get(segment, 0) + offset
+        self._save_cursor()
+        if segment == self.segments[-1]:
+            self._file.close()
+        os.replace(path + ".tmp", path)
+        if segment == self.segments[-1]:
+            self._file = open(path, "ab")
+            self.write_offset = len(tail)
+        self.compactions += 1
+
+    def disk_bytes(self):
+        sizes = [os.path.getsize(self._path(segment)) for segment in self.segments[:-1]]
+        return sum(sizes) + self.write_offset
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._lock_file.close()  # releases the flock
+
+    def stats(self):
+        with self._lock:
+            disk = self.disk_bytes()
+            return {
+                "pending": self.pending,
+                "pending_bytes": disk - self._file_offset(*self.cursor),
+                "disk_bytes": disk,
+                "max_bytes": self.max_bytes,
+                "segments": len(self.segments),
+                "appended": self.appended,
+                "committed": self.committed,
+                "compactions": self.compactions,
+                "truncated": self.truncated,
+                "corrupt": self.corrupt,
+                "rejected": self.rejected,
+            }
+
+
+def open_worker_spools(directory, *args, **kwargs):
+    """This process's spool, plus any orphaned ones it should drain, under ``directory``.
+
+    Each uvicorn worker takes the lowest-numbered ``worker-N`` slot no other
+    process holds, so workers never share segment files or a cursor; the
+    flock goes away with the process. Existing slots nobody holds were left
+    by workers that are gone (a restart with fewer of them), and segments
+    directly in ``directory`` by a single-process spool from before slots;
+    those with events still pending are opened too, for their own drainers.
+    Returns (spool, orphans).
+    """
+    os.makedirs(directory, exist_ok=True)
+    own, orphans = None, []
+    slots = sorted((name for name in os.listdir(directory) if name.startswith("worker-")),
+                   key=lambda name: int(name[len("worker-"):]))
+    n = 0
+    while own is None:
+        name = f"worker-{n}"
+        n += 1
+        try:
+            own = Spool(os.path.join(directory, name), *args, **kwargs)
+        except SpoolLocked:
+            continue
+        if name in slots:
+            slots.remove(name)
+
+    legacy = [directory] if any(name.endswith(".seg") for name in os.listdir(directory)) else []
+    for path in legacy + [os.path.join(directory, name) for name in slots]:
+        try:
+            spool = Spool(path, *args, **kwargs)
+        except SpoolLocked:
+            continue  # a live worker's, or already being drained
+        if spool.stats()["pending"]:
+            orphans.append(spool)
+        else:
+            spool.close()
+    return own, orphans
+
+
+class SpoolDrainer:
+    """Ships spooled actions with ``ship`` (bulk_index-like), oldest first, retrying with backoff.
+
+    ``ship(actions, stats)`` must tally stats["retryable"] for documents worth
+    sending again (429, 5xx); a batch is committed only once none are left,
+    so an outage stalls the drainer, not the ingest path. Documents rejected
+    for good (a mapping error) are counted and dropped.
+    """
+
+    def __init__(self, spool, ship, batch_size=1000, idle_interval=0.2, initial_backoff=0.5, max_backoff=30.0):
+        self.spool = spool
+        self.ship = ship
+        self.batch_size = batch_size
+        self.idle_interval = idle_interval
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.wakeup = asyncio.Event()
+        self._task = None
+
+        self.shipped = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self.failures = 0
+        self.last_error = None
+        self.backoff = 0.0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def notify(self):
+        self.wakeup.set()
+
+    async def _run(self):
+        while True:
+            # File I/O runs off the loop: the spool lock may be held through an append's fsync
+            actions, position = await asyncio.to_thread(self.spool.read, self.batch_size)
+            if not actions:
+                if position != self.spool.cursor:
+                    await asyncio.to_thread(self.spool.commit, position, 0)  # passed the end of a sealed segment
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), self.idle_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            stats = {"indexed": 0, "errors": 0, "duplicates": 0, "retryable": 0}
+            try:
+                await self.ship(actions, stats)
+                error = f"{stats['retryable']} documents failed, will retry" if stats["retryable"] else None
+            except Exception as e:
+                error = str(e)
+            if error is not None:
+                self.failures += 1
+                self.last_error = error
+                self.backoff = min(self.backoff * 2 or self.initial_backoff, self.max_backoff)
+                await asyncio.sleep(self.backoff)
+                continue
+
+            await asyncio.to_thread(self.spool.commit, position, len(actions))
+            self.backoff = 0.0
+            self.shipped += stats["indexed"]
+            self.duplicates += stats["duplicates"]
+            self.dropped += stats["errors"]
+
+    def stats(self):
+        return {
+            **self.spool.stats(),
+            "shipped": self.shipped,
+            "duplicates": self.duplicates,
+            "dropped": self.dropped,
+            "failures": self.failures,
+            "backoff_seconds": self.backoff,
+            "last_error": self.last_error,
+        }
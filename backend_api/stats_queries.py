@@ -0,0 +1,74 @@
+import re
+
+# Aggregations need keyword fields; under dynamic mapping strings are text
+# with a .keyword sub-field, under the index template they are keywords
+# already (suffix ""). The caller passes whichever applies to its index.
+KEYWORD_SUFFIX = ".keyword"
+INTERVAL_PATTERN = re.compile(r"^\d+[smhd]$")
+
+
+def keyword(field, suffix=KEYWORD_SUFFIX):
+    return field + suffix
+
+
+def check_interval(interval):
+    """'5m', '1h', '1d' ...; raises ValueError otherwise."""
+    if not INTERVAL_PATTERN.match(interval):
+        raise ValueError(f"invalid interval {interval!r}; use a number followed by s, m, h or d")
+    return interval
+
+
+def _counts(buckets):
+    return {bucket["key"]: bucket["doc_count"] for bucket in buckets}
+
+
+async def timeline(es, index, query, interval, keyword_suffix=KEYWORD_SUFFIX, threat_types=20):
+    """Counts per time bucket, split by threat_type."""
+    res = await es.search(index=index, size=0, query=query, aggs={
+        "timeline": {
+            "date_histogram": {"field": "timestamp", "fixed_interval": check_interval(interval), "min_doc_count": 0},
+            "aggs": {"threat_type": {"terms": {"field": keyword("threat_type", keyword_suffix), "size": threat_types}}},
+        },
+    })
+    return {
+        "interval": interval,
+        "buckets": [
+            {
+                "time": bucket.get("key_as_string", bucket["key"]),
+                "total": bucket["doc_count"],
+                "threat_types": _counts(bucket["threat_type"]["buckets"]),
+            }
+            for bucket in res["aggregations"]["timeline"]["buckets"]
+        ],
+    }
+
+
+async def top_sources(es, index, query, size=10, keyword_suffix=KEYWORD_SUFFIX, threat_types=20):
+    """The source IPs with the most events, each with its threat_type split."""
+    res = await es.search(index=index, size=0, query=query, aggs={
+        "sources": {
+            "terms": {"field": keyword("src_ip", keyword_suffix), "size": size},
+            "aggs": {"threat_type": {"terms": {"field": keyword("threat_type", keyword_suffix), "size": threat_types}}},
+        },
+    })
+    return {
+        "sources": [
+            {"src_ip": bucket["key"], "count": bucket["doc_count"],
+             "threat_types": _counts(bucket["threat_type"]["buckets"])}
+            for bucket in res["aggregations"]["sources"]["buckets"]
+        ],
+    }
+
+
+async def prediction_counts(es, index, query, keyword_suffix=KEYWORD_SUFFIX, threat_types=20):
+    """Totals by prediction and by threat_type."""
+    res = await es.search(index=index, size=0, query=query, track_total_hits=True, aggs={
+        "prediction": {"terms": {"field": keyword("prediction", keyword_suffix), "size": 10}},
+        "threat_type": {"terms": {"field": keyword("threat_type", keyword_suffix), "size": threat_types}},
+    })
+    aggregations = res["aggregations"]
+    return {
+        "total": res["hits"]["total"]["value"],
+        "predictions": _counts(aggregations["prediction"]["buckets"]),
+        "threat_types": _counts(aggregations["threat_type"]["buckets"]),
+    }
@@ -1,26 +1,223 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import deque
 from fastapi import WebSocket
-from typing import List
+from typing import Dict, NamedTuple, Optional, FrozenSet
+
+from config import (
+    WS_QUEUE_SIZE, WS_MAX_LAG_SECONDS, WS_SEND_TIMEOUT,
+    WS_BATCH_WINDOW_MS, WS_MAX_PENDING,
+)
+from metrics import timed
+from broadcast import LocalBroadcast
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription(NamedTuple):
+    """What a client wants to see; clients with equal subscriptions share frames."""
+    predictions: Optional[FrozenSet[str]] = None
+    threat_types: Optional[FrozenSet[str]] = None
+    normal_sample_rate: float = 1.0
+
+    @classmethod
+    def from_message(cls, message: dict) -> "Subscription":
+        """Builds a subscription from the client's JSON message.
+
+        {"prediction": "anomaly", "threat_type": ["brute_force", "port_scan"], "normal_sample_rate": 0.01}
+        Every key is optional; a missing filter matches everything.
+        """
+        def as_set(value):
+            if value is None:
+                return None
+            values = [value] if isinstance(value, str) else list(value)
+            return frozenset(str(v) for v in values)
+
+        rate = float(message.get("normal_sample_rate", 1.0))
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError("normal_sample_rate must be between 0 and 1")
+        return cls(as_set(message.get("prediction")), as_set(message.get("threat_type")), rate)
+
+    def select(self, records):
+        selected = []
+        for record in records:
+            if self.predictions is not None and record.get("prediction") not in self.predictions:
+                continue
+            if self.threat_types is not None and record.get("threat_type") not in self.threat_types:
+                continue
+            if (self.normal_sample_rate < 1.0 and record.get("prediction") == "normal"
+                    and random.random() >= self.normal_sample_rate):
+                continue
+            selected.append(record)
+        return selected
+
+
+class ClientConnection:
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.subscription = Subscription()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.lagging_since: Optional[float] = None
+        self.sent = 0
+        self.dropped = 0
 
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    """Fans classified records out to WebSocket clients in batched frames.
+
+    ``broadcast`` only buffers the record. Every ``window`` seconds a flusher
+    groups clients by subscription, filters the buffered records once per
+    group, serializes the result once as a JSON array and queues that same
+    text frame for each client in the group. Every client has its own bounded
+    queue and writer task: one that cannot keep up loses its oldest frames,
+    and one that stays behind for ``max_lag`` seconds is evicted.
+
+    ``backend`` decides who else sees the records: LocalBroadcast (the
+    default) keeps them in this process; UnixSocketBroadcast also forwards
+    them to, and receives them from, the other uvicorn workers.
+    """
+
+    def __init__(self, queue_size=WS_QUEUE_SIZE, max_lag=WS_MAX_LAG_SECONDS, send_timeout=WS_SEND_TIMEOUT,
+                 window=WS_BATCH_WINDOW_MS / 1000, max_pending=WS_MAX_PENDING):
+        self.queue_size = queue_size
+        self.max_lag = max_lag
+        self.send_timeout = send_timeout
+        self.window = window
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        self.pending = deque(maxlen=max_pending)
+        self._flusher: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.frames_serialized = 0
+        self.backend = LocalBroadcast(self)
+
+    @property
+    def active_connections(self):
+        return list(self.clients)
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        client = ClientConnection(websocket, self.queue_size)
+        client.writer = asyncio.create_task(self._writer(client))
+        self.clients[websocket] = client
+        if len(self.clients) == 1:
+            self.backend.listening_changed()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    def subscribe(self, websocket: WebSocket, message: dict):
+        client = self.clients.get(websocket)
+        if client:
+            client.subscription = Subscription.from_message(message)
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        client = self.clients.pop(websocket, None)
+        if client and not self.clients:
+            self.backend.listening_changed()
+        if client and client.writer and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+
+    def _evict(self, client: ClientConnection, reason: str):
+        logger.warning("WebSocket client evicted: %s", reason)
+        self.evicted += 1
+        self.disconnect(client.websocket)
+        asyncio.create_task(self._close(client.websocket))
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections.copy():  # Copy to avoid iteration issues
+    async def _close(self, websocket: WebSocket):
+        try:
+            await websocket.close(code=1008)
+        except Exception:
+            pass
+
+    async def _writer(self, client: ClientConnection):
+        while True:
+            frame = await client.queue.get()
             try:
-                await connection.send_json(message)
+                await asyncio.wait_for(client.websocket.send_text(frame), self.send_timeout)
+            except asyncio.TimeoutError:
+                self._evict(client, f"send blocked for more than {self.send_timeout}s")
+                return
             except Exception as e:
-                print(f" WebSocket error: {e}")
-                self.disconnect(connection)
+                logger.warning("WebSocket error: %s", e)
+                self.disconnect(client.websocket)
+                return
+            client.sent += 1
+            self.sent += 1
+
+    def _enqueue(self, client: ClientConnection, frame: str, now: float):
+        if client.queue.full():
+            if client.lagging_since is None:
+                client.lagging_since = now
+            elif now - client.lagging_since > self.max_lag:
+                self._evict(client, f"behind for more than {self.max_lag}s")
+                return
+            client.queue.get_nowait()  # drop the oldest, keep the newest
+            client.dropped += 1
+            self.dropped += 1
+        else:
+            client.lagging_since = None
+        client.queue.put_nowait(frame)
+
+    def broadcast(self, message: dict):
+        """Buffers message for the next frame; never waits for delivery."""
+        if self.clients:
+            self.pending.append(message)
+        outbox = self.backend.outbox
+        if outbox is not None:
+            outbox.append(message)
+
+    def receive(self, records):
+        """Buffers records another worker classified."""
+        if self.clients:
+            self.pending.extend(records)
+
+    def flush(self):
+        """Sends everything buffered so far, one serialized frame per subscription."""
+        if not self.pending:
+            return
+        records = list(self.pending)
+        self.pending.clear()
+        with timed("broadcast"):
+            self._send(records)
+
+    def _send(self, records):
+        groups: Dict[Subscription, list] = {}
+        for client in self.clients.values():
+            groups.setdefault(client.subscription, []).append(client)
+
+        now = time.monotonic()
+        for subscription, clients in groups.items():
+            selected = subscription.select(records)
+            if not selected:
+                continue
+            frame = json.dumps(selected, ensure_ascii=False, separators=(",", ":"), default=str)
+            self.frames_serialized += 1
+            for client in clients:
+                self._enqueue(client, frame, now)
+
+    async def _flush_loop(self):
+        while self.clients:
+            await asyncio.sleep(self.window)
+            self.flush()
+
+    def stats(self):
+        return {
+            "clients": len(self.clients),
+            "subscriptions": len({client.subscription for client in self.clients.values()}),
+            "pending": len(self.pending),
+            "frames_serialized": self.frames_serialized,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "evicted": self.evicted,
+            "queue_depth": sum(client.queue.qsize() for client in self.clients.values()),
+            "max_queue_depth": max((client.queue.qsize() for client in self.clients.values()), default=0),
+            "broadcast": self.backend.stats(),
+        }
 
 
 manager = ConnectionManager()
@@ -0,0 +1,233 @@
+# benchmarks/bench_end_to_end.py
+"""End-to-end throughput and latency, stage by stage, against a stand-in ES.
+
+A synthetic corpus is built from the templates in
+scripts/bulk_upload_to_es.generate_logs, wrapped in syslog headers, then
+pushed through each stage on its own:
+
+    parse      parser.log_parser.parse_line, per batch of lines
+    features   ml_pipeline.features.feature_vector, per batch
+    inference  ml_pipeline.infer.infer_logs, per batch
+    ingest     POST /ingest, one event per request from concurrent clients
+    batch      POST /ingest/batch, NDJSON batches
+    upload     POST /upload, one file per request
+
+The HTTP stages run the real FastAPI app through TestClient, with
+Elasticsearch replaced by the in-process stub from tests/es_stub.py, so
+they measure the backend rather than a cluster. Every stage reports
+items/s plus p50 / p99 latency of its unit of work (a batch, a request).
+
+Results are written as JSON; --compare prints the change against an
+earlier run, so regressions show up between commits:
+
+    python benchmarks/bench_end_to_end.py --events 20000 --output before.json
+    python benchmarks/bench_end_to_end.py --events 20000 --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "backend_api"))
+from scripts.bulk_upload_to_es import generate_logs
+
+STAGES = ("parse", "features", "inference", "ingest", "batch", "upload")
+
+
+def corpus(events, seed=42, anomaly_ratio=0.3):
+    """Syslog lines carrying generate_logs messages, one second apart."""
+    random.seed(seed)
+    lines = []
+    for i, log in enumerate(generate_logs(events, anomaly_ratio)):
+        minutes, seconds = divmod(i, 60)
+        lines.append(f"Dec 10 {minutes // 60 % 24:02d}:{minutes % 60:02d}:{seconds:02d} bench sshd[{1000 + i % 9000}]: {log['raw']}")
+    return lines
+
+
+def batches(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def summarize(items, seconds, latencies, unit, unit_size):
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "items": items,
+        "seconds": round(seconds, 4),
+        "per_second": round(items / seconds, 1) if seconds else None,
+        "unit": unit,
+        "unit_size": unit_size,
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+    }
+
+
+def run_batched(fn, items, size, unit="batch"):
+    latencies = []
+    started = time.perf_counter()
+    for batch in batches(items, size):
+        t = time.perf_counter()
+        fn(batch)
+        latencies.append(time.perf_counter() - t)
+    return summarize(len(items), time.perf_counter() - started, latencies, unit, size)
+
+
+def run_concurrent(fn, jobs, concurrency, items, unit, unit_size):
+    def timed(job):
+        t = time.perf_counter()
+        fn(job)
+        return time.perf_counter() - t
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, jobs))
+    return summarize(items, time.perf_counter() - started, latencies, unit, unit_size)
+
+
+# --- In-process stages ---
+
+def bench_parse(lines, args):
+    from parser.log_parser import parse_line
+    return run_batched(lambda batch: [parse_line(line, "bench") for line in batch], lines, args.batch_size)
+
+
+def bench_features(lines, args):
+    from ml_pipeline.features import feature_vector
+    return run_batched(lambda batch: [feature_vector(line, line[:15]) for line in batch], lines, args.batch_size)
+
+
+def bench_inference(lines, args):
+    from ml_pipeline.infer import infer_logs
+    logs = [{"raw": line} for line in lines]
+    infer_logs(logs[:1])  # model load is not part of the measurement
+    return run_batched(infer_logs, logs, args.batch_size)
+
+
+# --- HTTP stages, through the real app ---
+
+def bench_http(lines, args, stages):
+    import config
+    from fastapi.testclient import TestClient
+    from tests.es_stub import ElasticsearchStub
+
+    results = {}
+    with ElasticsearchStub() as stub:
+        config.ES_URL = stub.url
+        import main
+        with TestClient(main.app) as client:
+            def check(res):
+                if res.status_code != 200:
+                    raise RuntimeError(f"{res.request.url}: HTTP {res.status_code} {res.text[:200]}")
+
+            if "ingest" in stages:
+                events = lines[:args.ingest_events]
+                results["ingest"] = run_concurrent(
+                    lambda line: check(client.post("/ingest", json={"raw": line})),
+                    events, args.concurrency, len(events), "request", 1,
+                )
+            if "batch" in stages:
+                bodies = ["\n".join(json.dumps({"raw": line}) for line in batch).encode() for batch in batches(lines, args.batch_size)]
+                results["batch"] = run_concurrent(
+                    lambda body: check(client.post("/ingest/batch", content=body)),
+                    bodies, 1, len(lines), "request", args.batch_size,
+                )
+            if "upload" in stages:
+                files = ["\n".join(batch).encode() + b"\n" for batch in batches(lines, args.upload_lines)]
+                results["upload"] = run_concurrent(
+                    lambda data: check(client.post("/upload", files={"file": ("bench.log", data)})),
+                    files, 1, len(lines), "request", args.upload_lines,
+                )
+        results["es_documents"] = stub.count()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline):
+    print(f"\n {'stage':<10}{'items/s before':>16}{'after':>12}{'change':>9}{'p99 ms before':>16}{'after':>10}")
+    for stage, now in current["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before or not before.get("per_second") or not now.get("per_second"):
+            continue
+        change = (now["per_second"] / before["per_second"] - 1) * 100
+        print(f" {stage:<10}{before['per_second']:>16,.0f}{now['per_second']:>12,.0f}{change:>+8.1f}%"
+              f"{before['p99_ms']:>16.2f}{now['p99_ms']:>10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark")
+    parser.add_argument("--events", type=int, default=20000, help="corpus size")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated subset of " + ",".join(STAGES))
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--ingest-events", type=int, default=2000, help="events sent one by one to /ingest")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent /ingest clients")
+    parser.add_argument("--upload-lines", type=int, default=5000, help="lines per /upload file")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="JSON results file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    lines = corpus(args.events, args.seed)
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "events": len(lines),
+            "args": vars(args),
+        },
+        "stages": {},
+    }
+
+    in_process = {"parse": bench_parse, "features": bench_features, "inference": bench_inference}
+    for stage in stages:
+        if stage in in_process:
+            results["stages"][stage] = in_process[stage](lines, args)
+    http = [stage for stage in stages if stage not in in_process]
+    if http:
+        measured = bench_http(lines, args, http)
+        results["meta"]["es_documents"] = measured.pop("es_documents")
+        results["stages"].update(measured)
+
+    print(f" {len(lines):,} events, commit {results['meta']['commit']}")
+    print(f" {'stage':<10}{'items/s':>12}{'unit':>22}{'p50 ms':>10}{'p99 ms':>10}")
+    for stage, r in results["stages"].items():
+        print(f" {stage:<10}{r['per_second']:>12,.0f}{r['unit'] + ' of ' + str(r['unit_size']):>22}"
+              f"{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{results['meta']['commit'] or 'latest'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f" Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_features.py
+"""Feature extraction microbenchmark: lines/sec before and after ml_pipeline.features.
+
+Run from the project root:  python benchmarks/bench_features.py
+"""
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ml_pipeline.features import extract_features_frame, feature_vector
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+def legacy_extract_features_from_raw(raw, timestamp):
+    """The per-keyword implementation infer.py used before the shared module."""
+    try:
+        ts = datetime.fromisoformat(timestamp)
+    except Exception:
+        ts = datetime.utcnow()
+
+    def has_keyword(text, keyword):
+        return int(keyword in text.lower())
+
+    return {
+        "length": len(raw),
+        "contains_ip": int(bool(re.search(r"\b\d{1,3}(?:\.\d{1,3}){3}\b", raw))),
+        "hour": ts.hour,
+        "failed": has_keyword(raw, "failed"),
+        "connection": has_keyword(raw, "connection"),
+        "invalid": has_keyword(raw, "invalid"),
+        "malicious": has_keyword(raw, "malicious"),
+        "scan": has_keyword(raw, "scan"),
+    }
+
+
+def legacy_extract_features(df):
+    """The seven-pass DataFrame.apply implementation from train_classic_model.py."""
+    def has_keyword(text, keyword):
+        return int(keyword in text.lower())
+
+    df["length"] = df["raw"].apply(len)
+    df["contains_ip"] = df["raw"].apply(lambda t: int(bool(re.search(r"\b\d{1,3}(?:\.\d{1,3}){3}\b", t))))
+    df["hour"] = df["timestamp"].apply(lambda t: pd.to_datetime(t, format="%b %d %H:%M:%S", errors='coerce').hour if t else -1)
+    df["failed"] = df["raw"].apply(lambda t: has_keyword(t, "failed"))
+    df["connection"] = df["raw"].apply(lambda t: has_keyword(t, "connection"))
+    df["invalid"] = df["raw"].apply(lambda t: has_keyword(t, "invalid"))
+    df["malicious"] = df["raw"].apply(lambda t: has_keyword(t, "malicious"))
+    df["scan"] = df["raw"].apply(lambda t: has_keyword(t, "scan"))
+    return df[["length", "contains_ip", "hour", "failed", "connection", "invalid", "malicious", "scan"]]
+
+
+def load_lines(repeat):
+    lines = []
+    for path in sorted(DATA_DIR.glob("*.log")):
+        with open(path) as f:
+            lines.extend(line.rstrip("\n") for line in f if line.strip())
+    return lines * repeat
+
+
+def rate(fn, n):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return n / elapsed if elapsed else float("inf")
+
+
+def main(repeat=10):
+    lines = load_lines(repeat)
+    timestamps = [line[:15] for line in lines]
+    iso = datetime.utcnow().isoformat()
+    n = len(lines)
+    print(f" Benchmarking feature extraction over {n} lines\n")
+
+    before = rate(lambda: [legacy_extract_features_from_raw(raw, iso) for raw in lines], n)
+    after = rate(lambda: [feature_vector(raw, iso) for raw in lines], n)
+    print(f" online  (scalar)     before: {before:>12,.0f} lines/s   after: {after:>12,.0f} lines/s   x{after / before:.2f}")
+
+    df = pd.DataFrame({"raw": lines, "timestamp": timestamps})
+    before = rate(lambda: legacy_extract_features(df.copy()), n)
+    after = rate(lambda: extract_features_frame(df["raw"], df["timestamp"]), n)
+    print(f" train   (vectorized) before: {before:>12,.0f} lines/s   after: {after:>12,.0f} lines/s   x{after / before:.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,127 @@
+# benchmarks/bench_index_schema.py
+"""Disk size and indexing rate of classified-logs documents, dynamic mapping vs the index template.
+
+Needs a live Elasticsearch (the in-process stub stores JSON, not Lucene
+segments). The same classified corpus is bulk-indexed into two throwaway
+indices:
+
+    dynamic    what the backend used to do: no mapping, random _ids
+    template   backend_api/index_template.MAPPINGS and settings, hashed _ids
+
+Each is then force-merged to one segment so store sizes are comparable.
+The template run also replays the corpus with op_type create to show the
+duplicates being dropped.
+
+    python benchmarks/bench_index_schema.py --es-url http://localhost:9200 --events 200000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from elasticsearch import Elasticsearch
+from elasticsearch.helpers import streaming_bulk
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "backend_api"))
+from benchmarks.bench_end_to_end import corpus, batches
+from ml_pipeline.infer import infer_logs
+from parser.log_parser import parse_line
+
+
+def classified(lines, batch_size):
+    """Records as the backend indexes them: prediction, extracted fields, source and ingested_at."""
+    from index_template import extract_fields
+
+    records = []
+    for batch in batches(lines, batch_size):
+        ingested_at = datetime.utcnow().isoformat()
+        for record in infer_logs([{"raw": line} for line in batch]):
+            extract_fields(record, parse_line(record["raw"], "bench.log"))
+            record["source"] = "bench.log"
+            record["ingested_at"] = ingested_at
+            records.append(record)
+    return records
+
+
+def index_all(es, actions, chunk_size):
+    counts = {"indexed": 0, "duplicates": 0, "errors": 0}
+    started = time.perf_counter()
+    for ok, item in streaming_bulk(es, actions, chunk_size=chunk_size, raise_on_error=False):
+        if ok:
+            counts["indexed"] += 1
+        elif next(iter(item.values())).get("status") == 409:
+            counts["duplicates"] += 1
+        else:
+            counts["errors"] += 1
+    counts["seconds"] = round(time.perf_counter() - started, 3)
+    return counts
+
+
+def store_bytes(es, index):
+    es.indices.refresh(index=index)
+    es.indices.forcemerge(index=index, max_num_segments=1)
+    return es.indices.stats(index=index, metric="store")["indices"][index]["primaries"]["store"]["size_in_bytes"]
+
+
+def run(es, name, records, args, template):
+    from index_template import MAPPINGS, document_id
+
+    index = f"{args.prefix}-{name}"
+    es.indices.delete(index=index, ignore_unavailable=True)
+    if template:
+        es.indices.create(index=index, mappings=MAPPINGS, settings={
+            "index.codec": "best_compression", "number_of_shards": 1, "number_of_replicas": 0})
+        actions = lambda: (
+            {"_op_type": "create", "_index": index, "_source": record,
+             "_id": document_id(record["source"], i, record["raw"])}
+            for i, record in enumerate(records)
+        )
+    else:
+        es.indices.create(index=index, settings={"number_of_shards": 1, "number_of_replicas": 0})
+        actions = lambda: ({"_index": index, "_source": record} for record in records)
+
+    result = index_all(es, actions(), args.chunk_size)
+    result["docs_per_second"] = round(result["indexed"] / result["seconds"], 1) if result["seconds"] else None
+    result["store_bytes"] = store_bytes(es, index)
+    if template:
+        result["replay"] = index_all(es, actions(), args.chunk_size)
+    if not args.keep:
+        es.indices.delete(index=index)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index template vs dynamic mapping benchmark")
+    parser.add_argument("--es-url", default=os.getenv("ES_URL", "http://localhost:9200"))
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--chunk-size", type=int, default=500, help="documents per bulk request")
+    parser.add_argument("--prefix", default="bench-schema")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark indices")
+    parser.add_argument("--output", default=None, help="JSON results file")
+    args = parser.parse_args(argv)
+
+    es = Elasticsearch(args.es_url, request_timeout=120)
+    records = classified(corpus(args.events), 1000)
+    results = {name: run(es, name, records, args, name == "template") for name in ("dynamic", "template")}
+
+    before, after = results["dynamic"], results["template"]
+    print(f" {len(records):,} documents")
+    print(f" {'':<10}{'MB on disk':>12}{'docs/s':>12}")
+    for name, r in results.items():
+        print(f" {name:<10}{r['store_bytes'] / 1e6:>12.1f}{r['docs_per_second']:>12,.0f}")
+    print(f" Disk {after['store_bytes'] / before['store_bytes'] - 1:+.1%}, "
+          f"ingest rate {after['docs_per_second'] / before['docs_per_second'] - 1:+.1%}; "
+          f"replay: {after['replay']['duplicates']:,} duplicates dropped, {after['replay']['indexed']:,} indexed")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
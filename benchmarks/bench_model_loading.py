@@ -0,0 +1,76 @@
+# benchmarks/bench_model_loading.py
+"""Model start-up and per-batch latency: joblib/sklearn vs the compact NumPy export.
+
+Run from the project root:  python benchmarks/bench_model_loading.py
+"""
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+from ml_pipeline.compact_model import COMPACT_MODEL_PATH, JOBLIB_MODEL_PATH, CompactGradientBoosting
+from ml_pipeline.features import FEATURE_COLUMNS
+
+BATCH_SIZES = (1, 100, 1000, 10000)
+COLD_RUNS = 3
+
+COLD_START = """
+import time
+started = time.perf_counter()
+import os
+os.environ["INFER_MODEL_BACKEND"] = "{backend}"
+from ml_pipeline import infer
+infer.warm_up()
+print(time.perf_counter() - started)
+"""
+
+
+def cold_start(backend):
+    """Seconds for a fresh interpreter to import infer and make its first prediction."""
+    timings = []
+    for _ in range(COLD_RUNS):
+        out = subprocess.run(
+            [sys.executable, "-c", COLD_START.format(backend=backend)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(timings)
+
+
+def batch_latency(predict, X, repeats=5):
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        predict(X)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    from joblib import load
+
+    print(f" Artifact size: joblib {os.path.getsize(JOBLIB_MODEL_PATH) / 1024:.1f} KB, "
+          f"compact {os.path.getsize(COMPACT_MODEL_PATH) / 1024:.1f} KB")
+    for backend in ("sklearn", "compact"):
+        print(f" Cold start ({backend}): {cold_start(backend) * 1000:.0f} ms")
+
+    sklearn_model = load(JOBLIB_MODEL_PATH)
+    compact = CompactGradientBoosting.load()
+    rng = np.random.default_rng(0)
+    for size in BATCH_SIZES:
+        X = np.column_stack([
+            rng.integers(20, 300, size), rng.integers(0, 2, size), rng.integers(0, 24, size),
+            *[rng.integers(0, 2, size) for _ in range(5)],
+        ]).astype(np.int64)
+        sk = batch_latency(lambda m: sklearn_model.predict(pd.DataFrame(m, columns=FEATURE_COLUMNS)), X)
+        cp = batch_latency(compact.predict, X)
+        print(f" batch={size:>6}: sklearn {sk * 1000:8.2f} ms  compact {cp * 1000:8.2f} ms  ({sk / cp:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_parsers.py
+"""Parser throughput over data/*.log: per-line re.match on raw pattern strings
+(the old parse_apache_log / parse_syslog, chosen by filename) versus the
+precompiled registry with content detection. "matched" is the share of lines
+that came back structured rather than as {"raw": ...}; the openssh parser
+also extracts src_ip / user / port, which the legacy parser never did.
+
+Run from the project root:  python benchmarks/bench_parsers.py [repeat]
+"""
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from parser.registry import ParserRegistry
+from scripts.bulk_parse import detect_log_type
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+def legacy_parse_apache_log(line):
+    pattern = r'(\S+) (\S+) (\S+) \[(.*?)\] "(.*?)" (\d{3}) (\d+)'
+    match = re.match(pattern, line)
+    if match:
+        return {
+            "ip": match.group(1),
+            "user": match.group(3),
+            "timestamp": match.group(4),
+            "request": match.group(5),
+            "status": int(match.group(6)),
+            "size": int(match.group(7)),
+        }
+    return {"raw": line.strip()}
+
+
+def legacy_parse_syslog(line):
+    pattern = r'^(\w{3}\s+\d+\s[\d:]+)\s([\w.-]+)\s([\w\/\-\[\]]+):\s?(.*)'
+    match = re.match(pattern, line)
+    if match:
+        return {
+            "timestamp": match.group(1),
+            "hostname": match.group(2),
+            "service": match.group(3),
+            "message": match.group(4),
+        }
+    return {"raw": line.strip()}
+
+
+LEGACY = {"apache": legacy_parse_apache_log, "nginx": legacy_parse_apache_log, "syslog": legacy_parse_syslog}
+
+
+def timed(fn, lines):
+    start = time.perf_counter()
+    results = [fn(line) for line in lines]
+    return time.perf_counter() - start, results
+
+
+def main(repeat=20):
+    print(f" {'file':<16}{'legacy type':<14}{'legacy lines/s':>16}{'matched':>9}   "
+          f"{'detected':<14}{'registry lines/s':>18}{'matched':>9}")
+    for path in sorted(DATA_DIR.glob("*.log")):
+        with open(path) as f:
+            lines = [line for line in f if line.strip()] * repeat
+
+        legacy_type = detect_log_type(path.name)
+        legacy_secs, legacy = timed(LEGACY[legacy_type], lines)
+
+        registry = ParserRegistry()
+        source = str(path)
+        detected = registry.detect_file(path)
+        registry_secs, parsed = timed(lambda line: registry.parse(line, source), lines)
+
+        def matched(results):
+            return sum(1 for r in results if len(r) > 1) / len(results)
+
+        print(f" {path.name:<16}{legacy_type:<14}{len(lines) / legacy_secs:>16,.0f}{matched(legacy):>9.0%}   "
+              f"{detected.name:<14}{len(lines) / registry_secs:>18,.0f}{matched(parsed):>9.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
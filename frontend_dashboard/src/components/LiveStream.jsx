@@ -6,9 +6,16 @@ function LiveStream() {
   useEffect(() => {
     const socket = new WebSocket("ws://localhost:8000/ws/logs");
 
+    socket.onopen = () => {
+      // Optional server-side filter, e.g. { prediction: "anomaly", normal_sample_rate: 0.01 }
+      socket.send(JSON.stringify({}));
+    };
+
     socket.onmessage = (event) => {
-      const log = JSON.parse(event.data);
-      setMessages(prev => [log, ...prev.slice(0, 50)]); // show last 50
+      const frame = JSON.parse(event.data);
+      if (!Array.isArray(frame)) return; // subscription errors
+      const logs = frame.slice().reverse(); // newest first
+      setMessages(prev => [...logs, ...prev].slice(0, 50)); // show last 50
     };
 
     socket.onerror = (err) => {
@@ -0,0 +1,83 @@
+# ml_pipeline/cache.py
+import re
+import threading
+import time
+from collections import OrderedDict
+
+MODES = ("features", "template")
+
+# Masks applied, in order, to turn a log line into its template
+TEMPLATE_MASKS = [
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<IP>"),
+    (re.compile(r"\b(?:0x[0-9a-fA-F]+|[0-9a-fA-F]{8,})\b"), "<HEX>"),
+    (re.compile(r"\d+"), "<NUM>"),
+]
+
+
+def mask_template(raw):
+    """'Failed password for root from 10.0.0.5 port 22' -> 'Failed password for root from <IP> port <NUM>'"""
+    for pattern, placeholder in TEMPLATE_MASKS:
+        raw = pattern.sub(placeholder, raw)
+    return raw
+
+
+class InferenceCache:
+    """Bounded LRU cache of predictions with an optional TTL.
+
+    In "features" mode the key is the exact feature vector, so a hit returns
+    precisely what the model would. In "template" mode the key is the masked
+    log template plus the hour, which also skips feature extraction; lines
+    sharing a template get the prediction of the first one seen even if, say,
+    a longer IP changed their length feature.
+    """
+
+    def __init__(self, max_size=10000, ttl=None, mode="features"):
+        if mode not in MODES:
+            raise ValueError(f"Unsupported cache mode: {mode} (expected one of {', '.join(MODES)})")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.mode = mode
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,236 @@
+# ml_pipeline/compact_model.py
+"""Array-backed copy of the GradientBoosting classifier.
+
+export_gradient_boosting flattens the fitted ensemble into a few NumPy arrays
+saved as one .npz file. CompactGradientBoosting loads that file with nothing
+but NumPy (no pickle, no sklearn) and predicts in batches.
+
+Layout (QuickScorer-style bitvectors): every tree has at most 8 leaves, and
+which leaf a row lands in is the lowest bit left set after clearing, for each
+split the row fails (x > threshold), the leaves of that split's left subtree.
+For one feature the failed splits are exactly those whose threshold sorts
+below x, so the cleared bits are precomputed per (threshold rank, tree) and a
+row's leaf byte for all trees is the AND of one table row per feature.
+
+Leaf values are stored already multiplied by the learning rate, with the prior
+folded into the first stage, and stages are summed in order, so the raw scores
+are bit-identical to GradientBoostingClassifier.decision_function.
+
+The IsolationForest pre-filter gets the same treatment in a simpler form:
+its features are small integers, so export_isolation_forest tabulates
+score_samples over every integer combination the forest can tell apart and
+CompactIsolationForest scores a batch with one table lookup per row.
+
+Export the shipped models:  python ml_pipeline/compact_model.py
+"""
+import os
+import sys
+import numpy as np
+
+COMPACT_MODEL_PATH = os.path.join(os.path.dirname(__file__), "classic_classifier.npz")
+JOBLIB_MODEL_PATH = os.path.join(os.path.dirname(__file__), "classic_classifier.joblib")
+ISOLATION_COMPACT_PATH = os.path.join(os.path.dirname(__file__), "isolation_forest.npz")
+ISOLATION_JOBLIB_PATH = os.path.join(os.path.dirname(__file__), "isolation_forest.joblib")
+
+MAX_LEAVES = 8  # one uint8 bitvector per tree
+BLOCK_ROWS = 4096
+MAX_GRID_CELLS = 1_000_000
+
+
+def _tree_leaves(tree, splits, tree_index):
+    """Collects (threshold, tree, cleared-bit mask) per split feature; returns leaf node ids left to right."""
+    leaves = []
+
+    def walk(node):
+        if tree.children_left[node] == -1:
+            leaves.append(node)
+            return 1 << (len(leaves) - 1)
+        left = walk(tree.children_left[node])
+        right = walk(tree.children_right[node])
+        splits[tree.feature[node]].append((tree.threshold[node], tree_index, ~left & 0xFF))
+        return left | right
+
+    walk(0)
+    return leaves
+
+
+def export_gradient_boosting(model, path=COMPACT_MODEL_PATH):
+    """Writes a fitted GradientBoostingClassifier to path as flat NumPy arrays."""
+    n_stages, trees_per_stage = model.estimators_.shape
+    trees = [estimator.tree_ for estimator in model.estimators_.ravel()]
+    if max(tree.n_leaves for tree in trees) > MAX_LEAVES:
+        raise ValueError(f"Compact export supports trees with at most {MAX_LEAVES} leaves (max_depth <= 3)")
+
+    n_trees = len(trees)
+    splits = [[] for _ in range(model.n_features_in_)]
+    # Value per tree for every possible leaf byte: the lowest set bit picks the leaf
+    lowest_bit = np.array([(b & -b).bit_length() - 1 if b else 0 for b in range(256)])
+    leaf_values = np.zeros((n_trees, 256))
+    for t, tree in enumerate(trees):
+        leaves = _tree_leaves(tree, splits, t)
+        values = tree.value[leaves].reshape(len(leaves))
+        leaf_values[t] = model.learning_rate * values[np.minimum(lowest_bit, len(leaves) - 1)]
+
+    # The prior is the same for every row; sklearn adds the first stage to it first
+    init_raw = model._raw_predict_init(np.zeros((1, model.n_features_in_), dtype=np.float32))[0]
+    leaf_values[:trees_per_stage] += init_raw[:, None]
+
+    thresholds, tables = [], []
+    for feature_splits in splits:
+        ranks = np.unique([threshold for threshold, _, _ in feature_splits])
+        table = np.full((len(ranks) + 1, n_trees), 0xFF, dtype=np.uint8)
+        for threshold, t, cleared in feature_splits:
+            table[np.searchsorted(ranks, threshold) + 1:, t] &= cleared
+        thresholds.append(ranks)
+        tables.append(table)
+
+    np.savez_compressed(
+        path,
+        classes=np.asarray(model.classes_).astype(str),
+        feature_names=np.asarray(getattr(model, "feature_names_in_", []), dtype=str),
+        n_stages=np.int64(n_stages),
+        thresholds=np.concatenate(thresholds).astype(np.float64),
+        threshold_offsets=np.cumsum([0] + [len(r) for r in thresholds]),
+        tables=np.concatenate(tables),
+        table_offsets=np.cumsum([0] + [len(t) for t in tables]),
+        leaf_values=leaf_values,
+    )
+    return path
+
+
+class CompactGradientBoosting:
+    def __init__(self, arrays):
+        self.classes_ = arrays["classes"]
+        self.feature_names = list(arrays["feature_names"])
+        self.n_stages = int(arrays["n_stages"])
+        self.leaf_values = arrays["leaf_values"].ravel()
+        self.n_trees = len(arrays["leaf_values"])
+        self.trees_per_stage = self.n_trees // self.n_stages
+
+        t_off, m_off = arrays["threshold_offsets"], arrays["table_offsets"]
+        self.splits = [
+            (f, arrays["thresholds"][t_off[f]:t_off[f + 1]], arrays["tables"][m_off[f]:m_off[f + 1]])
+            for f in range(len(t_off) - 1)
+            if t_off[f + 1] > t_off[f]
+        ]
+        self.tree_offsets = (np.arange(self.n_trees) * 256).astype(np.int32)
+
+    @classmethod
+    def load(cls, path=COMPACT_MODEL_PATH):
+        with np.load(path) as arrays:
+            return cls({name: arrays[name] for name in arrays.files})
+
+    def raw_predict(self, X):
+        # sklearn trees compare float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        raw = np.empty((len(X), self.trees_per_stage))
+        for start in range(0, len(X), BLOCK_ROWS):
+            block = X[start:start + BLOCK_ROWS]
+            leaf_bytes = np.full((len(block), self.n_trees), 0xFF, dtype=np.uint8)
+            for feature, thresholds, table in self.splits:
+                leaf_bytes &= table[np.searchsorted(thresholds, block[:, feature])]
+            values = self.leaf_values.take(leaf_bytes + self.tree_offsets)
+            # Summing over the stage axis adds stage after stage, as sklearn does
+            raw[start:start + BLOCK_ROWS] = np.add.reduce(
+                values.reshape(len(block), self.n_stages, self.trees_per_stage), axis=1
+            )
+        return raw
+
+    def predict(self, X):
+        raw = self.raw_predict(X)
+        if self.trees_per_stage == 1:  # binary: one tree per stage scoring the second class
+            return self.classes_[(raw[:, 0] > 0).astype(np.intp)]
+        return self.classes_[np.argmax(raw, axis=1)]
+
+
+def export_isolation_forest(model, path=ISOLATION_COMPACT_PATH):
+    """Writes an IsolationForest over integer-valued features as a score lookup table."""
+    n_features = model.n_features_in_
+    thresholds = [[] for _ in range(n_features)]
+    for estimator, features in zip(model.estimators_, model.estimators_features_):
+        tree = estimator.tree_
+        split = tree.children_left != -1
+        for feature, threshold in zip(features[tree.feature[split]], tree.threshold[split]):
+            thresholds[feature].append(threshold)
+
+    # Integers below the lowest threshold (or above the highest) all take the
+    # same path through every tree, so the grid only spans that range
+    lows = np.array([int(np.floor(min(t))) if t else 0 for t in thresholds], dtype=np.int64)
+    highs = np.array([int(np.ceil(max(t))) if t else 0 for t in thresholds], dtype=np.int64)
+    shape = tuple(highs - lows + 1)
+    if np.prod(shape) > MAX_GRID_CELLS:
+        raise ValueError(f"IsolationForest grid {shape} is too large to tabulate")
+
+    grid = np.stack(np.meshgrid(*[np.arange(lo, hi + 1) for lo, hi in zip(lows, highs)], indexing="ij"), axis=-1)
+    grid = grid.reshape(-1, n_features)
+    if hasattr(model, "feature_names_in_"):
+        import pandas as pd
+        grid = pd.DataFrame(grid, columns=model.feature_names_in_)
+
+    np.savez_compressed(
+        path,
+        feature_names=np.asarray(getattr(model, "feature_names_in_", []), dtype=str),
+        lows=lows,
+        shape=np.array(shape, dtype=np.int64),
+        scores=model.score_samples(grid),
+        offset=np.float64(model.offset_),
+    )
+    return path
+
+
+class CompactIsolationForest:
+    def __init__(self, arrays):
+        self.feature_names = list(arrays["feature_names"])
+        self.lows = arrays["lows"]
+        self.shape = tuple(arrays["shape"])
+        self.scores = arrays["scores"]
+        self.offset_ = float(arrays["offset"])
+
+    @classmethod
+    def load(cls, path=ISOLATION_COMPACT_PATH):
+        with np.load(path) as arrays:
+            return cls({name: arrays[name] for name in arrays.files})
+
+    def score_samples(self, X):
+        """Same values as IsolationForest.score_samples for integer-valued X."""
+        cells = np.clip(np.asarray(X, dtype=np.int64) - self.lows, 0, np.array(self.shape) - 1)
+        return self.scores.take(np.ravel_multi_index(cells.T, self.shape))
+
+
+def main():
+    import pandas as pd
+    from joblib import load
+
+    model = load(JOBLIB_MODEL_PATH)
+    path = export_gradient_boosting(model)
+    compact = CompactGradientBoosting.load(path)
+
+    # Check parity on random feature vectors spanning the observed ranges
+    rng = np.random.default_rng(42)
+    X = np.column_stack([
+        rng.integers(0, 400, 20000), rng.integers(0, 2, 20000), rng.integers(-1, 24, 20000),
+        *[rng.integers(0, 2, 20000) for _ in range(5)],
+    ]).astype(np.int64)
+    frame = pd.DataFrame(X, columns=model.feature_names_in_)
+    mismatches = int(np.sum(compact.predict(X) != model.predict(frame)))
+    max_diff = float(np.abs(compact.raw_predict(X) - model.decision_function(frame)).max())
+
+    print(f" Compact model saved to {path} ({os.path.getsize(path) / 1024:.1f} KB, "
+          f"joblib {os.path.getsize(JOBLIB_MODEL_PATH) / 1024:.1f} KB)")
+    print(f" Parity check on {len(X)} rows: {mismatches} mismatches, max raw score difference {max_diff}")
+
+    forest = load(ISOLATION_JOBLIB_PATH)
+    path = export_isolation_forest(forest)
+    X = X[:, [model.feature_names_in_.tolist().index(name) for name in forest.feature_names_in_]]
+    score_diff = float(np.abs(
+        CompactIsolationForest.load(path).score_samples(X)
+        - forest.score_samples(pd.DataFrame(X, columns=forest.feature_names_in_))
+    ).max())
+    print(f" Compact isolation forest saved to {path} ({os.path.getsize(path) / 1024:.1f} KB), "
+          f"max score difference {score_diff}")
+    if mismatches or max_diff or score_diff:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
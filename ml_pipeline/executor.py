@@ -0,0 +1,154 @@
+# ml_pipeline/executor.py
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+MODES = ("inline", "thread", "process")
+
+
+def _warm_worker(version=None):
+    """Process-pool initializer: loads the classifier once per worker; returns its version."""
+    from ml_pipeline.infer import warm_up
+
+    return warm_up(version)
+
+
+def _run_batch(batch, version=None):
+    """Runs in the worker; returns (worker id, busy seconds, enriched records, cache stats, pre-filter stats,
+    stage timings)."""
+    from ml_pipeline.infer import infer_logs, cache_stats, prefilter_stats, last_timings
+
+    started = time.perf_counter()
+    results = infer_logs(batch, version)
+    worker = f"pid-{os.getpid()}" if multiprocessing.parent_process() else threading.current_thread().name
+    return worker, time.perf_counter() - started, results, cache_stats(), prefilter_stats(), last_timings()
+
+
+class InferenceExecutor:
+    """Runs infer_logs off the event loop.
+
+    inline  - on the calling thread (blocks the loop; useful for tests and scripts)
+    thread  - in a thread pool
+    process - in a process pool; each worker loads the model once at start-up
+
+    Batches larger than ``chunk_size`` are split so one big upload is spread
+    across all workers instead of occupying a single one.
+
+    Every batch is pinned to ``model_version``. ``reload`` loads and warms a
+    new version in the workers first and only then switches the attribute,
+    so the swap happens between batches and nothing waits on the load.
+
+    ``on_timings``, if given, is called on the event loop with each chunk's
+    {"features": seconds, "predict": seconds}.
+    """
+
+    def __init__(self, mode="thread", workers=None, chunk_size=2000, on_timings=None):
+        if mode not in MODES:
+            raise ValueError(f"Unsupported inference mode: {mode} (expected one of {', '.join(MODES)})")
+        self.mode = mode
+        self.workers = 1 if mode == "inline" else (workers or os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self.on_timings = on_timings
+        self.started = time.monotonic()
+        self.batches = 0
+        self.records = 0
+        self.per_worker = {}
+        self.cache = {}
+        self.prefilter = {}
+        self.model_version = None
+        self.reloads = 0
+
+        if mode == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="infer")
+        elif mode == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+            )
+        else:
+            self._pool = None
+
+    def _record(self, worker, busy, count):
+        stats = self.per_worker.setdefault(worker, {"batches": 0, "records": 0, "busy_seconds": 0.0})
+        stats["batches"] += 1
+        stats["records"] += count
+        stats["busy_seconds"] += busy
+
+    async def infer(self, batch):
+        """Classifies a batch without blocking the event loop (except in inline mode)."""
+        if not batch:
+            return []
+
+        version = self.model_version
+        if self._pool is None:
+            chunks = [_run_batch(batch, version)]
+        else:
+            loop = asyncio.get_running_loop()
+            chunks = await asyncio.gather(*[
+                loop.run_in_executor(self._pool, _run_batch, batch[i:i + self.chunk_size], version)
+                for i in range(0, len(batch), self.chunk_size)
+            ])
+
+        results = []
+        for worker, busy, chunk, cache, prefilter, timings in chunks:
+            self._record(worker, busy, len(chunk))
+            if self.on_timings is not None and timings is not None:
+                self.on_timings(timings)
+            # Threads share one cache and pre-filter; each process has its own
+            owner = worker if self.mode == "process" else "shared"
+            self.cache[owner] = cache
+            if prefilter is not None:
+                self.prefilter[owner] = prefilter
+            results.extend(chunk)
+        self.batches += 1
+        self.records += len(results)
+        return results
+
+    def warm_up(self):
+        """Loads the model now (in every worker) rather than on the first request."""
+        if self.mode == "process":
+            versions = [future.result() for future in [self._pool.submit(_warm_worker) for _ in range(self.workers)]]
+        else:
+            versions = [_warm_worker()]
+        self.model_version = versions[0]
+
+    async def reload(self, version):
+        """Warms ``version`` off the event loop, then routes new batches to it; returns the old version."""
+        loop = asyncio.get_running_loop()
+        if self.mode == "process":
+            # Each worker that picks up a warm-up loads the version; any that
+            # miss it load on their first batch
+            await asyncio.gather(*[
+                loop.run_in_executor(self._pool, _warm_worker, version) for _ in range(self.workers)
+            ])
+        else:
+            await loop.run_in_executor(self._pool, _warm_worker, version)
+        previous, self.model_version = self.model_version, version
+        self.reloads += 1
+        return previous
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self):
+        uptime = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "model_version": self.model_version,
+            "reloads": self.reloads,
+            "batches": self.batches,
+            "records": self.records,
+            "per_worker": {
+                worker: {**stats, "busy_seconds": round(stats["busy_seconds"], 3),
+                         "utilization": round(stats["busy_seconds"] / uptime, 4)}
+                for worker, stats in self.per_worker.items()
+            },
+            "cache": self.cache,
+            "prefilter": self.prefilter,
+        }
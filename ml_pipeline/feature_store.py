@@ -0,0 +1,334 @@
+# ml_pipeline/feature_store.py
+"""Persistent columnar store of parsed fields and features for log lines.
+
+Lines are parsed and featurized once; later training and re-scoring runs
+read memory-mapped columns instead of re-parsing JSON, re-running regexes
+and re-parsing timestamps.
+
+    store_dir/manifest.json        segments, plus a checkpoint per source file
+    store_dir/seg-000000/<col>.npy      one numeric column per file
+    store_dir/seg-000000/<col>.bin      UTF-8 strings, back to back
+    store_dir/seg-000000/<col>.offsets.npy   n + 1 int64 offsets into <col>.bin
+
+append() is incremental: each source file is checkpointed at the byte
+offset after the last complete line stored, so only new lines are read.
+Each chunk becomes a segment, written to a temp dir and renamed into place
+before the manifest (which is replaced atomically) moves the checkpoint, so
+an interrupted append resumes where it stopped. A file whose inode changes
+or that shrinks below its checkpoint was rotated and is read from the start.
+Compressed files are rotated archives, read once and whole; their
+checkpoints count decompressed bytes, so they are told apart by inode, size
+and mtime instead.
+compact() merges segments once many small appends have piled up.
+
+    store = FeatureStore("data/feature_store")
+    store.append(["data/parsed_logs/OpenSSH_2k.json"])
+    X = store.matrix()                  # FEATURE_COLUMNS, int64
+    store.strings("raw")[10]
+"""
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ml_pipeline.features import FEATURE_COLUMNS, feature_vector
+from ml_pipeline.parallel_features import run_chunks
+from parser.base import find_src_ip, find_user
+from parser.log_parser import COMPRESSION_OPENERS, detect_compression, split_offsets
+from parser.registry import registry
+
+FEATURE_STORE_DIR = os.getenv("FEATURE_STORE_DIR", "data/feature_store")
+
+# Narrowest dtype each value fits; matrix() widens to int64 for the models
+NUMERIC_COLUMNS = {
+    "length": np.int32, "contains_ip": np.int8, "hour": np.int8,
+    "failed": np.int8, "connection": np.int8, "invalid": np.int8, "malicious": np.int8, "scan": np.int8,
+    "source": np.int32,   # index into the manifest's sources
+    "offset": np.int64,   # byte offset of the line in its source
+}
+STRING_COLUMNS = ("raw", "service", "src_ip", "user")
+JSON_SUFFIXES = (".json", ".jsonl", ".ndjson")
+
+
+def _is_json(path):
+    name = path[:-len(os.path.splitext(path)[1])] if detect_compression(path) else path
+    return name.endswith(JSON_SUFFIXES)
+
+
+def _read_lines(path, start, end):
+    """Yields (offset, line) for the complete lines in [start, end); a trailing partial line is left for later."""
+    compression = detect_compression(path)
+    with (COMPRESSION_OPENERS[compression](path, "rb") if compression else open(path, "rb")) as f:
+        if start:
+            f.seek(start)
+        position = start
+        for line in f:
+            if (end is not None and position >= end) or not line.endswith(b"\n"):
+                break
+            yield position, line
+            position += len(line)
+
+
+def _chunk(path, source, start, end):
+    """Worker: parses and featurizes one byte range; returns (source, checkpoint, columns)."""
+    json_lines = _is_json(path)
+    numeric = {name: [] for name in NUMERIC_COLUMNS}
+    strings = {name: [] for name in STRING_COLUMNS}
+    checkpoint = start
+
+    for offset, line in _read_lines(path, start, end):
+        checkpoint = offset + len(line)
+        raw = line.decode("utf-8", errors="replace").strip()
+        if json_lines and raw:
+            try:
+                log = json.loads(raw)
+            except ValueError:
+                continue
+            raw = log.get("raw", "") if isinstance(log, dict) else ""
+        if not raw:
+            continue
+
+        entry = registry.parse(raw, path)
+        # Lines no parser recognised may still start with a syslog timestamp
+        timestamp = entry.get("timestamp") or raw[:15]
+        for name, value in zip(FEATURE_COLUMNS, feature_vector(raw, timestamp, default_hour=-1)):
+            numeric[name].append(value)
+        numeric["source"].append(source)
+        numeric["offset"].append(offset)
+
+        user = entry.get("user") or find_user(entry.get("message", raw))
+        strings["raw"].append(raw)
+        strings["service"].append(entry.get("service") or "")
+        strings["src_ip"].append(entry.get("src_ip") or find_src_ip(raw) or "")
+        strings["user"].append("" if user in (None, "-") else user)
+
+    columns = {name: np.array(values, dtype=NUMERIC_COLUMNS[name]) for name, values in numeric.items()}
+    for name, values in strings.items():
+        encoded = [value.encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        columns[name] = (b"".join(encoded), offsets)
+    return source, checkpoint, columns
+
+
+class StringColumn:
+    """Read-only sequence of strings spread over memory-mapped segments."""
+
+    def __init__(self, parts):
+        self.parts = parts  # [(data, offsets)] per segment
+        self.starts = np.cumsum([0] + [len(offsets) - 1 for _, offsets in parts])
+
+    def __len__(self):
+        return int(self.starts[-1])
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        segment = int(np.searchsorted(self.starts, i, side="right")) - 1
+        data, offsets = self.parts[segment]
+        row = i - self.starts[segment]
+        return bytes(data[offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        for data, offsets in self.parts:
+            text = bytes(data)
+            for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist()):
+                yield text[a:b].decode("utf-8")
+
+
+class FeatureStore:
+    def __init__(self, path=None):
+        self.path = path or FEATURE_STORE_DIR
+        os.makedirs(self.path, exist_ok=True)
+        self.manifest_path = os.path.join(self.path, "manifest.json")
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"numeric": list(NUMERIC_COLUMNS), "strings": list(STRING_COLUMNS),
+                             "segments": [], "sources": [], "next_segment": 0}
+        self._cache = {}
+        # Segments an interrupted append wrote but never recorded
+        listed = {segment["name"] for segment in self.manifest["segments"]}
+        for name in os.listdir(self.path):
+            if name.startswith("seg-") and name not in listed:
+                shutil.rmtree(os.path.join(self.path, name))
+
+    def __len__(self):
+        return sum(segment["rows"] for segment in self.manifest["segments"])
+
+    # --- Writing ---
+
+    def _save_manifest(self):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp, self.manifest_path)
+
+    def _source(self, path):
+        """Manifest index and start offset for path, starting over if the file was rotated or truncated."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        compressed = detect_compression(path)
+        for i, source in enumerate(self.manifest["sources"]):
+            if source["path"] != path or source["inode"] != stat.st_ino:
+                continue
+            if compressed:
+                if (source.get("size"), source.get("mtime")) == (stat.st_size, stat.st_mtime_ns):
+                    return i, source["offset"]
+            elif source["offset"] <= stat.st_size:
+                return i, source["offset"]
+        for source in self.manifest["sources"]:
+            if source["path"] == path:
+                source["path"] = f"{path} (rotated)"
+        source = {"path": path, "inode": stat.st_ino, "offset": 0}
+        if compressed:
+            source.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+        self.manifest["sources"].append(source)
+        return len(self.manifest["sources"]) - 1, 0
+
+    def _write_segment(self, columns, rows):
+        name = f"seg-{self.manifest['next_segment']:06d}"
+        self.manifest["next_segment"] += 1
+        tmp = os.path.join(self.path, name + ".tmp")
+        os.makedirs(tmp)
+        for column, values in columns.items():
+            if column in NUMERIC_COLUMNS:
+                np.save(os.path.join(tmp, column + ".npy"), values)
+            else:
+                data, offsets = values
+                with open(os.path.join(tmp, column + ".bin"), "wb") as f:
+                    f.write(data)
+                np.save(os.path.join(tmp, column + ".offsets.npy"), offsets)
+        os.rename(tmp, os.path.join(self.path, name))
+        self.manifest["segments"].append({"name": name, "rows": rows})
+
+    def append(self, paths, chunk_bytes=32 * 1024 * 1024, workers=None):
+        """Stores the lines added to paths since their checkpoints; returns the number of rows added."""
+        jobs = []
+        for path in paths:
+            source, start = self._source(path)
+            if detect_compression(path) and start > 0:
+                continue  # compressed files are rotated archives: read once, whole
+            jobs += [(os.path.abspath(path), source, a, b) for a, b in split_offsets(path, chunk_bytes, start)]
+        self._save_manifest()
+        before = len(self)
+        run_chunks(_chunk, jobs, _SegmentWriter(self), workers or os.cpu_count() or 1)
+        self._cache.clear()
+        return len(self) - before
+
+    def compact(self):
+        """Merges all segments into one; returns the number of segments merged."""
+        segments = self.manifest["segments"]
+        if len(segments) < 2:
+            return 0
+        columns = {name: np.concatenate([self._load(s["name"], name) for s in segments]) for name in NUMERIC_COLUMNS}
+        for name in STRING_COLUMNS:
+            parts = [self._load_strings(s["name"], name) for s in segments]
+            shifts = np.cumsum([0] + [len(data) for data, _ in parts[:-1]])
+            offsets = np.concatenate([[0]] + [offsets[1:] + shift for (_, offsets), shift in zip(parts, shifts)])
+            columns[name] = (b"".join(bytes(data) for data, _ in parts), offsets.astype(np.int64))
+
+        old = [s["name"] for s in segments]
+        self.manifest["segments"] = []
+        self._write_segment(columns, len(columns["length"]))
+        self._save_manifest()
+        self._cache.clear()
+        for name in old:
+            shutil.rmtree(os.path.join(self.path, name))
+        return len(old)
+
+    # --- Reading ---
+
+    def _load(self, segment, column):
+        return np.load(os.path.join(self.path, segment, column + ".npy"), mmap_mode="r")
+
+    def _load_strings(self, segment, column):
+        data_path = os.path.join(self.path, segment, column + ".bin")
+        data = np.memmap(data_path, dtype=np.uint8, mode="r") if os.path.getsize(data_path) else np.empty(0, np.uint8)
+        return data, self._load(segment, column + ".offsets")
+
+    def column(self, name):
+        """One numeric column over all segments (a memory map when there is a single segment)."""
+        if name not in NUMERIC_COLUMNS:
+            raise KeyError(name)
+        if name not in self._cache:
+            parts = [self._load(s["name"], name) for s in self.manifest["segments"]]
+            if not parts:
+                self._cache[name] = np.empty(0, dtype=NUMERIC_COLUMNS[name])
+            else:
+                self._cache[name] = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        return self._cache[name]
+
+    def matrix(self, columns=FEATURE_COLUMNS, rows=None):
+        """int64 feature matrix in the column order given, for all rows or the row indices given."""
+        matrix = np.empty((len(self) if rows is None else len(rows), len(columns)), dtype=np.int64)
+        for j, name in enumerate(columns):
+            matrix[:, j] = self.column(name) if rows is None else self.column(name)[rows]
+        return matrix
+
+    def strings(self, name):
+        if name not in STRING_COLUMNS:
+            raise KeyError(name)
+        return StringColumn([self._load_strings(s["name"], name) for s in self.manifest["segments"]])
+
+    def sources(self):
+        return [source["path"] for source in self.manifest["sources"]]
+
+    def stats(self):
+        size = 0
+        for root, _, files in os.walk(self.path):
+            size += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return {
+            "rows": len(self),
+            "segments": len(self.manifest["segments"]),
+            "sources": len(self.manifest["sources"]),
+            "bytes": size,
+        }
+
+
+class _SegmentWriter:
+    """run_chunks sink: one segment per chunk, then the chunk's checkpoint."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def append(self, source, checkpoint, columns):
+        rows = len(columns["length"])
+        if rows:
+            self.store._write_segment(columns, rows)
+        source = self.store.manifest["sources"][source]
+        source["offset"] = max(source["offset"], checkpoint)
+        self.store._save_manifest()
+
+    def close(self):
+        return self.store.stats()
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Add parsed log files to the feature store")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--store", default=FEATURE_STORE_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-mb", type=int, default=32)
+    parser.add_argument("--compact", action="store_true", help="merge segments afterwards")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    store = FeatureStore(args.store)
+    added = store.append(args.paths, args.chunk_mb * 1024 * 1024, args.workers)
+    if args.compact:
+        store.compact()
+    print(f" Added {added} rows in {time.perf_counter() - started:.2f}s: {store.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# ml_pipeline/features.py
+import re
+from datetime import datetime
+
+# Column order the classifier was trained on
+FEATURE_COLUMNS = ["length", "contains_ip", "hour", "failed", "connection", "invalid", "malicious", "scan"]
+KEYWORDS = ("failed", "connection", "invalid", "malicious", "scan")
+
+IP_PATTERN = re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}\b")
+SYSLOG_TIME_FORMAT = "%b %d %H:%M:%S"
+
+
+def parse_hour(timestamp):
+    """Returns the hour of an ISO or syslog-style timestamp, or None."""
+    try:
+        return datetime.fromisoformat(timestamp).hour
+    except Exception:
+        pass
+    try:
+        return datetime.strptime(timestamp, SYSLOG_TIME_FORMAT).hour
+    except Exception:
+        return None
+
+
+def feature_vector(raw, timestamp, default_hour=None):
+    """Scalar path: one feature tuple in FEATURE_COLUMNS order.
+
+    Unparseable timestamps fall back to default_hour, or the current UTC
+    hour when it is None (the behaviour online inference has always had).
+    """
+    hour = parse_hour(timestamp)
+    if hour is None:
+        hour = datetime.utcnow().hour if default_hour is None else default_hour
+
+    # An IP needs three dots; str.count is far cheaper than a failed regex scan
+    contains_ip = 1 if raw.count(".") >= 3 and IP_PATTERN.search(raw) else 0
+
+    lowered = raw.lower()
+    return (
+        len(raw),
+        contains_ip,
+        hour,
+        1 if "failed" in lowered else 0,
+        1 if "connection" in lowered else 0,
+        1 if "invalid" in lowered else 0,
+        1 if "malicious" in lowered else 0,
+        1 if "scan" in lowered else 0,
+    )
+
+
+def extract_features_from_raw(raw, timestamp, default_hour=None):
+    return dict(zip(FEATURE_COLUMNS, feature_vector(raw, timestamp, default_hour)))
+
+
+def parse_hours(timestamps, default_hour=-1):
+    """Vectorized parse_hour over a Series of timestamps."""
+    import pandas as pd  # training-only path; kept out of the inference import
+
+    as_text = timestamps.where(timestamps.map(type) == str)
+
+    # ISO strings go through datetime.fromisoformat (once per distinct value)
+    # so timezone offsets are handled exactly like the scalar path.
+    iso_hours = {}
+    for value in as_text.dropna().unique():
+        try:
+            iso_hours[value] = datetime.fromisoformat(value).hour
+        except ValueError:
+            pass
+    hours = as_text.map(iso_hours)
+
+    missing = hours.isna() & as_text.notna()
+    if missing.any():
+        syslog = pd.to_datetime(as_text[missing], format=SYSLOG_TIME_FORMAT, errors="coerce")
+        hours[missing] = syslog.dt.hour
+
+    return hours.fillna(default_hour).astype("int64")
+
+
+def extract_features_frame(raw, timestamps, default_hour=-1):
+    """Vectorized path: a FEATURE_COLUMNS DataFrame for Series of raw lines and timestamps.
+
+    Produces the same int64 values as feature_vector row by row.
+    """
+    import pandas as pd
+
+    raw = raw.fillna("").astype(str)
+    lowered = raw.str.lower()
+
+    frame = pd.DataFrame({
+        "length": raw.str.len().astype("int64"),
+        "contains_ip": raw.str.contains(IP_PATTERN).astype("int64"),
+        "hour": parse_hours(timestamps, default_hour).to_numpy(),
+    }, index=raw.index)
+    for keyword in KEYWORDS:
+        frame[keyword] = lowered.str.contains(keyword, regex=False).astype("int64")
+    return frame[FEATURE_COLUMNS]
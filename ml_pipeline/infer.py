@@ -1,12 +1,49 @@
 import os
-import re
-import pandas as pd
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
 from datetime import datetime
-from joblib import load
 
-# Load trained classifier
-MODEL_PATH = os.path.join(os.path.dirname(__file__), "classic_classifier.joblib")
-model = load(MODEL_PATH)
+from ml_pipeline.features import FEATURE_COLUMNS, extract_features_from_raw, feature_vector, parse_hour
+from ml_pipeline.cache import InferenceCache, mask_template
+from ml_pipeline.compact_model import CompactGradientBoosting
+from ml_pipeline import model_registry
+from ml_pipeline.prefilter import Prefilter
+
+# Trained classifiers by version, most recently used last. Models are loaded
+# on first use, not at import, so importing this module stays cheap. Batches
+# may name the version to use; otherwise the registry's current version (or
+# the bundled model) is resolved once and used from then on. "auto" prefers
+# the NumPy-only compact artifact and falls back to the joblib pickle.
+INFER_MODEL_BACKEND = os.getenv("INFER_MODEL_BACKEND", "auto")
+INFER_MODELS_KEPT = int(os.getenv("INFER_MODELS_KEPT", 2))
+
+models = OrderedDict()
+default_version = None
+_model_lock = threading.Lock()
+
+# Prediction cache; INFER_CACHE_SIZE=0 turns it off
+INFER_CACHE_SIZE = int(os.getenv("INFER_CACHE_SIZE", 10000))
+INFER_CACHE_TTL = float(os.getenv("INFER_CACHE_TTL", 0)) or None
+INFER_CACHE_MODE = os.getenv("INFER_CACHE_MODE", "features")
+cache = InferenceCache(INFER_CACHE_SIZE, INFER_CACHE_TTL, INFER_CACHE_MODE) if INFER_CACHE_SIZE > 0 else None
+
+# Two-stage scoring, off by default: INFER_PREFILTER=1 scores every row with
+# the IsolationForest first and only sends rows above INFER_PREFILTER_THRESHOLD,
+# plus an INFER_PREFILTER_SAMPLE_RATE sample of the rest, to the classifier.
+# Records then carry anomaly_score. The default, 0.55, keeps every threat the
+# classifier finds on data/*.log (benchmarks/bench_prefilter.py) while skipping
+# about 40% of rows; the forest's own contamination cut ("nan") skips 98% but
+# loses most detections. Re-measure after retraining the forest.
+INFER_PREFILTER = os.getenv("INFER_PREFILTER", "0") == "1"
+INFER_PREFILTER_THRESHOLD = float(os.getenv("INFER_PREFILTER_THRESHOLD", 0.55))
+INFER_PREFILTER_SAMPLE_RATE = float(os.getenv("INFER_PREFILTER_SAMPLE_RATE", 0.01))
+prefilter = None
+
+# Seconds the last infer_logs call on this thread spent building feature
+# vectors and predicting; read by the executor for the /metrics stage timings
+_timings = threading.local()
 
 def parse_timestamp(raw):
     try:
@@ -15,40 +52,163 @@ def parse_timestamp(raw):
     except Exception:
         return datetime.utcnow().isoformat()
 
-def extract_features_from_raw(raw, timestamp):
+def get_model(version=None):
+    """Returns (version, model), loading the version if it is not in memory yet."""
+    global default_version
+    with _model_lock:
+        if version is None:
+            if default_version is None:
+                default_version = model_registry.current_version() or model_registry.BUNDLED_VERSION
+            version = default_version
+        clf = models.get(version)
+        if clf is not None:
+            models.move_to_end(version)
+            return version, clf
+
+    # Load outside the lock so batches on other versions keep running
+    clf = model_registry.load_model(version, INFER_MODEL_BACKEND)
+    with _model_lock:
+        clf = models.setdefault(version, clf)
+        models.move_to_end(version)
+        while len(models) > INFER_MODELS_KEPT:
+            models.popitem(last=False)
+    return version, clf
+
+def predict(matrix, clf):
+    """Predicts threat types for an int64 matrix laid out as FEATURE_COLUMNS."""
+    if isinstance(clf, CompactGradientBoosting):
+        return clf.predict(matrix)
+    # The sklearn model was fitted on a DataFrame, so keep the column names
+    import pandas as pd
+    return clf.predict(pd.DataFrame(matrix, columns=FEATURE_COLUMNS))
+
+def get_prefilter():
+    global prefilter
+    if prefilter is None and INFER_PREFILTER:
+        with _model_lock:
+            if prefilter is None:
+                threshold = None if np.isnan(INFER_PREFILTER_THRESHOLD) else INFER_PREFILTER_THRESHOLD
+                prefilter = Prefilter.load(threshold, INFER_PREFILTER_SAMPLE_RATE)
+    return prefilter
+
+def warm_up(version=None):
+    """Loads a model version and runs one prediction so its first batch is not slow."""
+    version, clf = get_model(version)
+    zeros = np.zeros((1, len(FEATURE_COLUMNS)), dtype=np.int64)
+    predict(zeros, clf)
+    if get_prefilter() is not None:
+        prefilter.scores(zeros)
+    return version
+
+def cache_stats():
+    return cache.stats() if cache is not None else None
+
+def prefilter_stats():
+    return prefilter.stats() if prefilter is not None else None
+
+def last_timings():
+    return getattr(_timings, "last", None)
+
+def _cache_key(raw, timestamp):
+    if cache.mode == "template":
+        hour = parse_hour(timestamp)
+        return mask_template(raw), datetime.utcnow().hour if hour is None else hour
+    return feature_vector(raw, timestamp)
+
+def infer_logs(batch, version=None):
+    """Classify a batch of log dicts with a single model.predict call.
+
+    Returns one enriched record per input, in the same order, identical to
+    what infer_log would return for each entry. Lines whose cache key has
+    been seen before skip the model, and repeats within the batch are only
+    predicted once. The whole batch uses one model version, recorded on
+    every record. With the pre-filter on, rows the IsolationForest scores
+    as unremarkable are labelled normal without running the classifier.
+    """
+    if not batch:
+        return []
+    version, clf = get_model(version)
+    stage_one = get_prefilter()
+    started = time.perf_counter()
+
+    raws, timestamps = [], []
+    preds = [None] * len(batch)  # (threat type, anomaly score or None) per row
+    pending = {}  # cache key -> (feature vector, rows waiting for it)
+
+    for i, log_dict in enumerate(batch):
+        raw = log_dict.get("raw", "")
+        timestamp = log_dict["timestamp"] if "timestamp" in log_dict else parse_timestamp(raw)
+        raws.append(raw)
+        timestamps.append(timestamp)
+
+        if cache is None:
+            pending[i] = (feature_vector(raw, timestamp), [i])
+            continue
+
+        key = _cache_key(raw, timestamp)
+        if key in pending:
+            pending[key][1].append(i)
+            continue
+        pred = cache.get((version, key))
+        if pred is None:
+            vector = key if cache.mode == "features" else feature_vector(raw, timestamp)
+            pending[key] = (vector, [i])
+        else:
+            preds[i] = pred
+
+    featurized = time.perf_counter()
+    if pending:
+        keys = list(pending)
+        matrix = np.array([pending[key][0] for key in keys], dtype=np.int64)
+        if stage_one is None:
+            scores = [None] * len(keys)
+            predicted = predict(matrix, clf)
+        else:
+            scores, selected = stage_one.select(matrix, [len(pending[key][1]) for key in keys])
+            scores = scores.round(4).tolist()
+            predicted = np.full(len(keys), "normal", dtype=object)
+            if selected.any():
+                predicted[selected] = predict(matrix[selected], clf)
+        for key, pred, score in zip(keys, predicted, scores):
+            for i in pending[key][1]:
+                preds[i] = (pred, score)
+            if cache is not None:
+                cache.put((version, key), (pred, score))
+    _timings.last = {"features": featurized - started, "predict": time.perf_counter() - featurized}
+
+    records = [
+        {
+            "raw": raw,
+            "timestamp": timestamp,
+            "prediction": "anomaly" if pred != "normal" else "normal",
+            "threat_type": pred,
+            "model_version": version,
+        }
+        for raw, timestamp, (pred, _) in zip(raws, timestamps, preds)
+    ]
+    if stage_one is not None:
+        for record, (_, score) in zip(records, preds):
+            record["anomaly_score"] = score
+    return records
+
+def infer_logs_isolated(batch, version=None):
+    """infer_logs, falling back to one log at a time when the batch call fails.
+
+    Returns (records, failures): the enriched records of every log that
+    could be classified, in order, and (log_dict, exception) for the rest,
+    so one malformed log does not cost the whole batch.
+    """
     try:
-        ts = datetime.fromisoformat(timestamp)
+        return infer_logs(batch, version), []
     except Exception:
-        ts = datetime.utcnow()
-
-    def has_keyword(text, keyword):
-        return int(keyword in text.lower())
-
-    features = {
-        "length": len(raw),
-        "contains_ip": int(bool(re.search(r"\b\d{1,3}(?:\.\d{1,3}){3}\b", raw))),
-        "hour": ts.hour,
-        "failed": has_keyword(raw, "failed"),
-        "connection": has_keyword(raw, "connection"),
-        "invalid": has_keyword(raw, "invalid"),
-        "malicious": has_keyword(raw, "malicious"),
-        "scan": has_keyword(raw, "scan"),
-    }
-    return features
-
-def infer_log(log_dict):
-    raw = log_dict.get("raw", "")
-    timestamp = log_dict.get("timestamp", parse_timestamp(raw))
-
-    features = extract_features_from_raw(raw, timestamp)
-    df = pd.DataFrame([features])
-
-    pred = model.predict(df)[0]
-
-    return {
-        "raw": raw,
-        "timestamp": timestamp,
-        "prediction": "anomaly" if pred != "normal" else "normal",
-        "threat_type": pred
-    }
+        pass
+    records, failures = [], []
+    for log_dict in batch:
+        try:
+            records.append(infer_logs([log_dict], version)[0])
+        except Exception as e:
+            failures.append((log_dict, e))
+    return records, failures
 
+def infer_log(log_dict, version=None):
+    return infer_logs([log_dict], version)[0]
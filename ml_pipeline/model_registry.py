@@ -0,0 +1,189 @@
+# ml_pipeline/model_registry.py
+"""Versioned classifier artifacts on disk.
+
+    models/
+      CURRENT             name of the version the service should run
+      v1/metadata.json    feature schema, classes, training metrics
+      v1/model.joblib
+      v1/model.npz        compact export, when the ensemble supports it
+      v2/...
+
+New versions are written to a hidden temp directory and renamed into place,
+and CURRENT is replaced atomically, so a watcher never sees half a version.
+With an empty registry the service runs the bundled classic_classifier files
+under the version name "bundled".
+
+    python ml_pipeline/model_registry.py list
+    python ml_pipeline/model_registry.py publish ml_pipeline/classic_classifier.joblib
+    python ml_pipeline/model_registry.py activate v2
+    python ml_pipeline/model_registry.py rollback
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ml_pipeline.compact_model import COMPACT_MODEL_PATH, JOBLIB_MODEL_PATH, CompactGradientBoosting, export_gradient_boosting
+from ml_pipeline.features import FEATURE_COLUMNS
+
+REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", os.path.join(os.path.dirname(__file__), "models"))
+BUNDLED_VERSION = "bundled"
+BACKENDS = ("auto", "compact", "sklearn")
+
+
+def _version_number(version):
+    return int(version[1:]) if version[:1] == "v" and version[1:].isdigit() else None
+
+
+def list_versions(registry_dir=None):
+    """Published versions, oldest first."""
+    registry_dir = registry_dir or REGISTRY_DIR
+    if not os.path.isdir(registry_dir):
+        return []
+    versions = [
+        name for name in os.listdir(registry_dir)
+        if _version_number(name) is not None and os.path.exists(os.path.join(registry_dir, name, "metadata.json"))
+    ]
+    return sorted(versions, key=_version_number)
+
+
+def read_metadata(version, registry_dir=None):
+    registry_dir = registry_dir or REGISTRY_DIR
+    if version == BUNDLED_VERSION:
+        return {"version": BUNDLED_VERSION, "feature_columns": FEATURE_COLUMNS}
+    path = os.path.join(registry_dir, version, "metadata.json")
+    if not os.path.exists(path):
+        raise KeyError(f"Unknown model version: {version}")
+    with open(path) as f:
+        return json.load(f)
+
+
+def current_version(registry_dir=None):
+    """The version named in CURRENT, else the newest one, else None."""
+    registry_dir = registry_dir or REGISTRY_DIR
+    try:
+        with open(os.path.join(registry_dir, "CURRENT")) as f:
+            version = f.read().strip()
+        if version in list_versions(registry_dir):
+            return version
+    except OSError:
+        pass
+    versions = list_versions(registry_dir)
+    return versions[-1] if versions else None
+
+
+def set_current(version, registry_dir=None):
+    registry_dir = registry_dir or REGISTRY_DIR
+    if version not in list_versions(registry_dir):
+        raise KeyError(f"Unknown model version: {version}")
+    tmp = os.path.join(registry_dir, ".CURRENT.tmp")
+    with open(tmp, "w") as f:
+        f.write(version + "\n")
+    os.replace(tmp, os.path.join(registry_dir, "CURRENT"))
+
+
+def previous_version(registry_dir=None):
+    """The newest version older than the current one, or None."""
+    registry_dir = registry_dir or REGISTRY_DIR
+    current = current_version(registry_dir)
+    if current is None:
+        return None
+    older = [v for v in list_versions(registry_dir) if _version_number(v) < _version_number(current)]
+    return older[-1] if older else None
+
+
+def publish(model, metrics=None, registry_dir=None, activate=True):
+    """Stores a fitted classifier as the next version; returns its name."""
+    registry_dir = registry_dir or REGISTRY_DIR
+    from joblib import dump
+
+    versions = list_versions(registry_dir)
+    version = f"v{_version_number(versions[-1]) + 1 if versions else 1}"
+    staging = os.path.join(registry_dir, f".{version}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    artifacts = ["model.joblib"]
+    dump(model, os.path.join(staging, "model.joblib"))
+    try:
+        export_gradient_boosting(model, os.path.join(staging, "model.npz"))
+        artifacts.append("model.npz")
+    except (AttributeError, ValueError):
+        pass  # not a GradientBoosting ensemble the compact format can hold
+
+    metadata = {
+        "version": version,
+        "created_at": datetime.utcnow().isoformat(),
+        "model_class": type(model).__name__,
+        "feature_columns": list(getattr(model, "feature_names_in_", FEATURE_COLUMNS)),
+        "classes": [str(c) for c in model.classes_],
+        "metrics": metrics or {},
+        "artifacts": artifacts,
+    }
+    with open(os.path.join(staging, "metadata.json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    os.rename(staging, os.path.join(registry_dir, version))
+    if activate:
+        set_current(version, registry_dir)
+    return version
+
+
+def load_model(version, backend="auto", registry_dir=None):
+    """Loads one version; prefers the compact artifact unless backend says otherwise."""
+    registry_dir = registry_dir or REGISTRY_DIR
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported model backend: {backend} (expected {', '.join(BACKENDS)})")
+    if version == BUNDLED_VERSION:
+        compact_path, joblib_path = COMPACT_MODEL_PATH, JOBLIB_MODEL_PATH
+    else:
+        metadata = read_metadata(version, registry_dir)
+        if metadata["feature_columns"] != FEATURE_COLUMNS:
+            raise ValueError(f"Model {version} expects features {metadata['feature_columns']}, not {FEATURE_COLUMNS}")
+        compact_path = os.path.join(registry_dir, version, "model.npz")
+        joblib_path = os.path.join(registry_dir, version, "model.joblib")
+
+    if backend == "compact" or (backend == "auto" and os.path.exists(compact_path)):
+        return CompactGradientBoosting.load(compact_path)
+    from joblib import load
+    return load(joblib_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage versioned classifier artifacts")
+    parser.add_argument("--registry-dir", default=None)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list")
+    publish_cmd = commands.add_parser("publish")
+    publish_cmd.add_argument("path", help="joblib file of a fitted classifier")
+    publish_cmd.add_argument("--no-activate", action="store_true")
+    commands.add_parser("activate").add_argument("version")
+    commands.add_parser("rollback")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        current = current_version(args.registry_dir)
+        for version in list_versions(args.registry_dir):
+            metadata = read_metadata(version, args.registry_dir)
+            marker = "*" if version == current else " "
+            print(f"{marker} {version}  {metadata['created_at']}  {metadata['model_class']}")
+    elif args.command == "publish":
+        from joblib import load
+        version = publish(load(args.path), registry_dir=args.registry_dir, activate=not args.no_activate)
+        print(f" Published {version}")
+    elif args.command == "activate":
+        set_current(args.version, args.registry_dir)
+        print(f" Activated {args.version}")
+    else:
+        version = previous_version(args.registry_dir)
+        if version is None:
+            sys.exit(" No earlier version to roll back to")
+        set_current(version, args.registry_dir)
+        print(f" Rolled back to {version}")
+
+
+if __name__ == "__main__":
+    main()
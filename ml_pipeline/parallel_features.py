@@ -0,0 +1,154 @@
+# ml_pipeline/parallel_features.py
+"""Chunked, parallel feature extraction into memory-mapped arrays for training.
+
+Inputs are read a chunk at a time and the chunks are featurized in a process
+pool; rows are appended, in input order, to flat binary files so memory
+stays at a few chunks however large the input is. open_matrix() maps the
+result back without reading it into RAM.
+
+    work_dir/features.i64   rows x len(columns), int64
+    work_dir/labels.i32     class code per row (labelled inputs only)
+    work_dir/meta.json      rows, columns, classes
+"""
+import json
+import os
+import resource
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ml_pipeline.features import FEATURE_COLUMNS, IP_PATTERN, SYSLOG_TIME_FORMAT, extract_features_frame
+from parser.log_parser import iter_lines, split_offsets
+
+ISOLATION_COLUMNS = ["length", "contains_ip", "hour"]
+
+
+class MatrixWriter:
+    """Appends int64 feature rows (and optional labels) to work_dir."""
+
+    def __init__(self, work_dir, columns):
+        os.makedirs(work_dir, exist_ok=True)
+        self.work_dir = work_dir
+        self.columns = list(columns)
+        self.rows = 0
+        self.classes = {}
+        self._features = open(os.path.join(work_dir, "features.i64"), "wb")
+        self._labels = None
+
+    def append(self, features, labels=None):
+        features = np.ascontiguousarray(features, dtype=np.int64)
+        self._features.write(features.tobytes())
+        if labels is not None:
+            if self._labels is None:
+                self._labels = open(os.path.join(self.work_dir, "labels.i32"), "wb")
+            codes = np.array([self.classes.setdefault(label, len(self.classes)) for label in labels], dtype=np.int32)
+            self._labels.write(codes.tobytes())
+        self.rows += len(features)
+
+    def close(self):
+        self._features.close()
+        if self._labels is not None:
+            self._labels.close()
+        meta = {
+            "rows": self.rows,
+            "columns": self.columns,
+            "classes": sorted(self.classes, key=self.classes.get) if self._labels is not None else None,
+        }
+        with open(os.path.join(self.work_dir, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        return meta
+
+
+def open_matrix(work_dir):
+    """Returns (X, y, meta): read-only memmaps of the features and label codes (y is None if unlabelled)."""
+    with open(os.path.join(work_dir, "meta.json")) as f:
+        meta = json.load(f)
+    shape = (meta["rows"], len(meta["columns"]))
+    if meta["rows"] == 0:
+        return np.empty(shape, dtype=np.int64), None, meta
+    X = np.memmap(os.path.join(work_dir, "features.i64"), dtype=np.int64, mode="r", shape=shape)
+    y = None
+    if meta["classes"] is not None:
+        y = np.memmap(os.path.join(work_dir, "labels.i32"), dtype=np.int32, mode="r", shape=(meta["rows"],))
+    return X, y, meta
+
+
+def run_chunks(worker, jobs, writer, workers):
+    """Runs worker(*job) for every job, at most 2 per process in flight, appending results in order."""
+    if workers == 1:
+        for job in jobs:
+            writer.append(*worker(*job))
+        return writer.close()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for job in jobs:
+            in_flight.append(pool.submit(worker, *job))
+            if len(in_flight) >= 2 * workers:
+                writer.append(*in_flight.popleft().result())
+        while in_flight:
+            writer.append(*in_flight.popleft().result())
+    return writer.close()
+
+
+# --- Labelled CSV (raw, timestamp, label) for the threat classifier ---
+
+def _csv_chunk(raw, timestamps, labels):
+    import pandas as pd
+
+    frame = extract_features_frame(pd.Series(raw, dtype=object), pd.Series(timestamps, dtype=object))
+    return frame.to_numpy(dtype=np.int64), labels
+
+
+def extract_csv(csv_path, work_dir, chunk_rows=100_000, workers=None):
+    """Featurizes a raw/timestamp/label CSV into work_dir; returns its meta."""
+    import pandas as pd
+
+    def jobs():
+        for chunk in pd.read_csv(csv_path, usecols=["raw", "timestamp", "label"], chunksize=chunk_rows):
+            yield chunk["raw"].tolist(), chunk["timestamp"].tolist(), chunk["label"].astype(str).tolist()
+
+    return run_chunks(_csv_chunk, jobs(), MatrixWriter(work_dir, FEATURE_COLUMNS), workers or os.cpu_count() or 1)
+
+
+# --- Parsed JSONL logs for the IsolationForest ---
+
+def _jsonl_chunk(path, start, end):
+    """Worker: length / contains_ip / hour for every line of [start, end) with a syslog timestamp."""
+    import pandas as pd
+
+    raws = []
+    for line in iter_lines(path, start=start, end=end):
+        try:
+            log = json.loads(line)
+        except ValueError:
+            continue
+        raw = log.get("raw") if isinstance(log, dict) else None
+        if raw:
+            raws.append(raw)
+
+    raw = pd.Series(raws, dtype=object)
+    hours = pd.to_datetime(raw.str[:15], format=SYSLOG_TIME_FORMAT, errors="coerce").dt.hour
+    keep = hours.notna()
+    features = np.column_stack([
+        raw[keep].str.len().to_numpy(dtype=np.int64),
+        raw[keep].str.contains(IP_PATTERN).to_numpy(dtype=np.int64),
+        hours[keep].to_numpy(dtype=np.int64),
+    ]) if keep.any() else np.empty((0, len(ISOLATION_COLUMNS)), dtype=np.int64)
+    return (features,)
+
+
+def extract_jsonl(paths, work_dir, chunk_bytes=32 * 1024 * 1024, workers=None):
+    """Featurizes parsed JSONL logs for the IsolationForest into work_dir; returns its meta."""
+    jobs = [(path, start, end) for path in paths for start, end in split_offsets(path, chunk_bytes)]
+    return run_chunks(_jsonl_chunk, jobs, MatrixWriter(work_dir, ISOLATION_COLUMNS), workers or os.cpu_count() or 1)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process and of its (finished) worker processes, in MB."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return round(own, 1), round(children, 1)
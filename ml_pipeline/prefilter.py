@@ -0,0 +1,78 @@
+# ml_pipeline/prefilter.py
+"""Stage one of two-stage scoring: an IsolationForest anomaly score per row.
+
+Rows scoring above the threshold (plus a random sample of the rest) go on
+to the threat classifier; everything else is labelled normal without it.
+The score follows sklearn's convention negated, -score_samples, so it is
+positive and higher means more anomalous; the default threshold is the
+forest's own contamination cut, -offset_.
+"""
+import os
+import threading
+import numpy as np
+
+from ml_pipeline.compact_model import ISOLATION_COMPACT_PATH, ISOLATION_JOBLIB_PATH, CompactIsolationForest
+from ml_pipeline.features import FEATURE_COLUMNS
+
+
+class Prefilter:
+    def __init__(self, model, threshold=None, sample_rate=0.0, seed=None):
+        self.model = model
+        self.threshold = -model.offset_ if threshold is None else threshold
+        self.sample_rate = sample_rate
+        names = getattr(model, "feature_names", None) or list(model.feature_names_in_)
+        # Where the forest's inputs sit in a FEATURE_COLUMNS matrix
+        self.columns = [FEATURE_COLUMNS.index(name) for name in names]
+        self.names = names
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+        self.scored = 0
+        self.passed = 0
+        self.sampled = 0
+        self.filtered = 0
+
+    @classmethod
+    def load(cls, threshold=None, sample_rate=0.0, path=None):
+        """Prefers the tabulated export and falls back to the joblib IsolationForest."""
+        if path is None and os.path.exists(ISOLATION_COMPACT_PATH):
+            return cls(CompactIsolationForest.load(), threshold, sample_rate)
+        from joblib import load
+        return cls(load(path or ISOLATION_JOBLIB_PATH), threshold, sample_rate)
+
+    def scores(self, matrix):
+        features = np.asarray(matrix)[:, self.columns]
+        if not isinstance(self.model, CompactIsolationForest):
+            import pandas as pd
+            features = pd.DataFrame(features, columns=self.names)
+        return -self.model.score_samples(features)
+
+    def select(self, matrix, weights=None):
+        """Scores every row; returns (scores, mask of rows the classifier should see).
+
+        ``weights`` counts how many records share each row, so the stats
+        describe traffic rather than distinct feature vectors.
+        """
+        scores = self.scores(matrix)
+        above = scores > self.threshold
+        sampled = ~above & (self._rng.random(len(scores)) < self.sample_rate)
+        weights = np.ones(len(scores), dtype=np.int64) if weights is None else np.asarray(weights)
+
+        with self._lock:
+            self.scored += int(weights.sum())
+            self.passed += int(weights[above].sum())
+            self.sampled += int(weights[sampled].sum())
+            self.filtered += int(weights[~(above | sampled)].sum())
+        return scores, above | sampled
+
+    def stats(self):
+        with self._lock:
+            return {
+                "threshold": round(float(self.threshold), 4),
+                "sample_rate": self.sample_rate,
+                "scored": self.scored,
+                "passed": self.passed,
+                "sampled": self.sampled,
+                "filtered": self.filtered,
+                "fraction_filtered": round(self.filtered / self.scored, 4) if self.scored else 0.0,
+            }
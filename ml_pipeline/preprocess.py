@@ -5,6 +5,8 @@ import json
 from datetime import datetime
 import re
 
+from ml_pipeline.features import IP_PATTERN
+
 def parse_timestamp(text):
     try:
         return datetime.strptime(text[:15], "%b %d %H:%M:%S").replace(year=datetime.now().year).isoformat()
@@ -21,7 +23,7 @@ def extract_features_from_log(log_dict):
     timestamp = log_dict.get("timestamp", "")
 
     length = len(message)
-    contains_ip = int(bool(re.search(r"\b\d{1,3}(?:\.\d{1,3}){3}\b", message)))
+    contains_ip = int(bool(IP_PATTERN.search(message)))
 
     hour = -1
     try:
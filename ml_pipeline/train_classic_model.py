@@ -1,44 +1,116 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
 import pandas as pd
-import re
 import joblib
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.metrics import classification_report
-
-# --- Feature Extraction ---
-
-def extract_features(df):
-    def has_keyword(text, keyword):
-        return int(keyword in text.lower())
-
-    df["length"] = df["raw"].apply(len)
-    df["contains_ip"] = df["raw"].apply(lambda t: int(bool(re.search(r"\b\d{1,3}(?:\.\d{1,3}){3}\b", t))))
-    df["hour"] = df["timestamp"].apply(lambda t: pd.to_datetime(t, format="%b %d %H:%M:%S", errors='coerce').hour if t else -1)
-    df["failed"] = df["raw"].apply(lambda t: has_keyword(t, "failed"))
-    df["connection"] = df["raw"].apply(lambda t: has_keyword(t, "connection"))
-    df["invalid"] = df["raw"].apply(lambda t: has_keyword(t, "invalid"))
-    df["malicious"] = df["raw"].apply(lambda t: has_keyword(t, "malicious"))
-    df["scan"] = df["raw"].apply(lambda t: has_keyword(t, "scan"))
-    return df[["length", "contains_ip", "hour", "failed", "connection", "invalid", "malicious", "scan"]]
-
-# --- Load Data ---
-df = pd.read_csv("data/threat_logs.csv")
-X = extract_features(df)
-y = df["label"]
-print(df["label"].value_counts())
-
-# --- Train/Test Split ---
-X_train, X_test, y_train, y_test = train_test_split(X, y, stratify=y, test_size=0.2, random_state=42)
-
-# --- Model Training ---
-model = GradientBoostingClassifier()
-model.fit(X_train, y_train)
-
-# --- Evaluation ---
-y_pred = model.predict(X_test)
-print(" Classification Report:\n", classification_report(y_test, y_pred))
-
-# --- Save Model ---
-joblib.dump(model, "ml_pipeline/classic_classifier.joblib")
-print(" Model saved as classic_classifier.joblib")
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+from sklearn.metrics import accuracy_score, classification_report, f1_score
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ml_pipeline.compact_model import COMPACT_MODEL_PATH, JOBLIB_MODEL_PATH, export_gradient_boosting
+from ml_pipeline.features import FEATURE_COLUMNS
+from ml_pipeline.model_registry import publish
+from ml_pipeline.parallel_features import extract_csv, open_matrix, peak_rss_mb
+
+# gb: the original single-threaded ensemble (exports to the compact format)
+# hist: histogram-based boosting, multi-threaded through OpenMP
+ESTIMATORS = {
+    "gb": lambda: GradientBoostingClassifier(),
+    "hist": lambda: HistGradientBoostingClassifier(random_state=42),
+}
+
+
+def fit(estimator, X_train, y_train):
+    started = time.perf_counter()
+    model = ESTIMATORS[estimator]()
+    model.fit(X_train, y_train)
+    return model, time.perf_counter() - started
+
+
+def quality(y_test, y_pred):
+    return {"accuracy": round(accuracy_score(y_test, y_pred), 4),
+            "macro_f1": round(f1_score(y_test, y_pred, average="macro"), 4)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the threat classifier")
+    parser.add_argument("--data", default="data/threat_logs.csv", help="CSV with raw, timestamp and label columns")
+    parser.add_argument("--estimator", choices=sorted(ESTIMATORS), default="gb")
+    parser.add_argument("--workers", type=int, default=None, help="feature extraction processes (default: all cores)")
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--work-dir", default=None, help="where the memory-mapped features go (default: a temp dir)")
+    parser.add_argument("--compare", action="store_true", help="also train the other estimator and report parity")
+    parser.add_argument("--output", default=JOBLIB_MODEL_PATH)
+    parser.add_argument("--no-publish", action="store_true", help="do not add the model to the registry")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # --- Feature Extraction (streamed, parallel, memory-mapped) ---
+        work_dir = args.work_dir or tmp
+        extract_started = time.perf_counter()
+        meta = extract_csv(args.data, work_dir, args.chunk_rows, args.workers)
+        X, codes, meta = open_matrix(work_dir)
+        extract_seconds = time.perf_counter() - extract_started
+        y = np.asarray(meta["classes"])[codes]
+        print(f" Extracted {meta['rows']} rows in {extract_seconds:.2f}s")
+        print(pd.Series(y).value_counts())
+
+        # --- Train/Test Split ---
+        train_idx, test_idx = train_test_split(np.arange(meta["rows"]), stratify=y, test_size=0.2, random_state=42)
+        X_train = pd.DataFrame(X[np.sort(train_idx)], columns=FEATURE_COLUMNS)
+        X_test = pd.DataFrame(X[np.sort(test_idx)], columns=FEATURE_COLUMNS)
+        y_train, y_test = y[np.sort(train_idx)], y[np.sort(test_idx)]
+
+    # --- Model Training ---
+    model, fit_seconds = fit(args.estimator, X_train, y_train)
+    print(f" Trained {type(model).__name__} in {fit_seconds:.2f}s")
+
+    # --- Evaluation ---
+    y_pred = model.predict(X_test)
+    print(" Classification Report:\n", classification_report(y_test, y_pred))
+    metrics = classification_report(y_test, y_pred, output_dict=True)
+    timings = {"extract_seconds": round(extract_seconds, 3), "fit_seconds": round(fit_seconds, 3)}
+
+    if args.compare:
+        other = "hist" if args.estimator == "gb" else "gb"
+        baseline, baseline_seconds = fit(other, X_train, y_train)
+        baseline_pred = baseline.predict(X_test)
+        parity = {
+            args.estimator: {**quality(y_test, y_pred), "fit_seconds": round(fit_seconds, 3)},
+            other: {**quality(y_test, baseline_pred), "fit_seconds": round(baseline_seconds, 3)},
+            "prediction_agreement": round(float(np.mean(y_pred == baseline_pred)), 4),
+        }
+        metrics["parity"] = parity
+        print(f" Parity: {parity}")
+
+    # --- Save Model ---
+    joblib.dump(model, args.output)
+    print(f" Model saved as {args.output}")
+
+    if args.output == JOBLIB_MODEL_PATH:
+        # Flat NumPy export loaded by infer.py for fast start-up; only the
+        # classic ensemble has one, so drop a stale export otherwise
+        if isinstance(model, GradientBoostingClassifier):
+            export_gradient_boosting(model)
+            print(" Compact model saved as classic_classifier.npz")
+        elif os.path.exists(COMPACT_MODEL_PATH):
+            os.remove(COMPACT_MODEL_PATH)
+
+    # Versioned copy; a running backend picks it up and swaps to it
+    if not args.no_publish:
+        version = publish(model, {"classification_report": metrics, "train_rows": len(X_train),
+                                  "test_rows": len(X_test), **timings})
+        print(f" Model published to the registry as {version}")
+
+    own, workers = peak_rss_mb()
+    print(f" Wall clock {time.perf_counter() - started:.2f}s, peak RSS {own} MB (workers {workers} MB)")
+    return model
+
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,90 @@
 # ml_pipeline/train_isolation.py
+import argparse
 import os
-import json
-import re
+import sys
+import tempfile
+import time
+import numpy as np
 import pandas as pd
-from datetime import datetime
 from sklearn.ensemble import IsolationForest
-from joblib import dump
+from joblib import dump, load
 
-def parse_timestamp(raw_line):
-    """Extracts datetime from syslog-style log string."""
-    try:
-        ts = datetime.strptime(raw_line[:15], "%b %d %H:%M:%S")
-        return ts.replace(year=datetime.now().year)
-    except Exception:
-        return None
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ml_pipeline.compact_model import ISOLATION_JOBLIB_PATH, export_isolation_forest
+from ml_pipeline.feature_store import FeatureStore
+from ml_pipeline.parallel_features import ISOLATION_COLUMNS, extract_jsonl, open_matrix, peak_rss_mb
 
-def extract_features(raw):
-    """Returns a feature dictionary from a log line."""
-    timestamp = parse_timestamp(raw)
-    if not timestamp:
-        return None
+def log_files(folder):
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".json"))
 
-    return {
-        "length": len(raw),
-        "contains_ip": int(bool(re.search(r"\b\d{1,3}(?:\.\d{1,3}){3}\b", raw))),
-        "hour": timestamp.hour
-    }
+def subsample(rows, size, seed=42):
+    """Sorted random row indices (all rows when size covers them) so memmap reads stay sequential."""
+    if size is None or rows <= size:
+        return np.arange(rows)
+    return np.sort(np.random.default_rng(seed).choice(rows, size, replace=False))
 
-def load_parsed_logs(folder):
-    """Loads all .json logs and converts to feature dicts."""
-    data = []
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the IsolationForest used by the pre-filter")
+    parser.add_argument("--data-dir", default="data/parsed_logs", help="folder of parsed .json logs")
+    parser.add_argument("--workers", type=int, default=None, help="feature extraction processes (default: all cores)")
+    parser.add_argument("--chunk-mb", type=int, default=32)
+    parser.add_argument("--sample", type=int, default=1_000_000, help="rows to fit on (0: all of them)")
+    parser.add_argument("--work-dir", default=None, help="where the memory-mapped features go (default: a temp dir)")
+    parser.add_argument("--store", default=None, help="feature store to add the logs to and train from (only new lines are parsed)")
+    parser.add_argument("--output", default=ISOLATION_JOBLIB_PATH)
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
 
-    for filename in os.listdir(folder):
-        if filename.endswith(".json"):
-            with open(os.path.join(folder, filename)) as f:
-                for line in f:
-                    try:
-                        log = json.loads(line.strip())
-                        raw = log.get("raw", "")
-                        if not raw:
-                            continue
-                        feats = extract_features(raw)
-                        if feats:
-                            data.append(feats)
-                    except Exception:
-                        continue
+    with tempfile.TemporaryDirectory() as tmp:
+        # --- Feature Extraction (streamed, parallel, memory-mapped) ---
+        work_dir = args.work_dir or tmp
+        if args.store:
+            store = FeatureStore(args.store)
+            store.append(log_files(args.data_dir), args.chunk_mb * 1024 * 1024, args.workers)
+            valid = np.flatnonzero(store.column("hour") >= 0)  # lines with a parseable timestamp
+            total = len(valid)
+            take = lambda rows: store.matrix(ISOLATION_COLUMNS, valid[rows])
+        else:
+            extract_jsonl(log_files(args.data_dir), work_dir, args.chunk_mb * 1024 * 1024, args.workers)
+            X, _, meta = open_matrix(work_dir)
+            total = meta["rows"]
+            take = lambda rows: X[rows]
+        print(f" Extracted {total} valid log entries in {time.perf_counter() - started:.2f}s")
 
-    return pd.DataFrame(data)
+        if total == 0:
+            print(" No valid log entries found to train on.")
+            return None
 
-def main():
-    folder = "data/parsed_logs"
-    df = load_parsed_logs(folder)
+        df = pd.DataFrame(take(subsample(total, args.sample or None)), columns=ISOLATION_COLUMNS)
+        # Scored again after fitting, for the parity report
+        holdout = pd.DataFrame(take(subsample(total, 100_000, seed=7)), columns=ISOLATION_COLUMNS)
 
-    if df.empty:
-        print(" No valid log entries found to train on.")
-        return
+    fit_started = time.perf_counter()
+    model = IsolationForest(n_estimators=100, contamination=0.05, random_state=42, n_jobs=-1)
+    model.fit(df)
+    print(f" Fitted on {len(df)} of {total} entries in {time.perf_counter() - fit_started:.2f}s")
 
-    print(f" Loaded {len(df)} valid log entries.")
+    # --- Parity: share flagged, and agreement with the model being replaced ---
+    flagged = model.predict(holdout) == -1
+    print(f" Flagged {flagged.mean():.2%} of {len(holdout)} held-out entries (contamination 5%)")
+    if os.path.exists(args.output):
+        try:
+            previous = load(args.output)
+            agreement = np.mean((previous.predict(holdout) == -1) == flagged)
+            print(f" Agreement with the previous model: {agreement:.2%}")
+        except Exception as e:
+            print(f" Previous model not comparable: {e}")
 
-    model = IsolationForest(n_estimators=100, contamination=0.05, random_state=42)
-    model.fit(df)
+    dump(model, args.output)
+    print(f" Isolation Forest model saved to {args.output}")
 
-    model_path = "ml_pipeline/isolation_forest.joblib"
-    dump(model, model_path)
-    print(f" Isolation Forest model saved to {model_path}")
+    if args.output == ISOLATION_JOBLIB_PATH:
+        # Score table used by the online pre-filter (ml_pipeline/prefilter.py)
+        print(f" Score table saved to {export_isolation_forest(model)}")
+
+    own, workers = peak_rss_mb()
+    print(f" Wall clock {time.perf_counter() - started:.2f}s, peak RSS {own} MB (workers {workers} MB)")
+    return model
 
 if __name__ == "__main__":
     main()
-
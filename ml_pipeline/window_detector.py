@@ -0,0 +1,226 @@
+# ml_pipeline/window_detector.py
+"""Sliding-window rate detector for brute-force and scan bursts.
+
+The classifier judges each line alone; this keeps per-source-IP and per-user
+counters over the last ``window`` seconds so rates become visible. Each key
+owns a ring of ``window / bucket`` time buckets plus running totals, so an
+update is O(1) and memory per key is fixed. Keys idle for a whole window are
+evicted, and at most ``max_keys`` keys per kind are kept (least recently
+seen go first).
+
+    detector = WindowDetector()
+    for record in infer_logs(batch):
+        detector.process(record)   # adds record["window"] and record["alerts"]
+
+Counted per source IP: events, auth failures and pre-auth probes; per user:
+auth failures (reported on failures and on the next "Accepted" login). Alerts fire once per key and type per window:
+
+    brute_force       ip failures   >= brute_force_failures
+    scan              ip probes     >= scan_probes
+    user_brute_force  user failures >= user_failures
+
+Counters live in process memory. Under uvicorn --workers N each worker has
+its own detector and only sees the events it classified, so one source's
+traffic is split N ways between them; lower the thresholds accordingly.
+"""
+import os
+import sys
+from collections import OrderedDict
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from parser.base import find_src_ip, find_user
+
+FAILURE_MARKERS = ("Failed password", "Failed publickey", "Failed none", "FAILED LOGIN")
+PROBE_MARKERS = ("[preauth]", "Did not receive identification string", "Bad protocol version", "POSSIBLE BREAK-IN")
+MONTHS = {m: i for i, m in enumerate(("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+
+# Counter slots
+EVENTS, FAILURES, PROBES = range(3)
+
+
+class _Ring:
+    """Per-key bucket ring: ring[slot * width + counter] plus running totals."""
+
+    __slots__ = ("last", "totals", "ring", "alerted")
+
+    def __init__(self, bucket, n_buckets, width):
+        self.last = bucket
+        self.totals = [0] * width
+        self.ring = [0] * (n_buckets * width)
+        self.alerted = {}  # alert type -> bucket it fired in
+
+
+class WindowDetector:
+    def __init__(self, window=60.0, bucket=5.0, max_keys=100000,
+                 brute_force_failures=5, scan_probes=10, user_failures=10):
+        self.window = window
+        self.bucket = bucket
+        self.n_buckets = max(1, int(round(window / bucket)))
+        self.max_keys = max_keys
+        self.thresholds = {
+            "brute_force": brute_force_failures,
+            "scan": scan_probes,
+            "user_brute_force": user_failures,
+        }
+        self.ips = OrderedDict()
+        self.users = OrderedDict()
+        self._last_ts = (None, 0.0)  # consecutive records often share a timestamp
+        self.now = 0.0
+
+        self.events = 0
+        self.keyed_events = 0
+        self.alerts = 0
+        self.evicted = 0
+
+    def event_time(self, timestamp, raw=""):
+        """Seconds for an ISO or syslog timestamp (else the line's syslog prefix); last time seen on failure."""
+        if timestamp == self._last_ts[0]:
+            return self._last_ts[1]
+        t = None
+        if isinstance(timestamp, str):
+            try:
+                t = datetime.fromisoformat(timestamp).timestamp()
+            except ValueError:
+                t = self._syslog_time(timestamp)
+        if t is None:
+            t = self._syslog_time(raw[:15])
+        if t is None:
+            return self.now
+        self._last_ts = (timestamp, t)
+        return t
+
+    def _syslog_time(self, text):
+        # "Dec 10 06:55:46"; about 5x cheaper than strptime
+        month = MONTHS.get(text[:3])
+        if month is None or len(text) < 15 or text[9] != ":" or text[12] != ":":
+            return None
+        try:
+            return datetime(datetime.now().year, month, int(text[4:6]), int(text[7:9]),
+                            int(text[10:12]), int(text[13:15])).timestamp()
+        except ValueError:
+            return None
+
+    def _ring(self, table, key, bucket, width):
+        ring = table.get(key)
+        if ring is not None and ring.last == bucket:  # common case: same bucket as last time
+            table.move_to_end(key)
+            return ring, bucket % self.n_buckets
+        if ring is None:
+            ring = table[key] = _Ring(bucket, self.n_buckets, width)
+            # Evict idle keys (oldest first) and keep under max_keys
+            while table:
+                oldest = next(iter(table.values()))
+                if len(table) <= self.max_keys and oldest.last > bucket - self.n_buckets:
+                    break
+                table.popitem(last=False)
+                self.evicted += 1
+            return ring, bucket % self.n_buckets
+
+        table.move_to_end(key)
+        steps = bucket - ring.last
+        if steps > 0:
+            totals, counts = ring.totals, ring.ring
+            if steps >= self.n_buckets:
+                ring.ring = [0] * len(counts)
+                ring.totals = [0] * width
+            else:
+                for b in range(ring.last + 1, bucket + 1):
+                    base = (b % self.n_buckets) * width
+                    for j in range(width):
+                        totals[j] -= counts[base + j]
+                        counts[base + j] = 0
+            ring.last = bucket
+        elif steps <= -self.n_buckets:
+            # Older than the window: count it in the oldest bucket still inside
+            bucket = ring.last - self.n_buckets + 1
+        return ring, bucket % self.n_buckets
+
+    def _alert(self, ring, kind, key, count, bucket, alerts):
+        fired = ring.alerted.get(kind)
+        if fired is not None and bucket - fired < self.n_buckets:
+            return
+        ring.alerted[kind] = bucket
+        alerts.append({"type": kind, "key": key, "count": count, "window_seconds": self.window})
+        self.alerts += 1
+
+    def observe(self, t, ip=None, user=None, failure=False, probe=False):
+        """Counts one event at time t; returns (window features or None, alerts or None)."""
+        self.events += 1
+        if t > self.now:
+            self.now = t
+        if ip is None and user is None:
+            return None, None
+        self.keyed_events += 1
+        bucket = int(t // self.bucket)
+        features = {}
+        alerts = []
+
+        if ip is not None:
+            ring, slot = self._ring(self.ips, ip, bucket, 3)
+            counts, totals = ring.ring, ring.totals
+            base = slot * 3
+            counts[base] += 1
+            totals[EVENTS] += 1
+            if failure:
+                counts[base + FAILURES] += 1
+                totals[FAILURES] += 1
+                if totals[FAILURES] >= self.thresholds["brute_force"]:
+                    self._alert(ring, "brute_force", ip, totals[FAILURES], bucket, alerts)
+            if probe:
+                counts[base + PROBES] += 1
+                totals[PROBES] += 1
+                if totals[PROBES] >= self.thresholds["scan"]:
+                    self._alert(ring, "scan", ip, totals[PROBES], bucket, alerts)
+            features["ip_events"], features["ip_failures"], features["ip_probes"] = totals
+
+        # Users only count failures, so other lines read an existing ring
+        # (a success right after a burst shows up) but never create one
+        if user is not None and (failure or user in self.users):
+            ring, slot = self._ring(self.users, user, bucket, 1)
+            if failure:
+                ring.ring[slot] += 1
+                ring.totals[0] += 1
+                if ring.totals[0] >= self.thresholds["user_brute_force"]:
+                    self._alert(ring, "user_brute_force", user, ring.totals[0], bucket, alerts)
+            features["user_failures"] = ring.totals[0]
+
+        return features, alerts or None
+
+    def process(self, record):
+        """Adds "window" (and "alerts", when any fire) to an enriched record."""
+        raw = record.get("raw", "")
+        # Unrolled FAILURE_MARKERS / PROBE_MARKERS checks; this is the hot path
+        failure = ("Failed " in raw and ("Failed password" in raw or "Failed publickey" in raw or "Failed none" in raw)) \
+            or "FAILED LOGIN" in raw
+        probe = "[preauth]" in raw or "Did not receive identification string" in raw \
+            or "Bad protocol version" in raw or "POSSIBLE BREAK-IN" in raw
+
+        ip = record.get("src_ip") or find_src_ip(raw)
+        user = record.get("user")
+        if user is None and (failure or "Accepted " in raw):
+            user = find_user(raw)
+        features, alerts = self.observe(self.event_time(record.get("timestamp"), raw), ip, user, failure, probe)
+        if features is not None:
+            record["window"] = features
+        if alerts:
+            record["alerts"] = alerts
+        return record
+
+    def process_batch(self, records):
+        for record in records:
+            self.process(record)
+        return records
+
+    def stats(self):
+        return {
+            "window_seconds": self.window,
+            "bucket_seconds": self.bucket,
+            "events": self.events,
+            "keyed_events": self.keyed_events,
+            "alerts": self.alerts,
+            "tracked_ips": len(self.ips),
+            "tracked_users": len(self.users),
+            "evicted": self.evicted,
+            "max_keys": self.max_keys,
+        }
@@ -0,0 +1,62 @@
+import re
+from typing import Optional
+
+from parser.base import LogParser
+
+
+class ApacheParser(LogParser):
+    """Apache/nginx access log, common or combined format."""
+
+    name = "apache_access"
+    pattern = re.compile(
+        r'(\S+) \S+ (\S+) \[([^\]]+)\] "([^"]*)" (\d{3}) (\d+|-)(?: "([^"]*)" "([^"]*)")?'
+    )
+
+    def parse(self, line: str) -> Optional[dict]:
+        match = self.pattern.match(line)
+        if not match:
+            return None
+
+        ip, user, timestamp, request, status, size, referrer, agent = match.groups()
+        parts = request.split(" ")
+        entry = {
+            "raw": line.strip(),
+            "ip": ip,
+            "src_ip": ip,
+            "timestamp": timestamp,
+            "request": request,
+            "method": parts[0] if len(parts) > 1 else None,
+            "path": parts[1] if len(parts) > 1 else None,
+            "protocol": parts[2] if len(parts) > 2 else None,
+            "status": int(status),
+            "size": 0 if size == "-" else int(size),
+        }
+        if user != "-":  # "-" is Apache's placeholder for no authenticated user
+            entry["user"] = user
+        if referrer is not None:
+            entry["referrer"] = referrer
+            entry["user_agent"] = agent
+        return entry
+
+
+class ApacheErrorParser(LogParser):
+    """Apache error log: [Sun Dec 04 04:47:44 2005] [error] [client 1.2.3.4] message"""
+
+    name = "apache_error"
+    pattern = re.compile(r"\[(\w{3} \w{3} +\d+ [\d:.]+ \d{4})\] \[(\w+)(?::\w+)?\] (?:\[client ([^\]:]+)(?::\d+)?\] )?")
+
+    def parse(self, line: str) -> Optional[dict]:
+        match = self.pattern.match(line)
+        if not match:
+            return None
+
+        timestamp, level, client = match.groups()
+        entry = {
+            "raw": line.strip(),
+            "timestamp": timestamp,
+            "level": level,
+            "message": line[match.end():].strip(),
+        }
+        if client:
+            entry["src_ip"] = client
+        return entry
@@ -0,0 +1,69 @@
+import re
+from typing import Optional
+
+IP_PATTERN = re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}\b")
+IP_AT = re.compile(r"\d{1,3}(?:\.\d{1,3}){3}\b")
+# Where auth messages put the peer address; an anchored match there is far
+# cheaper than scanning the whole message
+IP_MARKERS = ("from ", "rhost=", "[", "client ")
+USER_PATTERN = re.compile(
+    r"(?:(?:password|publickey) for (?:invalid user |illegal user )?|[Ii]nvalid user |[Ii]llegal user |\buser[= ])([^\s;\[\]]+)"
+)
+PORT_PATTERN = re.compile(r"\bport (\d+)")
+
+
+def find_src_ip(message: str) -> Optional[str]:
+    """The peer address an auth message mentions, or None."""
+    # Cheap substring check first: most lines carry no address
+    if message.count(".") < 3:
+        return None
+    for marker in IP_MARKERS:
+        i = message.find(marker)
+        if i != -1:
+            ip = IP_AT.match(message, i + len(marker))
+            if ip:
+                return ip.group(0)
+    ip = IP_PATTERN.search(message)
+    return ip.group(0) if ip else None
+
+
+def find_user(message: str) -> Optional[str]:
+    """The account name an auth message mentions, or None."""
+    # USER_PATTERN cannot match before the first "password for", "publickey
+    # for" or "[Ii]nvalid/[Ii]llegal user", so start the search there
+    starts = [i for i in (message.find("password for "), message.find("publickey for ")) if i != -1]
+    i = message.find("user")
+    if i != -1:
+        starts.append(max(i - 8, 0))
+    if not starts:
+        return None
+    user = USER_PATTERN.search(message, min(starts))
+    return user.group(1) if user else None
+
+
+def extract_auth_fields(message: str, fields: dict) -> dict:
+    """Adds src_ip / user / port to fields when the message mentions them."""
+    ip = find_src_ip(message)
+    if ip:
+        fields["src_ip"] = ip
+    user = find_user(message)
+    if user:
+        fields["user"] = user
+    if "port " in message:
+        port = PORT_PATTERN.search(message)
+        if port:
+            fields["port"] = int(port.group(1))
+    return fields
+
+
+class LogParser:
+    """One log format: a precompiled pattern plus a parse() that returns None on no match."""
+
+    name = "base"
+    pattern: re.Pattern = None
+
+    def matches(self, line: str) -> bool:
+        return self.pattern.match(line) is not None
+
+    def parse(self, line: str) -> Optional[dict]:
+        raise NotImplementedError
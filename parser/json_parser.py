@@ -0,0 +1,22 @@
+import json
+from typing import Optional
+
+from parser.base import LogParser
+
+
+class JSONParser(LogParser):
+    """One JSON object per line (NDJSON)."""
+
+    name = "json"
+
+    def matches(self, line: str) -> bool:
+        return self.parse(line) is not None
+
+    def parse(self, line: str) -> Optional[dict]:
+        if not line.lstrip().startswith("{"):
+            return None
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            return None
+        return entry if isinstance(entry, dict) else None
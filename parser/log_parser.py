@@ -1,54 +1,96 @@
-import re
-import json
+import bz2
+import gzip
 from pathlib import Path
-from typing import List
+from typing import Iterator, Optional
 
+from parser.registry import registry
 
-def parse_log_file(file_path: Path, log_type: str) -> List[dict]:
-    with open(file_path, "r") as f:
-        lines = f.readlines()
+COMPRESSION_OPENERS = {"gzip": gzip.open, "bz2": bz2.open}
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".bz2": "bz2"}
 
-    if log_type == "apache" or log_type == "nginx":
-        return [parse_apache_log(line) for line in lines if line.strip()]
-    elif log_type == "syslog":
-        return [parse_syslog(line) for line in lines if line.strip()]
-    elif log_type == "json":
-        return [parse_json_log(line) for line in lines if line.strip()]
+
+def detect_compression(file_path: Path) -> Optional[str]:
+    return COMPRESSION_SUFFIXES.get(Path(file_path).suffix.lower())
+
+
+def iter_lines(file_path: Path, compression: Optional[str] = "auto", start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+    """Lazily yields decoded lines from a plain, gzip or bz2 file.
+
+    ``start``/``end`` restrict a plain file to the byte range [start, end);
+    both must fall on line boundaries. Compressed files are always read whole.
+    """
+    if compression == "auto":
+        compression = detect_compression(file_path)
+
+    if compression:
+        if compression not in COMPRESSION_OPENERS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        with COMPRESSION_OPENERS[compression](file_path, "rt", errors="replace") as f:
+            yield from f
+        return
+
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        position = start
+        for line in f:
+            if end is not None and position >= end:
+                break
+            position += len(line)
+            if line.endswith(b"\r\n"):
+                line = line[:-2] + b"\n"
+            yield line.decode("utf-8", errors="replace")
+
+
+def split_offsets(file: Path, chunk_bytes: int, start: int = 0) -> list:
+    """Splits a plain file from ``start`` (a line start) into [start, end) byte ranges that begin on line starts."""
+    size = Path(file).stat().st_size
+    if detect_compression(file) or size - start <= chunk_bytes:
+        return [(start, None)]
+
+    ranges = []
+    with open(file, "rb") as f:
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()  # move to the start of the next line
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def parse_log_file(file_path: Path, log_type: str = "auto", compression: Optional[str] = "auto",
+                   start: int = 0, end: Optional[int] = None) -> Iterator[dict]:
+    """Lazily parses a log file, one dict per non-blank line.
+
+    ``log_type="auto"`` picks the format from the file's first lines; with an
+    explicit type, lines that do not match it come back as {"raw": line}.
+    """
+    if log_type == "auto":
+        if registry.detect_file(file_path) is None:
+            raise ValueError(f"Could not detect the log format of {file_path}")
+        source = str(file_path)
+        parse = lambda line: parse_line(line, source)
     else:
-        raise ValueError(f"Unsupported log type: {log_type}")
+        parser = registry.get(log_type)
+        parse = lambda line: parser.parse(line) or {"raw": line.strip()}
+
+    for line in iter_lines(file_path, compression, start, end):
+        if line.strip():
+            yield parse(line)
+
+
+def parse_line(line: str, source: Optional[str] = None) -> dict:
+    """Parses one line of any known format; ``source`` (e.g. a file path) keeps the detected format per source."""
+    return registry.parse(line, source)
 
 
 def parse_apache_log(line: str) -> dict:
-    pattern = r'(\S+) (\S+) (\S+) \[(.*?)\] "(.*?)" (\d{3}) (\d+)'
-    match = re.match(pattern, line)
-    if match:
-        return {
-            "ip": match.group(1),
-            "user": match.group(3),
-            "timestamp": match.group(4),
-            "request": match.group(5),
-            "status": int(match.group(6)),
-            "size": int(match.group(7)),
-        }
-    return {"raw": line.strip()}
+    return registry.get("apache_access").parse(line) or {"raw": line.strip()}
 
 
 def parse_syslog(line: str) -> dict:
-    pattern = r'^(\w{3}\s+\d+\s[\d:]+)\s([\w.-]+)\s([\w\/\-\[\]]+):\s?(.*)'
-    match = re.match(pattern, line)
-    if match:
-        return {
-            "timestamp": match.group(1),
-            "hostname": match.group(2),
-            "service": match.group(3),
-            "message": match.group(4),
-        }
-    return {"raw": line.strip()}
+    return registry.get("syslog").parse(line) or {"raw": line.strip()}
 
 
 def parse_json_log(line: str) -> dict:
-    try:
-        return json.loads(line)
-    except json.JSONDecodeError:
-        return {"raw": line.strip()}
-
+    return registry.get("json").parse(line) or {"raw": line.strip()}
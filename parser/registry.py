@@ -0,0 +1,98 @@
+from collections import OrderedDict
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from parser.base import LogParser
+from parser.apache_parser import ApacheParser, ApacheErrorParser
+from parser.syslog_parser import SyslogParser, OpenSSHParser
+from parser.json_parser import JSONParser
+
+# Most specific first: on a tie in detection the earlier parser wins
+DEFAULT_PARSERS = [JSONParser(), ApacheParser(), ApacheErrorParser(), OpenSSHParser(), SyslogParser()]
+
+# Names the rest of the project has historically used for log types
+ALIASES = {"apache": "apache_access", "access": "apache_access", "nginx": "apache_access"}
+
+
+class ParserRegistry:
+    """Picks the parser for a source by sampling its first lines.
+
+    The detected parser is cached per source, and every line is tried against
+    that source's cached parser first; only lines it rejects fall through to
+    the other formats. Sources come from clients (upload filenames, ingest
+    fields), so the cache keeps only the ``max_sources`` most recently used.
+    """
+
+    def __init__(self, parsers: Optional[List[LogParser]] = None, sample_size: int = 50, max_sources: int = 1024):
+        self.parsers = list(parsers or DEFAULT_PARSERS)
+        self.by_name: Dict[str, LogParser] = {parser.name: parser for parser in self.parsers}
+        self.sample_size = sample_size
+        self.max_sources = max_sources
+        self._sources: "OrderedDict[str, LogParser]" = OrderedDict()
+
+    def get(self, name: str) -> LogParser:
+        name = ALIASES.get(name, name)
+        if name not in self.by_name:
+            raise ValueError(f"Unsupported log type: {name}")
+        return self.by_name[name]
+
+    def detect(self, lines: Iterable[str]) -> Optional[LogParser]:
+        """Returns the parser matching the most sampled lines, or None."""
+        sample = [line for line in islice((l for l in lines if l.strip()), self.sample_size)]
+        best, best_hits = None, 0
+        for parser in self.parsers:
+            hits = sum(1 for line in sample if parser.matches(line))
+            if hits > best_hits:
+                best, best_hits = parser, hits
+        return best
+
+    def _remember(self, source: str, parser: LogParser) -> None:
+        self._sources[source] = parser
+        if len(self._sources) > self.max_sources:
+            self._sources.popitem(last=False)
+
+    def _cached(self, source: Optional[str]) -> Optional[LogParser]:
+        parser = self._sources.get(source) if source is not None else None
+        if parser is not None:
+            try:
+                self._sources.move_to_end(source)
+            except KeyError:
+                pass  # evicted by another thread in between
+        return parser
+
+    def detect_file(self, file_path: Path) -> Optional[LogParser]:
+        key = str(file_path)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        from parser.log_parser import iter_lines
+        lines = iter_lines(file_path)
+        try:
+            parser = self.detect(lines)
+        finally:
+            lines.close()
+        if parser is not None:
+            self._remember(key, parser)
+        return parser
+
+    def parse(self, line: str, source: Optional[str] = None) -> dict:
+        """Parses one line; unrecognised lines come back as {"raw": line}."""
+        cached = self._cached(source)
+        if cached is not None:
+            entry = cached.parse(line)
+            if entry is not None:
+                return entry
+
+        for parser in self.parsers:
+            if parser is cached:
+                continue
+            entry = parser.parse(line)
+            if entry is not None:
+                if source is not None and cached is None:
+                    self._remember(source, parser)
+                return entry
+        return {"raw": line.strip()}
+
+
+registry = ParserRegistry()
@@ -0,0 +1,42 @@
+import re
+from typing import Optional
+
+from parser.base import LogParser, extract_auth_fields
+
+
+class SyslogParser(LogParser):
+    """BSD syslog: 'Jun 14 15:16:01 combo sshd(pam_unix)[19939]: message'"""
+
+    name = "syslog"
+    # Only the header is matched; the message is sliced off after it
+    pattern = re.compile(r"(\w{3}\s+\d+\s[\d:]+)\s(\S+)\s([^\s:\[]+)(?:\[(\d+)\])?:")
+
+    def parse(self, line: str) -> Optional[dict]:
+        match = self.pattern.match(line)
+        if not match:
+            return None
+
+        timestamp, hostname, service, pid = match.groups()
+        entry = {
+            "raw": line.strip(),
+            "timestamp": timestamp,
+            "hostname": hostname,
+            "service": service,
+            "message": line[match.end():].strip(),
+        }
+        if pid:
+            entry["pid"] = int(pid)
+        return entry
+
+
+class OpenSSHParser(SyslogParser):
+    """Syslog lines written by sshd, with src_ip / user / port pulled out."""
+
+    name = "openssh"
+    pattern = re.compile(r"(\w{3}\s+\d+\s[\d:]+)\s(\S+)\s(sshd)(?:\[(\d+)\])?:")
+
+    def parse(self, line: str) -> Optional[dict]:
+        entry = super().parse(line)
+        if entry is None:
+            return None
+        return extract_auth_fields(entry["message"], entry)
@@ -1,18 +1,23 @@
-
 from pathlib import Path
+import argparse
 import sys
 import os
 import json
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 # Add root project path to imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from parser.log_parser import parse_log_file
+from parser.log_parser import parse_log_file, detect_compression, split_offsets
+from parser.registry import registry
 
 DATA_DIR = Path("data")
 OUTPUT_DIR = DATA_DIR / "parsed_logs"
+LOG_PATTERNS = ("*.log", "*.log.gz", "*.log.bz2")
 
-# Ensure output directory exists
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+WRITE_BATCH = 5000             # entries serialized per write() call
+CHUNK_BYTES = 64 * 1024 * 1024  # plain files larger than this are split
 
 SUPPORTED_FORMATS = {
     "apache": "apache",
@@ -34,39 +39,98 @@ def detect_log_type(filename: str) -> str:
             return log_type
     return "unknown"
 
-def main():
-    log_files = list(DATA_DIR.glob("*.log"))
+def detect_file_type(file: Path) -> str:
+    """Detects the format from the file's first lines; the filename is only a fallback."""
+    parser = registry.detect_file(file)
+    return parser.name if parser else detect_log_type(file.name)
+
+def output_name(file: Path) -> str:
+    """auth.log -> auth.json, auth.log.gz -> auth.json"""
+    name = file.name[:-len(file.suffix)] if detect_compression(file) else file.name
+    return Path(name).stem + ".json"
+
+def parse_chunk(file: Path, log_type: str, start: int, end, out_path: Path) -> int:
+    """Worker: parses one byte range and writes it as JSONL in batches."""
+    count = 0
+    batch = []
+    with open(out_path, "w") as f:
+        for entry in parse_log_file(file, log_type, start=start, end=end):
+            batch.append(json.dumps(entry))
+            if len(batch) >= WRITE_BATCH:
+                f.write("\n".join(batch) + "\n")
+                count += len(batch)
+                batch = []
+        if batch:
+            f.write("\n".join(batch) + "\n")
+            count += len(batch)
+    return count
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Parse data/*.log into JSONL under data/parsed_logs")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="parallel parser processes")
+    arg_parser.add_argument("--chunk-mb", type=float, default=CHUNK_BYTES / (1024 * 1024),
+                            help="split plain files larger than this into line-aligned chunks")
+    arg_parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    arg_parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR)
+    args = arg_parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    log_files = sorted(f for pattern in LOG_PATTERNS for f in args.data_dir.glob(pattern))
 
     if not log_files:
-        print("No log files found in 'data/' folder.")
+        print(f"No log files found in '{args.data_dir}/' folder.")
         return
 
-    for file in log_files:
-        log_type = detect_log_type(file.name)
-        print(f"\n Parsing '{file.name}' as type: {log_type.upper()}")
+    chunk_bytes = max(1, int(args.chunk_mb * 1024 * 1024))
+    started = time.perf_counter()
+    jobs = {}
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for file in log_files:
+            log_type = detect_file_type(file)
+            print(f"\n Parsing '{file.name}' as type: {log_type.upper()}")
+
+            if log_type == "unknown":
+                print("Skipping unknown log type.\n")
+                continue
 
-        if log_type == "unknown":
-            print("Skipping unknown log type.\n")
-            continue
+            out_path = args.output_dir / output_name(file)
+            parts = []
+            for i, (start, end) in enumerate(split_offsets(file, chunk_bytes)):
+                part_path = out_path.with_name(f"{out_path.name}.part{i}")
+                parts.append((part_path, pool.submit(parse_chunk, file, log_type, start, end, part_path)))
+            jobs[file] = (out_path, parts)
+
+        total_lines = total_bytes = 0
+        for file, (out_path, parts) in jobs.items():
+            try:
+                count = sum(future.result() for _, future in parts)
+            except Exception as e:
+                print(f"Error parsing {file.name}: {e}")
+                for part_path, _ in parts:
+                    part_path.unlink(missing_ok=True)
+                continue
 
-        try:
-            parsed_logs = parse_log_file(file, log_type)
+            # Stitch the parts together in order without loading them
+            with open(out_path, "wb") as out:
+                for part_path, _ in parts:
+                    with open(part_path, "rb") as part:
+                        shutil.copyfileobj(part, out, 1024 * 1024)
+                    part_path.unlink()
 
-            if not parsed_logs:
-                print("No logs parsed from this file.")
+            if not count:
+                print(f"No logs parsed from {file.name}.")
+                out_path.unlink()
                 continue
 
-            # Write parsed logs to JSONL file
-            out_path = OUTPUT_DIR / (file.stem + ".json")
-            with open(out_path, "w") as f:
-                for entry in parsed_logs:
-                    json.dump(entry, f)
-                    f.write("\n")
+            total_lines += count
+            total_bytes += file.stat().st_size
+            print(f"Saved {count} logs from {file.name} to {out_path} ({len(parts)} chunk(s))")
 
-            print(f"Saved {len(parsed_logs)} logs to {out_path}")
-        except Exception as e:
-            print(f"Error parsing {file.name}: {e}")
+    elapsed = time.perf_counter() - started
+    print(f"\n Parsed {total_lines} lines ({total_bytes / 1e6:.1f} MB) in {elapsed:.2f}s "
+          f"with {args.workers} worker(s): {total_lines / elapsed:,.0f} lines/s, "
+          f"{total_bytes / 1e6 / elapsed:.1f} MB/s")
 
 if __name__ == "__main__":
     main()
-
@@ -8,7 +8,7 @@ from elasticsearch.helpers import bulk
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ml_pipeline.infer import infer_log
+from ml_pipeline.infer import infer_logs_isolated
 
 
 def random_ip():
@@ -63,13 +63,12 @@ def upload_to_es(logs, es_url="http://localhost:9200", index_name="classified-lo
     es = Elasticsearch(es_url)
     actions = []
 
-    for log in logs:
-        try:
-            enriched = infer_log(log)
-            enriched["ingested_at"] = datetime.utcnow().isoformat()
-            actions.append({"_index": index_name, "_source": enriched})
-        except Exception as e:
-            print(f" Error processing log: {log['raw']}\n{e}")
+    records, failures = infer_logs_isolated(logs)
+    for log, e in failures:
+        print(f" Error processing log {log.get('raw')!r}:\n{e}")
+    for enriched in records:
+        enriched["ingested_at"] = datetime.utcnow().isoformat()
+        actions.append({"_index": index_name, "_source": enriched})
 
     if actions:
         bulk(es, actions)
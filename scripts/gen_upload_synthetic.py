@@ -4,7 +4,7 @@ from elasticsearch import Elasticsearch, helpers
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ml_pipeline.infer import infer_log
+from ml_pipeline.infer import infer_logs_isolated
 
 es = Elasticsearch("http://localhost:9200")
 
@@ -84,18 +84,17 @@ def upload_logs_to_es(logs):
     actions = []
     count = 0
 
-    for log in logs:
-        try:
-            enriched = infer_log(log)
-            enriched["ingested_at"] = datetime.utcnow().isoformat()
-            enriched["source"] = "synthetic"
-            actions.append({
-                "_index": "classified-logs",
-                "_source": enriched
-            })
-            count += 1
-        except Exception as e:
-            print(f" Failed to enrich log: {e}")
+    records, failures = infer_logs_isolated(logs)
+    for log, e in failures:
+        print(f" Failed to enrich log {log.get('raw')!r}: {e}")
+    for enriched in records:
+        enriched["ingested_at"] = datetime.utcnow().isoformat()
+        enriched["source"] = "synthetic"
+        actions.append({
+            "_index": "classified-logs",
+            "_source": enriched
+        })
+        count += 1
 
     if actions:
         helpers.bulk(es, actions)
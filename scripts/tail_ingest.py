@@ -0,0 +1,369 @@
+"""Tails log files, classifies new lines in batches and bulk-indexes them.
+
+Follows files the way fluent-bit's ``tail`` input does, but sends every line
+through the parser and the classifier instead of straight into ``logs``:
+
+- each file is tracked by inode, with its offset checkpointed in a SQLite DB
+  once the batch holding its lines is indexed, so a restart resumes exactly
+  where the last acknowledged batch ended
+- a rotated (renamed) file is read to the end before it is let go, and the
+  new file under the old name is read from the head; a truncated file starts
+  over from offset 0
+- files seen for the first time start at their end unless --read-from-head
+- documents get a deterministic _id (inode, offset and line) and are sent
+  with op_type create, so lines replayed after a crash are dropped as 409s
+
+    python scripts/tail_ingest.py --path 'data/*.log' --read-from-head
+"""
+import argparse
+import glob
+import hashlib
+import os
+import signal
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from elasticsearch import Elasticsearch
+from elasticsearch.helpers import streaming_bulk
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ml_pipeline.infer import infer_logs
+from ml_pipeline.window_detector import WindowDetector
+from parser.log_parser import parse_line
+
+DEFAULT_PATH = "data/*.log"
+DEFAULT_DB = "data/tail_ingest.db"
+READ_BYTES = 1024 * 1024
+MAX_LINE_BYTES = 1024 * 1024   # longer lines are skipped (fluent-bit's Skip_Long_Lines)
+MAX_BACKOFF = 30.0
+
+TIMESTAMP_FORMATS = ("%b %d %H:%M:%S", "%d/%b/%Y:%H:%M:%S %z", "%a %b %d %H:%M:%S %Y")
+
+
+def document_id(inode, offset, line):
+    """Stable _id for a line: the same bytes at the same place always map to the same document."""
+    return hashlib.sha1(f"{inode}:{offset}:{line}".encode("utf-8")).hexdigest()
+
+
+def iso_timestamp(value):
+    """ISO form of a parsed syslog / Apache / ISO timestamp, or None."""
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        pass
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            parsed = datetime.strptime(" ".join(value.split()), fmt)
+        except ValueError:
+            continue
+        if "%Y" not in fmt:
+            parsed = parsed.replace(year=datetime.now().year)
+        return parsed.isoformat()
+    return None
+
+
+class Checkpoints:
+    """inode -> (path, offset) in SQLite, written once per flushed batch."""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS files (inode INTEGER PRIMARY KEY, path TEXT, offset INTEGER)")
+        self.db.commit()
+
+    def get(self, inode):
+        row = self.db.execute("SELECT offset FROM files WHERE inode = ?", (inode,)).fetchone()
+        return row[0] if row else None
+
+    def save(self, files):
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO files (inode, path, offset) VALUES (?, ?, ?)",
+                                [(f.inode, f.path, f.offset) for f in files])
+
+    def delete(self, inode):
+        with self.db:
+            self.db.execute("DELETE FROM files WHERE inode = ?", (inode,))
+
+    def close(self):
+        self.db.close()
+
+
+class TailedFile:
+    def __init__(self, path, inode, offset):
+        self.path = path
+        self.inode = inode
+        self.handle = open(path, "rb")
+        self.handle.seek(offset)
+        self.offset = offset      # checkpointed position: end of the last indexed line
+        self.position = offset    # end of the last complete line read
+        self.buffer = b""         # bytes read past position; lines start at cursor
+        self.cursor = 0
+        self.skipping = False     # inside an over-long line
+        self.rotated_at = None
+
+    def read_lines(self, limit):
+        """Up to limit (offset, line) pairs of complete lines after position."""
+        lines = []
+        buffer, cursor = self.buffer, self.cursor
+        while len(lines) < limit:
+            newline = buffer.find(b"\n", cursor)
+            if newline == -1:
+                rest = buffer[cursor:]
+                if len(rest) > MAX_LINE_BYTES:
+                    self.position += len(rest)
+                    rest, self.skipping = b"", True
+                data = self.handle.read(READ_BYTES)
+                buffer, cursor = rest + data, 0
+                if not data:
+                    break
+                continue
+
+            start, self.position = self.position, self.position + newline + 1 - cursor
+            raw, cursor = buffer[cursor:newline], newline + 1
+            if self.skipping:
+                self.skipping = False
+                continue
+            line = raw.rstrip(b"\r").decode("utf-8", errors="replace")
+            if line.strip():
+                lines.append((start, line))
+        self.buffer, self.cursor = buffer, cursor
+        return lines
+
+    def restart_if_truncated(self):
+        size = os.fstat(self.handle.fileno()).st_size
+        if size < self.position + len(self.buffer) - self.cursor:
+            print(f" {self.path} was truncated, reading from the start")
+            self.handle.seek(0)
+            self.offset = self.position = 0
+            self.buffer, self.cursor = b"", 0
+            self.skipping = False
+
+    def close(self):
+        self.handle.close()
+
+
+class TailIngestor:
+    def __init__(self, es, index="classified-logs", patterns=(DEFAULT_PATH,), db_path=DEFAULT_DB,
+                 batch_size=1000, flush_interval=1.0, read_from_head=False, refresh_interval=5.0,
+                 rotate_wait=5.0):
+        self.es = es
+        self.index = index
+        self.patterns = list(patterns)
+        self.checkpoints = Checkpoints(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.read_from_head = read_from_head
+        self.refresh_interval = refresh_interval
+        self.rotate_wait = rotate_wait
+        self.detector = WindowDetector()
+        self.files = {}           # inode -> TailedFile
+        self.batch = []           # (file, start offset, line)
+        self.batch_started = None
+        self.scanned = False
+        self.running = True
+        self.stats = {"lines": 0, "indexed": 0, "duplicates": 0, "errors": 0, "batches": 0, "retries": 0}
+
+    # --- Discovery and rotation ---
+
+    def scan(self):
+        seen = {}
+        for pattern in self.patterns:
+            for path in glob.glob(pattern):
+                try:
+                    seen[os.stat(path).st_ino] = path
+                except FileNotFoundError:
+                    continue
+
+        for inode, path in seen.items():
+            tailed = self.files.get(inode)
+            if tailed is not None:
+                tailed.path, tailed.rotated_at = path, None
+                continue
+            offset = self.checkpoints.get(inode)
+            size = os.stat(path).st_size
+            if offset is None:
+                # New since the last scan: always read it all (it is what a rotation created)
+                offset = 0 if self.read_from_head or self.scanned else size
+            elif offset > size:
+                offset = 0  # truncated while we were stopped
+            try:
+                self.files[inode] = TailedFile(path, inode, offset)
+            except FileNotFoundError:
+                continue
+            self.checkpoints.save([self.files[inode]])
+
+        for inode, tailed in self.files.items():
+            if inode not in seen and tailed.rotated_at is None:
+                tailed.rotated_at = time.monotonic()
+        self.scanned = True
+
+    def _release_rotated(self, drained):
+        """Closes rotated files that were read to the end and waited on for rotate_wait."""
+        now = time.monotonic()
+        for inode in drained:
+            tailed = self.files[inode]
+            if tailed.rotated_at is not None and now - tailed.rotated_at >= self.rotate_wait \
+                    and not any(t is tailed for t, _, _ in self.batch):
+                tailed.close()
+                del self.files[inode]
+                self.checkpoints.delete(inode)
+
+    # --- Reading and shipping ---
+
+    def poll(self):
+        """Reads what is available from every file; returns the number of lines read."""
+        read = 0
+        drained = []
+        for tailed in list(self.files.values()):
+            tailed.restart_if_truncated()
+            while True:
+                lines = tailed.read_lines(self.batch_size - len(self.batch))
+                if not lines:
+                    drained.append(tailed.inode)
+                    break
+                if self.batch_started is None:
+                    self.batch_started = time.monotonic()
+                self.batch.extend((tailed, start, line) for start, line in lines)
+                read += len(lines)
+                if len(self.batch) >= self.batch_size:
+                    self.flush()
+        if self.batch and time.monotonic() - self.batch_started >= self.flush_interval:
+            self.flush()
+        self._release_rotated(drained)
+        return read
+
+    def classify(self, batch):
+        entries = [parse_line(line, tailed.path) for tailed, _, line in batch]
+        log_dicts = [
+            {"raw": line, "timestamp": iso_timestamp(entry.get("timestamp")) or datetime.utcnow().isoformat()}
+            for (_, _, line), entry in zip(batch, entries)
+        ]
+        records = self.detector.process_batch(infer_logs(log_dicts))
+        ingested_at = datetime.utcnow().isoformat()
+        for record, entry, (tailed, _, _) in zip(records, entries, batch):
+            for field in ("service", "src_ip", "user"):
+                if entry.get(field):
+                    record[field] = entry[field]
+            record["source"] = tailed.path
+            record["ingested_at"] = ingested_at
+        return records
+
+    def flush(self):
+        """Classifies and indexes the batch, then checkpoints it.
+
+        Failed requests and documents worth sending again (429, 5xx) are retried
+        with backoff until ES takes them; documents rejected for good (a
+        mapping error) are counted as errors and passed over.
+        """
+        if not self.batch:
+            return
+        batch, self.batch, self.batch_started = self.batch, [], None
+        records = self.classify(batch)
+        actions = [
+            {"_op_type": "create", "_index": self.index, "_id": document_id(tailed.inode, start, line), "_source": record}
+            for (tailed, start, line), record in zip(batch, records)
+        ]
+
+        counts = {"indexed": 0, "duplicates": 0, "errors": 0}
+        backoff = 0.5
+        while actions:
+            retry, answered, error = [], 0, None
+            try:
+                for action, (ok, item) in zip(actions, streaming_bulk(self.es, actions, chunk_size=self.batch_size,
+                                                                      raise_on_error=False)):
+                    answered += 1
+                    status = item.get("create", {}).get("status")
+                    if ok:
+                        counts["indexed"] += 1
+                    elif status == 409:
+                        counts["duplicates"] += 1
+                    elif status == 429 or not isinstance(status, int) or status >= 500:
+                        retry.append(action)  # rejected for now (queue full, shard unavailable)
+                    else:
+                        counts["errors"] += 1  # rejected for good, e.g. a mapping error
+                if retry:
+                    error = f"{len(retry)} documents failed"
+            except Exception as e:
+                if not self.running:
+                    raise
+                error = f"Bulk request failed ({e})"
+            actions = retry + actions[answered:]
+            if error is None:
+                break
+            if not self.running:
+                raise RuntimeError(f"{error}; stopping before the batch was checkpointed")
+            self.stats["retries"] += 1
+            print(f" {error}; retrying in {backoff:.1f}s")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF)
+
+        for key, value in counts.items():
+            self.stats[key] += value
+        self.stats["lines"] += len(batch)
+        self.stats["batches"] += 1
+
+        # Checkpoint only once ES has acknowledged the lines. Every complete
+        # line read so far was in this batch (or skipped), so each file is
+        # done up to its read position
+        moved = [tailed for tailed in self.files.values() if tailed.offset != tailed.position]
+        for tailed in moved:
+            tailed.offset = tailed.position
+        self.checkpoints.save(moved)
+
+    def run(self, once=False):
+        """Follows the files until stopped; with once, stops after reading everything available."""
+        last_scan = 0.0
+        try:
+            while self.running:
+                if time.monotonic() - last_scan >= self.refresh_interval or once:
+                    self.scan()
+                    last_scan = time.monotonic()
+                if not self.poll():
+                    if once:
+                        break
+                    time.sleep(min(0.25, self.flush_interval))
+            self.flush()
+        finally:
+            self.close()
+        return self.stats
+
+    def stop(self, *_):
+        self.running = False
+
+    def close(self):
+        for tailed in self.files.values():
+            tailed.close()
+        self.checkpoints.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tail log files, classify new lines and index them")
+    parser.add_argument("--path", action="append", help=f"glob of files to follow (repeatable, default {DEFAULT_PATH})")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite checkpoint file")
+    parser.add_argument("--es-url", default=os.getenv("ES_URL", "http://localhost:9200"))
+    parser.add_argument("--index", default=os.getenv("ES_INDEX", "classified-logs"))
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--flush-interval", type=float, default=1.0, help="seconds a partial batch may wait")
+    parser.add_argument("--refresh-interval", type=float, default=5.0, help="seconds between scans for new files")
+    parser.add_argument("--rotate-wait", type=float, default=5.0, help="seconds to keep reading a rotated file")
+    parser.add_argument("--read-from-head", action="store_true", help="read files without a checkpoint from the start")
+    parser.add_argument("--once", action="store_true", help="exit after indexing what is there")
+    args = parser.parse_args(argv)
+
+    ingestor = TailIngestor(
+        Elasticsearch(args.es_url), args.index, args.path or [DEFAULT_PATH], args.db,
+        args.batch_size, args.flush_interval, args.read_from_head, args.refresh_interval, args.rotate_wait,
+    )
+    signal.signal(signal.SIGTERM, ingestor.stop)
+    signal.signal(signal.SIGINT, ingestor.stop)
+    stats = ingestor.run(once=args.once)
+    print(f" Stopped: {stats}")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import os, sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_api")))
+
+import pytest
+
+import config
+from tests.es_stub import ElasticsearchStub
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """An Elasticsearch stub the backend is pointed at, without client retries."""
+    with ElasticsearchStub() as stub:
+        monkeypatch.setattr(config, "ES_URL", stub.url)
+        monkeypatch.setattr(config, "ES_MAX_RETRIES", 0)
+        yield stub
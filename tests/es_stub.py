@@ -0,0 +1,319 @@
+"""A tiny in-process HTTP server that stands in for Elasticsearch in tests.
+
+It understands just enough of the REST API for the backend: cluster info,
+index creation with aliases, lifecycle policies and index templates (stored,
+not applied), single-document index, _bulk, point in time and a naive _search
+(match_all or bool filters of term / terms / range, sort, search_after,
+_source includes, terms and date_histogram aggregations). Documents are kept
+in memory per index; ``fail_status`` makes every API call answer with that
+HTTP status so outage handling can be exercised, and ``reject_items`` is a
+list of statuses the next _bulk items answer with instead of being indexed.
+"""
+import functools
+import itertools
+import json
+import socket
+import threading
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.stub.connections.add(self.connection)
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _route(self):
+        stub = self.server.stub
+        body = self._body()
+        path, _, query_string = self.path.partition("?")
+        params = {key: values[-1] for key, values in parse_qs(query_string).items()}
+        parts = [p for p in path.split("/") if p]
+        stub.requests.append((self.command, path))
+
+        if stub.fail_status:
+            return self._reply(stub.fail_status, {"error": "stubbed failure", "status": stub.fail_status})
+
+        if not parts:
+            return self._reply(200, {"name": "es-stub", "version": {"number": "8.13.0"}, "tagline": "You Know, for Search"})
+
+        if parts[0] in ("_ilm", "_index_template") and self.command == "PUT":
+            store = stub.policies if parts[0] == "_ilm" else stub.templates
+            store[parts[-1]] = json.loads(body)
+            return self._reply(200, {"acknowledged": True})
+
+        if parts[0] == "_alias" and len(parts) == 2:
+            found = parts[1] in stub.aliases
+            return self._reply(200 if found else 404, {parts[1]: {}} if found else {"status": 404})
+
+        if len(parts) == 1 and not parts[0].startswith("_") and self.command == "HEAD":
+            return self._reply(200 if parts[0] in stub.docs else 404, {})
+
+        if len(parts) == 1 and not parts[0].startswith("_") and self.command == "PUT":
+            if parts[0] in stub.docs or parts[0] in stub.aliases:
+                return self._reply(400, {"error": {"type": "resource_already_exists_exception"}, "status": 400})
+            stub.create_index(parts[0], (json.loads(body) if body else {}).get("aliases", {}))
+            return self._reply(200, {"acknowledged": True, "index": parts[0]})
+
+        if parts[-1] == "_bulk":
+            return self._reply(200, stub.bulk(body, default_index=parts[0] if len(parts) > 1 else None))
+
+        if parts[-1] == "_pit":
+            if self.command == "DELETE":
+                found = stub.pits.pop(json.loads(body)["id"], None) is not None
+                return self._reply(200, {"succeeded": True, "num_freed": int(found)})
+            return self._reply(200, {"id": stub.open_pit(parts[0])})
+
+        if parts[-1] == "_search":
+            query = json.loads(body) if body else {}
+            if "size" in params:
+                query["size"] = int(params["size"])
+            pit = query.get("pit")
+            if pit and pit["id"] not in stub.pits:
+                return self._reply(404, {"error": {"type": "search_context_missing_exception"}, "status": 404})
+            return self._reply(200, stub.search(parts[0] if len(parts) > 1 else None, query))
+
+        if len(parts) >= 2 and parts[1] in ("_doc", "_create"):
+            doc_id = parts[2] if len(parts) > 2 else None
+            doc_id, result = stub.index(parts[0], json.loads(body), doc_id)
+            return self._reply(201, {"_index": parts[0], "_id": doc_id, "result": result})
+
+        return self._reply(404, {"error": f"no stub route for {self.command} {path}", "status": 404})
+
+    do_GET = do_POST = do_PUT = do_HEAD = do_DELETE = _route
+
+
+class ElasticsearchStub:
+    def __init__(self, host="127.0.0.1", port=0):
+        self.docs = {}
+        self.requests = []
+        self.pits = {}
+        self.aliases = {}  # alias -> write index
+        self.policies = {}
+        self.templates = {}
+        self._seq = itertools.count()
+        self._order = {}  # (index, _id) -> insertion order, the stub's _shard_doc
+        self.fail_status = None
+        self.reject_items = []
+        self.connections = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops listening and drops open keep-alive connections, like a node going away."""
+        self._server.shutdown()
+        self._server.server_close()
+        for connection in list(self.connections):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count(self, index=None):
+        with self._lock:
+            if index is not None:
+                index = self.aliases.get(index, index)
+                return len(self.docs.get(index, {}))
+            return sum(len(docs) for docs in self.docs.values())
+
+    def create_index(self, index, aliases=None):
+        with self._lock:
+            self.docs.setdefault(index, {})
+            for alias in aliases or {}:
+                self.aliases[alias] = index
+
+    def index(self, index, source, doc_id=None):
+        doc_id = doc_id or uuid.uuid4().hex
+        index = self.aliases.get(index, index)
+        with self._lock:
+            docs = self.docs.setdefault(index, {})
+            result = "updated" if doc_id in docs else "created"
+            docs[doc_id] = source
+            self._order.setdefault((index, doc_id), next(self._seq))
+        return doc_id, result
+
+    def bulk(self, body, default_index=None):
+        lines = [line for line in body.splitlines() if line.strip()]
+        items = []
+        i = 0
+        while i < len(lines):
+            action = json.loads(lines[i])
+            op, meta = next(iter(action.items()))
+            index = self.aliases.get(meta.get("_index", default_index), meta.get("_index", default_index))
+            if op == "delete":
+                with self._lock:
+                    self.docs.get(index, {}).pop(meta.get("_id"), None)
+                items.append({op: {"_index": index, "_id": meta.get("_id"), "status": 200}})
+                i += 1
+                continue
+            source = json.loads(lines[i + 1])
+            doc_id = meta.get("_id")
+            if self.reject_items:
+                status = self.reject_items.pop(0)
+                items.append({op: {"_index": index, "_id": doc_id, "status": status,
+                                   "error": {"type": "stubbed_rejection"}}})
+            elif op == "create" and doc_id and doc_id in self.docs.get(index, {}):
+                items.append({op: {"_index": index, "_id": doc_id, "status": 409,
+                                   "error": {"type": "version_conflict_engine_exception"}}})
+            else:
+                doc_id, result = self.index(index, source, doc_id)
+                items.append({op: {"_index": index, "_id": doc_id, "status": 201, "result": result}})
+            i += 2
+        errors = any(item[next(iter(item))]["status"] >= 300 for item in items)
+        return {"took": 1, "errors": errors, "items": items}
+
+    def _hits(self, index):
+        index = self.aliases.get(index, index)  # the stub never rolls over, so an alias is its one index
+        with self._lock:
+            return [
+                {"_index": name, "_id": doc_id, "_source": source, "_seq": self._order[(name, doc_id)]}
+                for name, docs in self.docs.items()
+                if name == index or (index.endswith("*") and name.startswith(index[:-1]))
+                for doc_id, source in docs.items()
+            ]
+
+    def open_pit(self, index):
+        pit_id = uuid.uuid4().hex
+        self.pits[pit_id] = self._hits(index)  # frozen view
+        return pit_id
+
+    @staticmethod
+    def _matches(source, query):
+        if not query or "match_all" in query:
+            return True
+        for clause in query["bool"].get("filter", []):
+            kind, spec = next(iter(clause.items()))
+            field, value = next(iter(spec.items()))
+            actual = source.get(field.removesuffix(".keyword"))
+            if kind == "term" and actual != value:
+                return False
+            if kind == "terms" and actual not in value:
+                return False
+            if kind == "range":
+                text = str(actual or "")
+                if not actual or ("gte" in value and text < value["gte"]) or ("lte" in value and text > value["lte"]):
+                    return False
+        return True
+
+    def search(self, index, query):
+        pit = query.get("pit")
+        hits = list(self.pits[pit["id"]]) if pit else self._hits(index)
+        hits = [hit for hit in hits if self._matches(hit["_source"], query.get("query"))]
+
+        clauses = []
+        for clause in query.get("sort", []):
+            field, order = next(iter(clause.items()))
+            clauses.append((field, (order.get("order") if isinstance(order, dict) else order) == "desc"))
+        for hit in hits:
+            hit["sort"] = [hit["_seq"] if field == "_shard_doc" else str(hit["_source"].get(field, ""))
+                           for field, _ in clauses]
+
+        def compare(a, b):
+            for x, y, (_, desc) in zip(a, b, clauses):
+                if x != y:
+                    return (-1 if x < y else 1) * (-1 if desc else 1)
+            return 0
+
+        hits.sort(key=functools.cmp_to_key(lambda a, b: compare(a["sort"], b["sort"])))
+        if "search_after" in query:
+            hits = [hit for hit in hits if compare(hit["sort"], query["search_after"]) > 0]
+
+        includes = (query.get("_source") or {}).get("includes") if isinstance(query.get("_source"), dict) else None
+        size = query.get("size", 10)
+        page = []
+        for hit in hits[:size]:
+            hit = {key: value for key, value in hit.items() if key != "_seq" and (clauses or key != "sort")}
+            if includes is not None:
+                hit["_source"] = {key: value for key, value in hit["_source"].items() if key in includes}
+            page.append(hit)
+        response = {
+            "took": 1,
+            "timed_out": False,
+            "hits": {"total": {"value": len(hits), "relation": "eq"}, "hits": page},
+        }
+        if pit:
+            response["pit_id"] = pit["id"]
+        if query.get("aggs"):
+            response["aggregations"] = self._aggregate([hit["_source"] for hit in hits], query["aggs"])
+        return response
+
+    UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+    @classmethod
+    def _aggregate(cls, sources, aggs):
+        result = {}
+        for name, spec in aggs.items():
+            sub = spec.get("aggs")
+            if "terms" in spec:
+                field = spec["terms"]["field"].removesuffix(".keyword")
+                groups = {}
+                for source in sources:
+                    if source.get(field) is not None:
+                        groups.setdefault(source[field], []).append(source)
+                ranked = sorted(groups.items(), key=lambda item: (-len(item[1]), str(item[0])))
+                buckets = ranked[:spec["terms"].get("size", 10)]
+            elif "date_histogram" in spec:
+                interval = spec["date_histogram"]["fixed_interval"]
+                step = int(interval[:-1]) * cls.UNITS[interval[-1]] * 1000
+                groups = {}
+                for source in sources:
+                    when = datetime.fromisoformat(source["timestamp"])
+                    if when.tzinfo is None:
+                        when = when.replace(tzinfo=timezone.utc)
+                    key = int(when.timestamp() * 1000) // step * step
+                    groups.setdefault(key, []).append(source)
+                keys = range(min(groups), max(groups) + step, step) if groups else []
+                buckets = [(key, groups.get(key, [])) for key in keys]
+            else:
+                raise ValueError(f"unsupported aggregation: {spec}")
+
+            out = []
+            for key, members in buckets:
+                bucket = {"key": key, "doc_count": len(members)}
+                if "date_histogram" in spec:
+                    bucket["key_as_string"] = datetime.fromtimestamp(key / 1000, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+                if sub:
+                    bucket.update(cls._aggregate(members, sub))
+                out.append(bucket)
+            result[name] = {"buckets": out}
+        return result
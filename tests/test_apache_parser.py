@@ -14,3 +14,9 @@ def test_apache_parser_invalid_line():
     result = parser.parse(line)
     assert result is None
 
+
+def test_apache_parser_user():
+    parser = ApacheParser()
+    line = '127.0.0.1 - {} [10/Jun/2025:13:55:36 +0000] "GET /index.html HTTP/1.1" 200 2326'
+    assert "user" not in parser.parse(line.format("-"))
+    assert parser.parse(line.format("alice"))["user"] == "alice"
@@ -0,0 +1,81 @@
+import os, sys
+import asyncio
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_api")))
+
+import pytest
+
+from broadcast import UnixSocketBroadcast, create_backend
+from websocket_manager import ConnectionManager
+from tests.test_websocket_manager import FakeWebSocket, ANOMALY, NORMAL
+
+
+async def worker(path):
+    """One uvicorn worker's manager, sharing records over the socket."""
+    manager = ConnectionManager(window=0.01)
+    manager.backend = UnixSocketBroadcast(manager, path, window=0.01)
+    await manager.backend.start()
+    return manager
+
+
+async def eventually(condition, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+def test_every_worker_sees_records_classified_by_the_others(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "broadcast.sock")
+        quiet, dashboard, anomalies = [await worker(path) for _ in range(3)]
+        dashboard_ws, anomalies_ws = FakeWebSocket(), FakeWebSocket()
+        await dashboard.connect(dashboard_ws)
+        await anomalies.connect(anomalies_ws)
+        anomalies.subscribe(anomalies_ws, {"prediction": "anomaly"})
+        assert await eventually(lambda: quiet.backend.peers == 2)
+
+        quiet.broadcast(NORMAL)
+        quiet.broadcast(ANOMALY)
+        dashboard.broadcast(ANOMALY)
+        assert await eventually(lambda: len(dashboard_ws.received) == 3 and len(anomalies_ws.received) == 2)
+        stats = [manager.backend.stats() for manager in (quiet, dashboard, anomalies)]
+
+        for manager, websocket in ((dashboard, dashboard_ws), (anomalies, anomalies_ws)):
+            manager.disconnect(websocket)
+        for manager in (quiet, dashboard, anomalies):
+            await manager.backend.stop()
+        return dashboard_ws, anomalies_ws, stats
+
+    dashboard_ws, anomalies_ws, stats = asyncio.run(scenario())
+    assert sorted(record["prediction"] for record in dashboard_ws.received) == ["anomaly", "anomaly", "normal"]
+    assert anomalies_ws.received == [ANOMALY, ANOMALY]
+    assert [s["hub"] for s in stats] == [True, False, False]
+    assert stats[1]["received"] == 2  # its own record went straight to its clients
+
+
+def test_another_worker_takes_over_when_the_hub_exits(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "broadcast.sock")
+        hub, publisher, dashboard = [await worker(path) for _ in range(3)]
+        websocket = FakeWebSocket()
+        await dashboard.connect(websocket)
+        assert await eventually(lambda: publisher.backend.peers == 1)
+
+        await hub.backend.stop()
+        assert await eventually(lambda: publisher.backend.peers == 1 and (
+            publisher.backend.hub is not None or dashboard.backend.hub is not None))
+        publisher.broadcast(ANOMALY)
+        assert await eventually(lambda: websocket.received == [ANOMALY])
+
+        dashboard.disconnect(websocket)
+        for manager in (publisher, dashboard):
+            await manager.backend.stop()
+
+    asyncio.run(scenario())
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_backend("redis", ConnectionManager())
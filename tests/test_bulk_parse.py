@@ -0,0 +1,47 @@
+import os, sys
+import gzip
+import types
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from parser.log_parser import parse_log_file
+from scripts.bulk_parse import main, split_offsets
+
+LINES = [f"Dec 10 06:55:{i % 60:02d} LabSZ sshd[{i}]: Invalid user admin{i} from 10.0.0.{i % 250}\n" for i in range(200)]
+
+
+def test_parse_log_file_is_lazy_and_reads_gzip(tmp_path):
+    plain = tmp_path / "auth.log"
+    plain.write_text("".join(LINES))
+    compressed = tmp_path / "auth.log.gz"
+    with gzip.open(compressed, "wt") as f:
+        f.write("".join(LINES))
+
+    parsed = parse_log_file(plain, "syslog")
+    assert isinstance(parsed, types.GeneratorType)
+    assert list(parsed) == list(parse_log_file(compressed, "syslog"))
+
+
+def test_split_offsets_are_line_aligned_and_cover_the_file(tmp_path):
+    plain = tmp_path / "auth.log"
+    plain.write_text("".join(LINES))
+
+    ranges = split_offsets(plain, chunk_bytes=1000)
+    assert len(ranges) > 1
+    assert ranges[0][0] == 0 and ranges[-1][1] == plain.stat().st_size
+
+    chunks = [list(parse_log_file(plain, "syslog", start=start, end=end)) for start, end in ranges]
+    assert [entry for chunk in chunks for entry in chunk] == list(parse_log_file(plain, "syslog"))
+
+
+def test_parallel_bulk_parse_matches_serial(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "OpenSSH_test.log").write_text("".join(LINES))
+
+    main(["--workers", "2", "--chunk-mb", "0.001", "--data-dir", str(data), "--output-dir", str(tmp_path / "parallel")])
+    main(["--workers", "1", "--data-dir", str(data), "--output-dir", str(tmp_path / "serial")])
+
+    parallel = (tmp_path / "parallel" / "OpenSSH_test.json").read_text()
+    assert parallel == (tmp_path / "serial" / "OpenSSH_test.json").read_text()
+    assert len(parallel.splitlines()) == len(LINES)
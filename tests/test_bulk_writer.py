@@ -0,0 +1,33 @@
+import os, sys
+import asyncio
+import io
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_api")))
+
+from bulk_writer import iter_upload_lines, iter_batches
+
+
+class FakeUpload:
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+
+    async def read(self, size):
+        return self.stream.read(size)
+
+
+async def collect(aiter):
+    return [item async for item in aiter]
+
+
+def test_lines_are_split_across_chunk_boundaries():
+    data = "first line\r\nsécond line\n\nlast line without newline".encode("utf-8")
+    lines = asyncio.run(collect(iter_upload_lines(FakeUpload(data), chunk_size=3)))
+    assert lines == ["first line", "sécond line", "", "last line without newline"]
+
+
+def test_batches_keep_order_and_flush_remainder():
+    async def numbers():
+        for i in range(7):
+            yield i
+
+    assert asyncio.run(collect(iter_batches(numbers(), 3))) == [[0, 1, 2], [3, 4, 5], [6]]
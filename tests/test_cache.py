@@ -0,0 +1,51 @@
+import os, sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+from ml_pipeline import infer
+from ml_pipeline.cache import InferenceCache, mask_template
+
+BATCH = [
+    {"raw": f"Failed password for invalid user admin from 10.0.0.{i} port {4000 + i} ssh2", "timestamp": "2025-06-16T03:10:00"}
+    for i in range(20)
+]
+
+
+def test_mask_template():
+    assert mask_template("Failed password for root from 173.234.31.186 port 38926 ssh2") == \
+        "Failed password for root from <IP> port <NUM> ssh<NUM>"
+    assert mask_template("worker deadbeef01 exited with 0x1f") == "worker <HEX> exited with <HEX>"
+
+
+def test_lru_eviction_and_ttl():
+    cache = InferenceCache(max_size=2, ttl=0.05)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # evicts b, the least recently used
+    assert cache.get("b") is None
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        InferenceCache(mode="raw")
+
+
+@pytest.mark.parametrize("mode", ["features", "template"])
+def test_cached_predictions_match_the_model(monkeypatch, mode):
+    monkeypatch.setattr(infer, "cache", None)
+    expected = infer.infer_logs(BATCH)
+
+    monkeypatch.setattr(infer, "cache", InferenceCache(max_size=100, mode=mode))
+    assert infer.infer_logs(BATCH) == expected
+    assert infer.infer_logs(BATCH) == expected
+
+    stats = infer.cache_stats()
+    assert stats["hits"] >= len(BATCH)
+    assert stats["size"] <= 100
@@ -0,0 +1,47 @@
+import os, sys
+import subprocess
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+from joblib import load
+
+from ml_pipeline.compact_model import COMPACT_MODEL_PATH, JOBLIB_MODEL_PATH, CompactGradientBoosting, export_gradient_boosting
+from ml_pipeline.features import FEATURE_COLUMNS
+
+
+def random_features(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(0, 500, n), rng.integers(0, 2, n), rng.integers(-1, 24, n),
+        *[rng.integers(0, 2, n) for _ in range(5)],
+    ]).astype(np.int64)
+
+
+def test_compact_matches_sklearn(tmp_path):
+    model = load(JOBLIB_MODEL_PATH)
+    compact = CompactGradientBoosting.load(export_gradient_boosting(model, tmp_path / "model.npz"))
+    X = random_features(5000)
+    frame = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+
+    assert np.array_equal(compact.raw_predict(X), model.decision_function(frame))
+    assert list(compact.predict(X)) == list(model.predict(frame))
+    assert len(compact.predict(X[:0])) == 0
+
+
+def test_shipped_artifact_is_current():
+    model = load(JOBLIB_MODEL_PATH)
+    X = random_features(1000, seed=1)
+    shipped = CompactGradientBoosting.load(COMPACT_MODEL_PATH)
+    assert list(shipped.predict(X)) == list(model.predict(pd.DataFrame(X, columns=FEATURE_COLUMNS)))
+
+
+def test_infer_import_is_lazy():
+    code = (
+        "import sys; from ml_pipeline import infer; "
+        "assert not infer.models; assert 'pandas' not in sys.modules and 'sklearn' not in sys.modules; "
+        "infer.warm_up(); assert infer.models"
+    )
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    subprocess.run([sys.executable, "-c", code], cwd=root, check=True)
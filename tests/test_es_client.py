@@ -0,0 +1,43 @@
+import os, sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_api")))
+
+from fastapi.testclient import TestClient
+
+import config
+import main
+
+
+def test_ingest_and_logs_round_trip(stub):
+    with TestClient(main.app) as client:
+        res = client.post("/ingest", json={"raw": "Too many connections from 10.0.0.1"})
+        assert res.status_code == 200
+        assert res.json()["status"] == "received"
+
+        res = client.get("/logs", params={"size": 5})
+        assert [doc["raw"] for doc in res.json()] == ["Too many connections from 10.0.0.1"]
+
+    assert stub.count(config.ES_INDEX) == 1
+
+
+def test_upload_bulk_indexes_every_line(stub):
+    data = b"Failed password for root from 10.0.0.5\n\nConnection closed by 10.0.0.6 port 22\n"
+    with TestClient(main.app) as client:
+        startup = len(stub.requests)  # index template setup
+        res = client.post("/upload", files={"file": ("auth.log", data)})
+
+    body = res.json()
+    assert body["status"] == "uploaded"
+    assert (body["lines"], body["skipped"], body["indexed"], body["errors"]) == (3, 1, 2, 0)
+    assert stub.count(config.ES_INDEX) == 2
+    assert [path for _, path in stub.requests[startup:]] == ["/_bulk"]
+
+
+def test_upload_reports_failure_when_es_is_unavailable(stub):
+    stub.fail_status = 503
+    with TestClient(main.app) as client:
+        res = client.post("/upload", files={"file": ("auth.log", b"Failed password for root\n")})
+
+    body = res.json()
+    assert body["indexed"] == 0
+    assert body["errors"] == 1
@@ -0,0 +1,36 @@
+import os, sys
+import asyncio
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+from ml_pipeline.executor import InferenceExecutor
+from ml_pipeline.infer import infer_logs
+
+BATCH = [
+    {"raw": "Too many connections from 10.0.0.1", "timestamp": "2025-06-16T10:20:00"},
+    {"raw": "Failed password for invalid user root from 10.0.0.5 port 22 ssh2", "timestamp": "2025-06-16T03:10:00"},
+    {"raw": "User alice logged in successfully", "timestamp": "2025-06-16T12:00:00"},
+] * 5
+
+
+@pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+def test_modes_match_infer_logs(mode):
+    executor = InferenceExecutor(mode, workers=2, chunk_size=4)
+    try:
+        executor.warm_up()
+        results = asyncio.run(executor.infer(BATCH))
+        stats = executor.stats()
+    finally:
+        executor.shutdown()
+
+    assert results == infer_logs(BATCH)
+    assert stats["records"] == len(BATCH)
+    assert sum(worker["records"] for worker in stats["per_worker"].values()) == len(BATCH)
+    assert all(0 <= worker["utilization"] for worker in stats["per_worker"].values())
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        InferenceExecutor("gpu")
@@ -0,0 +1,98 @@
+import gzip
+import os, sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from ml_pipeline.feature_store import FeatureStore
+from ml_pipeline.features import FEATURE_COLUMNS, feature_vector
+from ml_pipeline.parallel_features import ISOLATION_COLUMNS, extract_jsonl, open_matrix
+from ml_pipeline.train_isolation import log_files
+
+LINES = [
+    "Dec 10 06:55:46 LabSZ sshd[24200]: Failed password for invalid user admin from 183.62.140.253 port 22 ssh2\n",
+    "Dec 10 07:02:11 LabSZ sshd[24201]: Accepted password for fztu from 10.0.0.5 port 52311 ssh2\n",
+    "Dec 10 09:13:03 LabSZ CRON[1100]: pam_unix(cron:session): session opened\n",
+]
+
+
+def test_append_stores_features_and_fields(tmp_path):
+    log = tmp_path / "auth.log"
+    log.write_text("".join(LINES))
+    store = FeatureStore(str(tmp_path / "store"))
+
+    assert store.append([str(log)], workers=1) == 3
+    X = store.matrix()
+    assert X.tolist() == [list(feature_vector(line.strip(), line[:15], default_hour=-1)) for line in LINES]
+    assert list(store.strings("raw")) == [line.strip() for line in LINES]
+    assert list(store.strings("src_ip")) == ["183.62.140.253", "10.0.0.5", ""]
+    assert list(store.strings("user")) == ["admin", "fztu", ""]
+    assert store.strings("service")[2] == "CRON"
+    assert store.column("offset").tolist() == [0, len(LINES[0]), len(LINES[0]) + len(LINES[1])]
+
+
+def test_append_is_incremental_and_resumes(tmp_path):
+    log = tmp_path / "auth.log"
+    log.write_text(LINES[0] + LINES[1][:20])  # second line still being written
+    path = str(tmp_path / "store")
+
+    assert FeatureStore(path).append([str(log)], workers=1) == 1
+    with open(log, "a") as f:
+        f.write(LINES[1][20:] + LINES[2])
+
+    store = FeatureStore(path)
+    assert store.append([str(log)], workers=1) == 2
+    assert store.append([str(log)], workers=1) == 0
+    assert list(store.strings("raw")) == [line.strip() for line in LINES]
+
+    # Rotated: a new file under the same name is read from the start
+    os.remove(log)
+    log.write_text(LINES[2])
+    assert store.append([str(log)], workers=1) == 1
+    assert len(store.sources()) == 2
+
+
+def test_compressed_files_are_read_once(tmp_path):
+    archive = tmp_path / "auth.log.1.gz"
+    with gzip.open(archive, "wt") as f:
+        f.write("".join(LINES))
+    store = FeatureStore(str(tmp_path / "store"))
+
+    assert store.append([str(archive)], workers=1) == 3
+    assert store.append([str(archive)], workers=1) == 0
+    assert len(store.sources()) == 1
+
+
+def test_compact_and_interrupted_segments(tmp_path):
+    logs = []
+    for i, line in enumerate(LINES):
+        logs.append(tmp_path / f"{i}.log")
+        logs[-1].write_text(line * 50)
+    path = str(tmp_path / "store")
+    store = FeatureStore(path)
+    store.append([str(p) for p in logs], chunk_bytes=1000, workers=2)
+    before = store.matrix(), list(store.strings("raw")), store.column("source").tolist()
+
+    assert store.stats()["segments"] > 3
+    store.compact()
+    assert store.stats()["segments"] == 1
+    assert np.array_equal(store.matrix(), before[0])
+    assert list(store.strings("raw")) == before[1]
+    assert store.column("source").tolist() == before[2]
+
+    os.makedirs(os.path.join(path, "seg-999999.tmp"))
+    assert len(FeatureStore(path)) == 150
+    assert not os.path.exists(os.path.join(path, "seg-999999.tmp"))
+
+
+def test_matches_isolation_extraction(tmp_path):
+    paths = log_files("data/parsed_logs")
+    store = FeatureStore(str(tmp_path / "store"))
+    store.append(paths, chunk_bytes=64 * 1024, workers=2)
+    extract_jsonl(paths, tmp_path / "matrix", workers=1)
+    X, _, _ = open_matrix(tmp_path / "matrix")
+
+    valid = np.flatnonzero(store.column("hour") >= 0)
+    assert np.array_equal(store.matrix(ISOLATION_COLUMNS, valid), X)
+    assert store.matrix(FEATURE_COLUMNS).shape == (len(store), len(FEATURE_COLUMNS))
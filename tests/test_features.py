@@ -0,0 +1,28 @@
+import os, sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ml_pipeline.features import FEATURE_COLUMNS, extract_features_frame, feature_vector
+
+RAWS = [
+    "Dec 10 06:55:46 LabSZ sshd[24200]: Invalid user webmaster from 173.234.31.186",
+    "Failed password for invalid user root from 10.0.0.5 port 22 ssh2",
+    "Suspicious port SCAN detected; maliciouscan CONNECTION refused",
+    "version 1.2.3 released",
+    "",
+]
+TIMESTAMPS = ["2025-06-16T03:10:00", "Dec 10 06:55:46", None, "2025-06-16T23:10:00+05:00", "garbage"]
+
+def test_scalar_and_vectorized_paths_are_byte_identical():
+    rows = [feature_vector(raw, ts, default_hour=-1) for raw, ts in zip(RAWS, TIMESTAMPS)]
+    frame = extract_features_frame(pd.Series(RAWS), pd.Series(TIMESTAMPS))
+
+    assert list(frame.columns) == FEATURE_COLUMNS
+    assert np.array(rows, dtype=np.int64).tobytes() == frame.to_numpy(np.int64).tobytes()
+
+def test_feature_values():
+    length, contains_ip, hour, failed, connection, invalid, malicious, scan = feature_vector(RAWS[2], None, default_hour=-1)
+    assert (contains_ip, hour, failed, connection, invalid, malicious, scan) == (0, -1, 0, 1, 0, 1, 1)
+    assert feature_vector(RAWS[3], None, default_hour=-1)[1] == 0
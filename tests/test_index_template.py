@@ -0,0 +1,73 @@
+import os, sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_api")))
+
+from fastapi.testclient import TestClient
+
+import config
+import main
+
+SYSLOG = (
+    b"Dec 10 06:55:46 web sshd[24200]: Failed password for invalid user admin from 10.0.0.5 port 22 ssh2\n"
+    b"Dec 10 06:55:48 web sshd[24202]: Ping received from 10.0.0.7\n"
+)
+
+
+def test_startup_installs_template_and_write_alias(stub):
+    with TestClient(main.app) as client:
+        assert main.app.state.keyword_suffix == ""
+        client.post("/ingest/batch", content=b'{"raw": "Too many connections from 10.0.0.9"}\n')
+
+    template = stub.templates[config.ES_INDEX]
+    assert template["index_patterns"] == [f"{config.ES_INDEX}-*"]
+    mappings = template["template"]["mappings"]["properties"]
+    assert mappings["timestamp"]["type"] == "date"
+    assert mappings["threat_type"] == {"type": "keyword"}
+    assert mappings["raw"] == {"type": "match_only_text"}
+    assert "rollover" in stub.policies[config.ES_INDEX]["policy"]["phases"]["hot"]["actions"]
+    assert stub.aliases == {config.ES_INDEX: f"{config.ES_INDEX}-000001"}
+    assert stub.count(f"{config.ES_INDEX}-000001") == 1
+
+
+def test_upload_extracts_fields_and_drops_replays(stub):
+    with TestClient(main.app) as client:
+        first = client.post("/upload", files={"file": ("auth.log", SYSLOG)}).json()
+        again = client.post("/upload", files={"file": ("auth.log", SYSLOG)}).json()
+        hits = client.get("/logs/search", params={"src_ip": "10.0.0.5"}).json()["hits"]
+
+    assert (first["indexed"], first["duplicates"]) == (2, 0)
+    assert (again["indexed"], again["duplicates"], again["errors"]) == (0, 2, 0)
+    assert stub.count(config.ES_INDEX) == 2
+    (hit,) = hits
+    assert (hit["service"], hit["user"], hit["source"]) == ("sshd", "admin", "auth.log")
+
+
+def test_upload_keys_cover_the_preceding_content(stub):
+    other = b"Dec 11 07:00:00 web sshd[1]: Accepted password for bob from 10.0.0.6 port 22 ssh2\n" + SYSLOG.splitlines(True)[1]
+    with TestClient(main.app) as client:
+        client.post("/upload", files={"file": ("auth.log", SYSLOG)})
+        # Same name, same second line at the same position, different file
+        replaced = client.post("/upload", files={"file": ("auth.log", other)}).json()
+        grown = client.post("/upload", files={"file": ("auth.log", SYSLOG + b"Ping received from 10.0.0.8\n")}).json()
+
+    assert (replaced["indexed"], replaced["duplicates"]) == (2, 0)
+    assert (grown["indexed"], grown["duplicates"]) == (1, 2)
+    assert stub.count(config.ES_INDEX) == 5
+
+
+def test_batch_replays_with_the_same_timestamp_are_dropped(stub):
+    body = b'{"raw": "Ping received from 10.0.0.7", "timestamp": "2024-05-01T10:00:00"}\n'
+    with TestClient(main.app) as client:
+        client.post("/ingest/batch", content=body)
+        client.post("/ingest/batch", content=body)
+        client.post("/ingest/batch", content=body.replace(b"10:00:00", b"10:00:01"))
+    assert stub.count(config.ES_INDEX) == 2
+
+
+def test_existing_plain_index_is_left_alone(stub):
+    stub.index(config.ES_INDEX, {"raw": "old", "timestamp": "2024-05-01T10:00:00"})
+    with TestClient(main.app) as client:
+        assert main.app.state.keyword_suffix == ".keyword"
+        client.post("/ingest/batch", content=b'{"raw": "Ping received from 10.0.0.7"}\n')
+    assert stub.aliases == {}
+    assert stub.count(config.ES_INDEX) == 2
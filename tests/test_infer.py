@@ -6,3 +6,27 @@ from ml_pipeline.infer import infer_log
 print(infer_log({"raw": "Too many connections from 10.0.0.1"}))  # should be 'dos_attack'
 
 
+
+from ml_pipeline.infer import infer_logs
+
+def test_infer_logs_matches_infer_log():
+    batch = [
+        {"raw": "Too many connections from 10.0.0.1", "timestamp": "2025-06-16T10:20:00"},
+        {"raw": "Jun 14 15:16:02 combo sshd(pam_unix)[19937]: check pass; user unknown"},
+        {"raw": "Failed password for invalid user root from 10.0.0.5 port 22 ssh2", "timestamp": "2025-06-16T03:10:00"},
+        {"raw": "", "timestamp": "not a timestamp-but-stable"},
+    ]
+    assert infer_logs(batch) == [infer_log(log) for log in batch]
+
+def test_infer_logs_empty_batch():
+    assert infer_logs([]) == []
+
+
+def test_one_bad_log_does_not_cost_the_batch():
+    from ml_pipeline.infer import infer_logs_isolated
+
+    good = [{"raw": "Too many connections from 10.0.0.1"}, {"raw": "Ping received from 10.0.0.7"}]
+    bad = {"raw": None}
+    records, failures = infer_logs_isolated([good[0], bad, good[1]])
+    assert [record["raw"] for record in records] == [log["raw"] for log in good]
+    assert [log for log, _ in failures] == [bad]
@@ -0,0 +1,105 @@
+import os, sys
+import asyncio
+import json
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_api")))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import config
+import main
+from ingest_queue import IngestQueue
+
+
+def test_single_events_are_coalesced_into_batches():
+    batches = []
+
+    async def handle_batch(logs):
+        batches.append(len(logs))
+        return [{"n": log["n"]} for log in logs]
+
+    async def scenario():
+        queue = IngestQueue(handle_batch, max_size=100, max_batch=4, max_latency=0.05)
+        queue.start()
+        futures = [queue.submit({"n": i}) for i in range(10)]
+        results = await asyncio.gather(*futures)
+        await queue.stop()
+        return results, queue.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert [r["n"] for r in results] == list(range(10))
+    assert batches == [4, 4, 2]
+    assert stats["processed"] == 10 and stats["depth"] == 0
+
+
+def test_full_queue_rejects():
+    async def scenario():
+        queue = IngestQueue(None, max_size=2)
+        queue.submit({})
+        queue.submit({})
+        with pytest.raises(asyncio.QueueFull):
+            queue.submit({})
+        return queue.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["accepted"], stats["rejected"], stats["depth"]) == (2, 1, 2)
+
+
+def test_a_failed_event_fails_only_its_own_request():
+    async def handle_batch(logs):
+        return [ValueError("rejected") if log["n"] == 1 else {"n": log["n"]} for log in logs]
+
+    async def scenario():
+        queue = IngestQueue(handle_batch, max_batch=3)
+        queue.start()
+        results = await asyncio.gather(*[queue.submit({"n": i}) for i in range(3)], return_exceptions=True)
+        await queue.stop()
+        return results, queue.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert results[0] == {"n": 0} and isinstance(results[1], ValueError) and results[2] == {"n": 2}
+    assert (stats["processed"], stats["failed"]) == (2, 1)
+
+
+def test_ingest_batch_accepts_ndjson(stub):
+    body = "\n".join([
+        json.dumps({"raw": "Too many connections from 10.0.0.1"}),
+        "not json",
+        json.dumps({"raw": "User alice logged in successfully"}),
+    ])
+    with TestClient(main.app) as client:
+        res = client.post("/ingest/batch", content=body, headers={"Content-Type": "application/x-ndjson"})
+        assert res.json()["received"] == 2
+        assert res.json()["invalid"] == 1
+
+        res = client.post("/ingest", json={"raw": "Suspicious port scan detected from 10.0.0.7"})
+        assert res.json()["status"] == "received"
+        assert client.get("/ingest/stats").json()["processed"] == 1
+
+    assert stub.count(config.ES_INDEX) == 3
+
+
+def test_malformed_events_are_rejected_at_the_boundary(stub):
+    with TestClient(main.app) as client:
+        assert client.post("/ingest", json={"raw": 12345}).status_code == 400
+        assert client.post("/ingest", json={"raw": "Ping from 10.0.0.1", "source": ["a.log"]}).status_code == 400
+        body = "\n".join(json.dumps(log) for log in (
+            {"raw": 12345}, {"raw": "Ping from 10.0.0.1", "source": {}}, {"raw": "Ping from 10.0.0.2"}))
+        res = client.post("/ingest/batch", content=body).json()
+        assert (res["received"], res["invalid"], res["indexed"]) == (1, 2, 1)
+
+
+def test_elasticsearch_failures_are_reported(stub):
+    with TestClient(main.app) as client:
+        stub.fail_status = 503
+        res = client.post("/ingest", json={"raw": "Too many connections from 10.0.0.1"})
+        assert res.status_code == 503 and res.headers["Retry-After"]
+        assert res.json()["status"] == "failed"
+
+        body = b'{"raw": "Ping received from 10.0.0.7"}\n{"raw": "Ping received from 10.0.0.8"}\n'
+        res = client.post("/ingest/batch", content=body)
+        assert res.status_code == 503
+        assert (res.json()["indexed"], res.json()["errors"]) == (0, 2)
+        stub.fail_status = None
+    assert stub.count(config.ES_INDEX) == 0
@@ -0,0 +1,11 @@
+from parser.json_parser import JSONParser
+
+def test_json_parser_valid_line():
+    result = JSONParser().parse('{"timestamp": "2025-06-16T18:10:23", "message": "Failed login"}')
+    assert result == {"timestamp": "2025-06-16T18:10:23", "message": "Failed login"}
+
+def test_json_parser_rejects_non_objects():
+    parser = JSONParser()
+    assert parser.parse("[1, 2, 3]") is None
+    assert parser.parse("{not json") is None
+    assert parser.parse("Jun 14 15:16:01 combo kernel: hello") is None
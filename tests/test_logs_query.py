@@ -0,0 +1,94 @@
+import os, sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_api")))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import config
+import main
+from log_queries import build_query
+
+THREATS = ["normal", "brute_force", "port_scan", "normal"]
+
+
+@pytest.fixture
+def client(stub):
+    for i in range(10):
+        threat = THREATS[i % len(THREATS)]
+        stub.index(config.ES_INDEX, {
+            "raw": f"line {i}",
+            "timestamp": f"2024-05-01T10:00:{i // 2:02d}",  # pairs share a timestamp
+            "prediction": "normal" if threat == "normal" else "anomaly",
+            "threat_type": threat,
+            "src_ip": f"10.0.0.{i % 3}",
+        })
+    with TestClient(main.app) as client:
+        client.stub = stub
+        yield client
+
+
+def pages(client, **params):
+    out, cursor = [], None
+    while True:
+        res = client.get("/logs/search", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert res.status_code == 200
+        body = res.json()
+        out.append(body["hits"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return out
+
+
+def test_cursor_walks_every_document_once_newest_first(client):
+    result = pages(client, size=3)
+    assert [len(page) for page in result] == [3, 3, 3, 1]
+    timestamps = [hit["timestamp"] for page in result for hit in page]
+    assert timestamps == sorted(timestamps, reverse=True)
+    assert sorted(hit["raw"] for page in result for hit in page) == sorted(f"line {i}" for i in range(10))
+    assert client.stub.pits == {}  # closed after the last page
+
+
+def test_point_in_time_is_closed_whenever_no_cursor_is_returned(client):
+    body = client.get("/logs/search", params={"size": 10}).json()
+    assert len(body["hits"]) == 10 and body["next_cursor"] is None
+    assert client.stub.pits == {}  # a full page that holds everything is the last one
+
+    body = client.get("/logs/search", params={"size": 9}).json()
+    assert body["next_cursor"] is not None and len(client.stub.pits) == 1
+
+
+def test_filters_and_projection(client):
+    (hits,) = pages(client, size=50, prediction="anomaly", fields="raw,threat_type")
+    assert {hit["threat_type"] for hit in hits} == {"brute_force", "port_scan"}
+    assert all(set(hit) == {"raw", "threat_type"} for hit in hits)
+
+    (hits,) = pages(client, threat_type="port_scan,brute_force", src_ip="10.0.0.2",
+                    start="2024-05-01T10:00:01", end="2024-05-01T10:00:03")
+    assert [hit["raw"] for hit in hits] == ["line 5", "line 2"]
+
+
+def test_terms_filters_follow_the_index_mapping():
+    assert build_query(src_ip=["10.0.0.2"]) == {"bool": {"filter": [{"terms": {"src_ip.keyword": ["10.0.0.2"]}}]}}
+    assert build_query(src_ip=["10.0.0.2"], keyword_suffix="") == {"bool": {"filter": [{"terms": {"src_ip": ["10.0.0.2"]}}]}}
+
+
+def test_bad_and_expired_cursors(client):
+    assert client.get("/logs/search", params={"cursor": "nope"}).status_code == 400
+
+    body = client.get("/logs/search", params={"size": 2}).json()
+    client.stub.pits.clear()
+    res = client.get("/logs/search", params={"cursor": body["next_cursor"]})
+    assert res.status_code == 400
+    assert "expired" in res.json()["error"]
+
+
+def test_repeated_queries_are_served_from_cache(client):
+    first = client.get("/logs/search", params={"size": 5, "prediction": "normal"}).json()
+    searches = len(client.stub.requests)
+    assert client.get("/logs/search", params={"size": 5, "prediction": "normal"}).json() == first
+    assert client.get("/logs", params={"size": 5}).json() == client.get("/logs", params={"size": 5}).json()
+    assert len(client.stub.requests) == searches + 1  # just the first /logs
+
+    stats = client.get("/logs/cache").json()
+    assert stats["hits"] == 2 and stats["misses"] == 2
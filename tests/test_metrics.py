@@ -0,0 +1,77 @@
+import os, sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_api")))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import config
+import main
+import metrics
+
+
+@pytest.fixture
+def client(stub):
+    with TestClient(main.app) as client:
+        yield client
+
+
+def sample(text, name):
+    """The value of one exposition line, e.g. sample(text, 'x_count{stage="parse"}')."""
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_histogram_and_counter_exposition():
+    histogram = metrics.Histogram("h_seconds", "help", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "parse")
+    counter = metrics.Counter("c_total", "help", ["label"])
+    counter.inc(2, 'say "hi"')
+    lines = {name + labels: value for name, labels, value in histogram.samples()}
+    lines.update({name + labels: value for name, labels, value in counter.samples()})
+
+    assert lines['h_seconds_bucket{stage="parse",le="0.1"}'] == 1
+    assert lines['h_seconds_bucket{stage="parse",le="1.0"}'] == 2
+    assert lines['h_seconds_bucket{stage="parse",le="+Inf"}'] == 3
+    assert lines['h_seconds_count{stage="parse"}'] == 3
+    assert lines['h_seconds_sum{stage="parse"}'] == pytest.approx(5.55)
+    assert lines['c_total{label="say \\"hi\\""}'] == 2
+
+
+def test_metrics_cover_every_ingest_stage(client):
+    before = client.get("/metrics").text
+    body = b'{"raw": "Too many connections from 10.0.0.9"}\n{"raw": "Ping received from 10.0.0.7"}\n'
+    assert client.post("/ingest/batch", content=body).json()["received"] == 2
+
+    res = client.get("/metrics")
+    assert res.headers["content-type"].startswith("text/plain")
+    text = res.text
+    for stage in ("parse", "features", "predict", "detect", "extract", "es_write"):
+        key = f'log_analyzer_stage_seconds_count{{stage="{stage}"}}'
+        assert sample(text, key) == (sample(before, key) or 0) + 1, stage
+    key = 'log_analyzer_records_total{prediction="anomaly",threat_type="dos_attack"}'
+    assert sample(text, key) == (sample(before, key) or 0) + 1
+    assert sample(text, 'log_analyzer_batch_size_count{path="batch"}') >= 1
+    assert sample(text, 'log_analyzer_http_request_seconds_count{method="POST",route="/ingest/batch",status="200"}') >= 1
+    assert sample(text, "log_analyzer_ingest_queue_depth") == 0
+    assert "log_analyzer_model_info{version=" in text
+
+
+def test_profiler_samples_one_in_n_requests(client, tmp_path, monkeypatch):
+    assert client.post("/debug/profile", params={"every": 1}).status_code == 403  # off unless configured
+    monkeypatch.setattr(main, "PROFILE_CONTROL_ENABLED", True)
+    main.profiler.directory = str(tmp_path)
+    try:
+        assert client.post("/debug/profile", params={"every": 2}).json()["every"] == 2
+        for _ in range(4):
+            client.get("/ingest/stats")
+        assert client.post("/debug/profile", params={"every": 0}).json()["sampled"] == 2
+        client.get("/ingest/stats")
+        assert len(os.listdir(tmp_path)) == 2
+        assert client.post("/debug/profile", params={"every": -1}).status_code == 400
+    finally:
+        main.profiler.every = 0
+        main.profiler.directory = config.PROFILE_DIR
@@ -0,0 +1,93 @@
+import os, sys
+import asyncio
+import json
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_api")))
+
+import pytest
+from fastapi.testclient import TestClient
+from joblib import load
+
+import config
+import main
+from model_watcher import ModelWatcher
+from ml_pipeline import infer, model_registry
+from ml_pipeline.compact_model import JOBLIB_MODEL_PATH, CompactGradientBoosting
+from ml_pipeline.executor import InferenceExecutor
+
+LOG = {"raw": "Too many connections from 10.0.0.1", "timestamp": "2025-06-16T10:20:00"}
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "REGISTRY_DIR", str(tmp_path))
+    return str(tmp_path)
+
+
+def test_publish_activate_and_rollback(registry):
+    model = load(JOBLIB_MODEL_PATH)
+    assert model_registry.current_version() is None
+
+    assert model_registry.publish(model, {"accuracy": 0.9}) == "v1"
+    assert model_registry.publish(model, activate=False) == "v2"
+    assert model_registry.list_versions() == ["v1", "v2"]
+    assert model_registry.current_version() == "v1"
+
+    model_registry.set_current("v2")
+    assert model_registry.previous_version() == "v1"
+    metadata = model_registry.read_metadata("v1")
+    assert metadata["metrics"] == {"accuracy": 0.9}
+    assert metadata["feature_columns"] == infer.FEATURE_COLUMNS
+    assert isinstance(model_registry.load_model("v2"), CompactGradientBoosting)
+    with pytest.raises(KeyError):
+        model_registry.set_current("v9")
+
+
+def test_feature_schema_mismatch_is_refused(registry):
+    model_registry.publish(load(JOBLIB_MODEL_PATH))
+    path = os.path.join(registry, "v1", "metadata.json")
+    with open(path) as f:
+        metadata = json.load(f)
+    metadata["feature_columns"] = ["length"]
+    with open(path, "w") as f:
+        json.dump(metadata, f)
+    with pytest.raises(ValueError):
+        model_registry.load_model("v1")
+
+
+def test_watcher_swaps_between_batches(registry):
+    async def scenario():
+        executor = InferenceExecutor("thread", workers=2)
+        executor.warm_up()
+        watcher = ModelWatcher(executor)
+        before = await executor.infer([LOG])
+
+        model_registry.publish(load(JOBLIB_MODEL_PATH))
+        assert await watcher.check() == "v1"
+        after = await executor.infer([LOG])
+        executor.shutdown()
+        return before, after, watcher.stats()
+
+    before, after, stats = asyncio.run(scenario())
+    assert before[0]["model_version"] == "bundled"
+    assert after[0]["model_version"] == "v1"
+    assert after[0]["threat_type"] == before[0]["threat_type"]
+    assert stats["swaps"] == 1
+
+
+def test_rollback_endpoint(registry, stub, monkeypatch):
+    model = load(JOBLIB_MODEL_PATH)
+    model_registry.publish(model)
+    model_registry.publish(model)
+    monkeypatch.setattr(main, "MODEL_POLL_SECONDS", 0)
+
+    with TestClient(main.app) as client:
+        assert client.post("/model/rollback").json()["version"] == "v1"
+        assert client.get("/model").json()["version"] == "v1"
+        assert model_registry.current_version() == "v1"
+        assert client.post("/model/rollback").status_code == 409
+        assert client.post("/model/rollback", params={"version": "v7"}).status_code == 404
+
+        client.post("/ingest/batch", content=json.dumps(LOG))
+    assert stub.count(config.ES_INDEX) == 1
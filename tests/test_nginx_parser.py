@@ -0,0 +1,18 @@
+from parser.apache_parser import ApacheParser, ApacheErrorParser
+from parser.registry import registry
+
+def test_nginx_combined_line():
+    line = '10.0.0.7 - admin [10/Jun/2025:13:55:36 +0000] "POST /login HTTP/1.1" 401 - "-" "curl/8.0"'
+    result = registry.get("nginx").parse(line)
+    assert result["method"] == "POST"
+    assert result["path"] == "/login"
+    assert result["status"] == 401
+    assert result["size"] == 0
+    assert result["user_agent"] == "curl/8.0"
+
+def test_apache_error_line():
+    line = "[Sun Dec 04 05:15:09 2005] [error] [client 222.166.160.184] Directory index forbidden by rule: /var/www/html/"
+    result = ApacheErrorParser().parse(line)
+    assert result["level"] == "error"
+    assert result["src_ip"] == "222.166.160.184"
+    assert ApacheParser().parse(line) is None
@@ -0,0 +1,77 @@
+import json
+import os, sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from ml_pipeline.features import FEATURE_COLUMNS, extract_features_frame, feature_vector
+from ml_pipeline.parallel_features import extract_csv, extract_jsonl, open_matrix
+from ml_pipeline import train_classic_model, train_isolation
+
+LINES = [
+    ("Dec 10 06:55:46 LabSZ sshd[24200]: Failed password for root from 183.62.140.253 port 22 ssh2", "brute_force"),
+    ("Dec 10 07:02:11 LabSZ sshd[24201]: Accepted password for admin from 10.0.0.5 port 52311 ssh2", "normal"),
+    ("Dec 10 09:13:03 LabSZ sudo: admin : TTY=pts/0 ; PWD=/root ; COMMAND=/bin/bash", "privilege_escalation"),
+    ("Dec 10 23:40:00 LabSZ kernel: malware signature detected in /tmp/x", "malware"),
+]
+
+
+def write_csv(path, n):
+    rows = [LINES[i % len(LINES)] for i in range(n)]
+    pd.DataFrame({
+        "raw": [raw for raw, _ in rows],
+        "timestamp": ["2024-12-10 %02d:00:00" % (i % 24) if i % 7 else "" for i in range(n)],
+        "label": [label for _, label in rows],
+    }).to_csv(path, index=False)
+    return path
+
+
+def test_extract_csv_matches_in_memory(tmp_path):
+    csv = write_csv(tmp_path / "logs.csv", 250)
+    df = pd.read_csv(csv)
+    expected = extract_features_frame(df["raw"], df["timestamp"]).to_numpy()
+
+    for workers in (1, 2):
+        work_dir = tmp_path / f"w{workers}"
+        extract_csv(csv, work_dir, chunk_rows=60, workers=workers)
+        X, codes, meta = open_matrix(work_dir)
+        assert meta["rows"] == 250
+        assert np.array_equal(X, expected)
+        assert list(np.asarray(meta["classes"])[codes]) == df["label"].tolist()
+
+
+def test_extract_jsonl_matches_row_by_row(tmp_path):
+    folder = "data/parsed_logs"
+    paths = train_isolation.log_files(folder)
+    extract_jsonl(paths, tmp_path, chunk_bytes=64 * 1024, workers=2)
+    X, labels, meta = open_matrix(tmp_path)
+
+    expected = []
+    for path in paths:
+        for line in open(path):
+            raw = json.loads(line).get("raw")
+            if not raw:
+                continue
+            features = dict(zip(FEATURE_COLUMNS, feature_vector(raw, raw[:15], default_hour=-1)))
+            if features["hour"] >= 0:  # lines without a syslog timestamp are skipped
+                expected.append([features[c] for c in meta["columns"]])
+    assert labels is None
+    assert np.array_equal(X, np.array(expected))
+
+
+def test_train_classic_model_cli(tmp_path):
+    csv = write_csv(tmp_path / "logs.csv", 400)
+    output = tmp_path / "model.joblib"
+    model = train_classic_model.main(["--data", str(csv), "--estimator", "hist", "--workers", "1",
+                                      "--output", str(output), "--no-publish"])
+    assert output.exists()
+    assert set(model.classes_) == {label for _, label in LINES}
+
+
+def test_train_isolation_cli(tmp_path):
+    output = tmp_path / "isolation.joblib"
+    model = train_isolation.main(["--workers", "1", "--sample", "500", "--output", str(output)])
+    assert output.exists()
+    assert model.max_samples_ == 256
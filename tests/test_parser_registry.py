@@ -0,0 +1,38 @@
+import os, sys
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from parser.log_parser import parse_log_file
+from parser.registry import ParserRegistry
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+def test_formats_are_detected_by_content():
+    registry = ParserRegistry()
+    detected = {name: registry.detect_file(DATA_DIR / name).name for name in ("Apache_2k.log", "Linux_2k.log", "OpenSSH_2k.log")}
+    assert detected == {"Apache_2k.log": "apache_error", "Linux_2k.log": "syslog", "OpenSSH_2k.log": "openssh"}
+
+def test_json_lines_are_detected():
+    registry = ParserRegistry()
+    assert registry.detect(['{"message": "a"}', '{"message": "b"}']).name == "json"
+    assert registry.detect(["nothing recognisable here"]) is None
+
+def test_parse_caches_first_match_per_source():
+    registry = ParserRegistry()
+    line = "[Sun Dec 04 04:47:44 2005] [notice] workerEnv.init() ok /etc/httpd/conf/workers2.properties"
+    assert registry.parse(line, source="apache")["level"] == "notice"
+    assert registry._sources["apache"].name == "apache_error"
+    assert registry.parse("garbage", source="apache") == {"raw": "garbage"}
+
+def test_source_cache_keeps_the_most_recently_used():
+    registry = ParserRegistry(max_sources=2)
+    registry.parse('{"message": "a"}', source="a.log")
+    registry.parse('{"message": "b"}', source="b.log")
+    registry.parse('{"message": "a"}', source="a.log")
+    registry.parse('{"message": "c"}', source="c.log")
+    assert list(registry._sources) == ["a.log", "c.log"]
+
+def test_auto_parse_of_apache_error_log():
+    entries = list(parse_log_file(DATA_DIR / "Apache_2k.log"))
+    assert all("level" in entry for entry in entries)
@@ -0,0 +1,68 @@
+import os, sys
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+from joblib import load
+
+from ml_pipeline import infer
+from ml_pipeline.compact_model import ISOLATION_JOBLIB_PATH, CompactIsolationForest
+from ml_pipeline.prefilter import Prefilter
+
+BATCH = [
+    {"raw": "Too many connections from 10.0.0.1", "timestamp": "2025-06-16T10:20:00"},
+    {"raw": "Failed password for invalid user root from 10.0.0.5 port 22 ssh2", "timestamp": "2025-06-16T03:10:00"},
+    {"raw": "User alice logged in successfully", "timestamp": "2025-06-16T12:00:00"},
+    {"raw": "User alice logged in successfully", "timestamp": "2025-06-16T12:00:00"},
+]
+
+
+def test_compact_forest_matches_sklearn():
+    forest = load(ISOLATION_JOBLIB_PATH)
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.integers(-5, 3000, 5000), rng.integers(0, 2, 5000), rng.integers(-1, 24, 5000)])
+    expected = forest.score_samples(pd.DataFrame(X, columns=forest.feature_names_in_))
+    assert np.array_equal(CompactIsolationForest.load().score_samples(X), expected)
+
+
+def test_prefilter_skips_the_classifier_below_threshold(monkeypatch):
+    monkeypatch.setattr(infer, "cache", None)
+    expected = infer.infer_logs(BATCH)
+
+    # Nothing is filtered at -inf: same labels, plus a score on every record
+    monkeypatch.setattr(infer, "prefilter", Prefilter.load(threshold=-np.inf))
+    records = infer.infer_logs(BATCH)
+    assert [r["threat_type"] for r in records] == [r["threat_type"] for r in expected]
+    assert all(0 < r["anomaly_score"] <= 1 for r in records)
+    assert infer.prefilter_stats()["fraction_filtered"] == 0.0
+
+    # Everything is filtered at +inf: the classifier never runs
+    monkeypatch.setattr(infer, "prefilter", Prefilter.load(threshold=np.inf))
+    monkeypatch.setattr(infer, "predict", lambda matrix, clf: 1 / 0)
+    records = infer.infer_logs(BATCH)
+    assert {r["threat_type"] for r in records} == {"normal"}
+    assert infer.prefilter_stats()["filtered"] == len(BATCH)
+
+
+def test_sampled_normals_reach_the_classifier():
+    prefilter = Prefilter.load(threshold=np.inf, sample_rate=1.0)
+    _, selected = prefilter.select(np.zeros((3, len(infer.FEATURE_COLUMNS)), dtype=np.int64), weights=[1, 2, 3])
+    assert selected.all()
+    assert prefilter.stats()["sampled"] == 6
+
+
+def test_default_threshold_keeps_every_known_threat(monkeypatch):
+    data = Path(__file__).resolve().parent.parent / "data"
+    lines = [line.rstrip("\n") for path in sorted(data.glob("*.log")) for line in path.open(errors="replace")]
+    batch = [{"raw": line, "timestamp": "2025-06-16T10:20:00"} for line in lines if line.strip()]
+    monkeypatch.setattr(infer, "cache", None)
+    expected = infer.infer_logs(batch)
+    threats = [i for i, record in enumerate(expected) if record["prediction"] == "anomaly"]
+    assert threats
+
+    monkeypatch.setattr(infer, "prefilter", Prefilter.load(infer.INFER_PREFILTER_THRESHOLD))
+    records = infer.infer_logs(batch)
+    assert [records[i]["threat_type"] for i in threats] == [expected[i]["threat_type"] for i in threats]
+    assert infer.prefilter_stats()["filtered"] > 0
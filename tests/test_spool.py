@@ -0,0 +1,140 @@
+import os, sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_api")))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import config
+import main
+from spool import Spool, SpoolFull, SpoolLocked, open_worker_spools
+from tests.es_stub import ElasticsearchStub
+
+
+def actions(start, count):
+    return [{"_op_type": "create", "_index": "logs", "_id": str(i), "_source": {"raw": f"line {i}"}}
+            for i in range(start, start + count)]
+
+
+def drain(spool, limit):
+    batch, position = spool.read(limit)
+    spool.commit(position, len(batch))
+    return [action["_id"] for action in batch]
+
+
+def test_segments_resume_from_the_cursor_after_reopening(tmp_path):
+    spool = Spool(str(tmp_path), segment_bytes=300)
+    for start in range(0, 12, 3):
+        spool.append(actions(start, 3))
+    assert spool.stats()["segments"] > 1
+    assert drain(spool, 5) == ["0", "1", "2", "3", "4"]
+    spool.close()
+
+    spool = Spool(str(tmp_path), segment_bytes=300)
+    assert spool.stats()["pending"] == 7
+    assert drain(spool, 100) == [str(i) for i in range(5, 12)]
+    assert spool.stats()["segments"] == 1  # drained segments are deleted
+    spool.append(actions(12, 1))
+    assert drain(spool, 100) == ["12"]
+
+
+def test_torn_tail_is_cut_off_on_open(tmp_path):
+    spool = Spool(str(tmp_path))
+    spool.append(actions(0, 3))
+    spool.close()
+    (segment,) = [name for name in os.listdir(tmp_path) if name.endswith(".seg")]
+    with open(tmp_path / segment, "ab") as f:
+        f.write(b"\x40\x00\x00\x00\x00\x00\x00\x00{\"half")  # a crash mid-append
+
+    spool = Spool(str(tmp_path))
+    assert (spool.stats()["truncated"], spool.stats()["pending"]) == (1, 3)
+    spool.append(actions(3, 1))
+    assert drain(spool, 100) == ["0", "1", "2", "3"]
+
+
+def test_disk_budget_compacts_before_refusing(tmp_path):
+    spool = Spool(str(tmp_path), max_bytes=1000)
+    with pytest.raises(SpoolFull):
+        for start in range(0, 100, 5):
+            spool.append(actions(start, 5))
+    full = spool.stats()
+    assert full["rejected"] == 5 and full["disk_bytes"] <= 1000
+
+    drain(spool, 10)
+    spool.append(actions(100, 5))  # fits once the drained head is compacted away
+    assert spool.stats()["compactions"] == 1
+    assert drain(spool, 100)[-1] == "104"
+
+
+def test_batch_read_before_a_compaction_commits_to_the_right_place(tmp_path):
+    spool = Spool(str(tmp_path), max_bytes=6000)
+    spool.append(actions(0, 20))
+    drain(spool, 100)
+    spool.append(actions(20, 20))
+    batch, position = spool.read(100)  # still being shipped when the next append compacts
+    spool.append(actions(40, 40))
+    assert spool.stats()["compactions"] == 1
+
+    spool.commit(position, len(batch))
+    assert spool.stats()["pending"] == 40
+    assert drain(spool, 100) == [str(i) for i in range(40, 80)]
+    spool.close()
+    assert Spool(str(tmp_path)).stats()["pending"] == 0  # the cursor on disk agrees
+
+
+def test_workers_get_their_own_slots_and_orphans_are_drained(tmp_path):
+    legacy = Spool(str(tmp_path))  # segments from before per-worker slots
+    legacy.append(actions(0, 1))
+    legacy.close()
+
+    first, orphans = open_worker_spools(str(tmp_path))
+    second, _ = open_worker_spools(str(tmp_path))  # the next uvicorn worker
+    assert [first.directory, second.directory] == [str(tmp_path / "worker-0"), str(tmp_path / "worker-1")]
+    assert [orphan.directory for orphan in orphans] == [str(tmp_path)]
+    with pytest.raises(SpoolLocked):
+        Spool(first.directory)
+    assert drain(orphans[0], 10) == ["0"]
+    orphans[0].close()
+
+    second.append(actions(1, 2))
+    for spool in (first, second):
+        spool.close()
+    own, orphans = open_worker_spools(str(tmp_path))  # restarted with one worker
+    assert own.directory == first.directory
+    assert [orphan.directory for orphan in orphans] == [second.directory]  # the drained legacy spool is left closed
+    assert drain(orphans[0], 10) == ["1", "2"]
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_ingest_is_acknowledged_while_es_is_down_and_shipped_later(stub, monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "SPOOL_ENABLED", True)
+    monkeypatch.setattr(main, "SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "SPOOL_INITIAL_BACKOFF", 0.05)
+    monkeypatch.setattr(main, "SPOOL_MAX_BACKOFF", 0.2)
+    line = lambda i: f'{{"raw": "Ping received from 10.0.0.{i}", "timestamp": "2024-05-01T10:00:0{i}"}}'
+
+    port = stub._server.server_address[1]
+    with TestClient(main.app) as client:
+        assert client.post("/ingest/batch", content=f"{line(1)}\n{line(2)}\n".encode()).status_code == 200
+        assert wait_for(lambda: stub.count(config.ES_INDEX) == 2)
+
+        stub.stop()  # ES goes away mid-stream
+        res = client.post("/ingest/batch", content=f"{line(3)}\n{line(4)}\n".encode())
+        assert res.status_code == 200 and res.json()["received"] == 2
+        assert wait_for(lambda: client.get("/spool/stats").json()["failures"] >= 1)
+        assert client.get("/spool/stats").json()["pending"] == 2
+
+        with ElasticsearchStub(port=port) as second:
+            assert wait_for(lambda: second.count() == 2)
+            stats = client.get("/spool/stats").json()
+            assert (stats["pending"], stats["shipped"]) == (0, 4)
+            assert "log_analyzer_spool_pending 0" in client.get("/metrics").text
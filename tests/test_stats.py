@@ -0,0 +1,76 @@
+import os, sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_api")))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import config
+import main
+
+DOCS = [
+    # minute, threat_type, src_ip
+    (0, "brute_force", "10.0.0.1"),
+    (0, "brute_force", "10.0.0.1"),
+    (1, "normal", "10.0.0.2"),
+    (3, "port_scan", "10.0.0.1"),
+    (3, "port_scan", "10.0.0.3"),
+]
+
+
+@pytest.fixture
+def client(stub):
+    for minute, threat, ip in DOCS:
+        stub.index(config.ES_INDEX, {
+            "raw": f"{threat} from {ip}",
+            "timestamp": f"2024-05-01T10:{minute:02d}:30",
+            "prediction": "normal" if threat == "normal" else "anomaly",
+            "threat_type": threat,
+            "src_ip": ip,
+        })
+    with TestClient(main.app) as client:
+        client.stub = stub
+        yield client
+
+
+def test_timeline_buckets_by_threat_type(client):
+    body = client.get("/stats/timeline", params={"interval": "1m"}).json()
+    assert body["interval"] == "1m"
+    assert [bucket["total"] for bucket in body["buckets"]] == [2, 1, 0, 2]  # empty minutes are kept
+    assert body["buckets"][0]["threat_types"] == {"brute_force": 2}
+    assert body["buckets"][3]["threat_types"] == {"port_scan": 2}
+
+    body = client.get("/stats/timeline", params={"interval": "1h", "prediction": "anomaly"}).json()
+    assert [bucket["total"] for bucket in body["buckets"]] == [4]
+
+    assert client.get("/stats/timeline", params={"interval": "hourly"}).status_code == 400
+
+
+def test_top_sources_and_prediction_counts(client):
+    sources = client.get("/stats/top-sources", params={"size": 2}).json()["sources"]
+    assert sources[0] == {"src_ip": "10.0.0.1", "count": 3, "threat_types": {"brute_force": 2, "port_scan": 1}}
+    assert len(sources) == 2
+
+    body = client.get("/stats/predictions").json()
+    assert body == {
+        "total": 5,
+        "predictions": {"anomaly": 4, "normal": 1},
+        "threat_types": {"brute_force": 2, "port_scan": 2, "normal": 1},
+    }
+
+
+def test_cached_until_an_anomaly_is_ingested(client):
+    first = client.get("/stats/predictions").json()
+    requests = len(client.stub.requests)
+    assert client.get("/stats/predictions").json() == first
+    assert len(client.stub.requests) == requests
+
+    # Normal traffic leaves the cache alone
+    client.post("/ingest/batch", content=b'{"raw": "Ping received from 10.0.0.7"}\n')
+    assert client.get("/stats/predictions").json() == first
+    assert client.get("/stats/cache").json()["invalidations"] == 0
+
+    client.post("/ingest/batch", content=b'{"raw": "Too many connections from 10.0.0.9"}\n')
+    assert client.get("/stats/cache").json()["invalidations"] == 1
+    body = client.get("/stats/predictions").json()
+    assert body["total"] == 7 and body["threat_types"]["dos_attack"] == 1
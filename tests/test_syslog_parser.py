@@ -0,0 +1,25 @@
+from parser.syslog_parser import SyslogParser, OpenSSHParser
+
+def test_syslog_parser_splits_service_and_pid():
+    parser = SyslogParser()
+    line = "Jun 14 15:16:01 combo sshd(pam_unix)[19939]: authentication failure; logname= uid=0 euid=0 tty=NODEVssh ruser= rhost=218.188.2.4 user=root"
+    result = parser.parse(line)
+    assert result["timestamp"] == "Jun 14 15:16:01"
+    assert result["hostname"] == "combo"
+    assert result["service"] == "sshd(pam_unix)"
+    assert result["pid"] == 19939
+    assert result["message"].startswith("authentication failure")
+
+def test_syslog_parser_without_pid():
+    result = SyslogParser().parse("Jun 15 04:06:20 combo kernel: Linux version 2.6.5-1.358")
+    assert result["service"] == "kernel"
+    assert "pid" not in result
+
+def test_openssh_parser_extracts_auth_fields():
+    line = "Dec 10 06:55:48 LabSZ sshd[24200]: Failed password for invalid user webmaster from 173.234.31.186 port 38926 ssh2"
+    result = OpenSSHParser().parse(line)
+    assert (result["user"], result["src_ip"], result["port"]) == ("webmaster", "173.234.31.186", 38926)
+
+def test_openssh_parser_rejects_other_services():
+    assert OpenSSHParser().parse("Jun 15 04:06:20 combo kernel: Linux version 2.6.5-1.358") is None
+    assert SyslogParser().parse("invalid log format") is None
@@ -0,0 +1,111 @@
+import os, sys
+import asyncio
+import json
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_api")))
+
+import pytest
+
+from websocket_manager import ConnectionManager, Subscription
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.frames = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame):
+        await asyncio.sleep(self.delay)
+        self.frames.append(frame)
+
+    async def close(self, code=1000):
+        self.closed = True
+
+    @property
+    def received(self):
+        return [record for frame in self.frames for record in json.loads(frame)]
+
+
+ANOMALY = {"raw": "Too many connections", "prediction": "anomaly", "threat_type": "dos_attack"}
+NORMAL = {"raw": "User alice logged in", "prediction": "normal", "threat_type": "normal"}
+
+
+def test_records_are_batched_and_filtered_per_subscription():
+    async def scenario():
+        manager = ConnectionManager(window=60)
+        everything, anomalies, also_anomalies = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        for websocket in (everything, anomalies, also_anomalies):
+            await manager.connect(websocket)
+        manager.subscribe(anomalies, {"prediction": "anomaly"})
+        manager.subscribe(also_anomalies, {"prediction": ["anomaly"], "normal_sample_rate": 1})
+
+        for record in (NORMAL, ANOMALY, NORMAL, ANOMALY):
+            manager.broadcast(record)
+        manager.flush()
+        await asyncio.sleep(0.01)
+
+        stats = manager.stats()
+        for websocket in (everything, anomalies, also_anomalies):
+            manager.disconnect(websocket)
+        return everything, anomalies, also_anomalies, stats
+
+    everything, anomalies, also_anomalies, stats = asyncio.run(scenario())
+    assert len(everything.frames) == 1 and len(everything.received) == 4
+    assert anomalies.received == [ANOMALY, ANOMALY]
+    # Equal subscriptions share a single serialized frame
+    assert anomalies.frames[0] is also_anomalies.frames[0]
+    assert stats["frames_serialized"] == 2
+
+
+def test_normal_sampling_and_validation():
+    assert Subscription.from_message({"normal_sample_rate": 0}).select([NORMAL, ANOMALY]) == [ANOMALY]
+    assert Subscription.from_message({"threat_type": "dos_attack"}).select([NORMAL, ANOMALY]) == [ANOMALY]
+    with pytest.raises(ValueError):
+        Subscription.from_message({"normal_sample_rate": 2})
+
+
+def test_slow_client_does_not_hold_back_fast_client():
+    async def scenario():
+        manager = ConnectionManager(queue_size=3, max_lag=60, send_timeout=5, window=60)
+        fast, slow = FakeWebSocket(), FakeWebSocket(delay=60)
+        await manager.connect(fast)
+        await manager.connect(slow)
+
+        for i in range(10):
+            manager.broadcast({"n": i})
+            manager.flush()
+            await asyncio.sleep(0.001)
+
+        stats = manager.stats()
+        for websocket in (fast, slow):
+            manager.disconnect(websocket)
+        return fast, stats
+
+    fast, stats = asyncio.run(scenario())
+    assert [m["n"] for m in fast.received] == list(range(10))
+    assert stats["dropped"] > 0
+    assert stats["queue_depth"] <= 3
+
+
+def test_lagging_client_is_evicted(caplog):
+    async def scenario():
+        manager = ConnectionManager(queue_size=1, max_lag=0.01, send_timeout=5, window=60)
+        slow = FakeWebSocket(delay=60)
+        await manager.connect(slow)
+
+        for i in range(5):
+            manager.broadcast({"n": i})
+            manager.flush()
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0)
+        return slow, manager.stats()
+
+    slow, stats = asyncio.run(scenario())
+    assert stats["evicted"] == 1
+    assert stats["clients"] == 0
+    assert slow.closed
+    assert [record.name for record in caplog.records] == ["websocket_manager"]
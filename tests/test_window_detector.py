@@ -0,0 +1,66 @@
+import os, sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ml_pipeline.window_detector import WindowDetector
+
+FAILED = "Failed password for root from 10.0.0.9 port 4022 ssh2"
+
+
+def test_brute_force_alert_fires_once_per_window():
+    detector = WindowDetector(window=60, bucket=5, brute_force_failures=5)
+    alerts = []
+    for second in range(0, 20, 2):  # 10 failures in 20s
+        features, fired = detector.observe(1000.0 + second, ip="10.0.0.9", failure=True)
+        alerts.extend(fired or [])
+    assert [a["type"] for a in alerts] == ["brute_force"]
+    assert alerts[0]["count"] == 5
+    assert features["ip_failures"] == 10
+
+    # Two minutes later the window has emptied and the key can alert again
+    features, _ = detector.observe(1140.0, ip="10.0.0.9")
+    assert features == {"ip_events": 1, "ip_failures": 0, "ip_probes": 0}
+
+
+def test_counts_slide_bucket_by_bucket():
+    detector = WindowDetector(window=10, bucket=1)
+    for second in range(10):
+        detector.observe(float(second), ip="a", failure=True)
+    features, _ = detector.observe(14.5, ip="a")
+    assert features["ip_failures"] == 5  # seconds 5-9 are still inside (4.5, 14.5]
+    # Events from before the window are counted in its oldest bucket, not dropped into a live one
+    features, _ = detector.observe(0.0, ip="a", failure=True)
+    assert features["ip_failures"] == 6
+
+
+def test_idle_and_excess_keys_are_evicted():
+    detector = WindowDetector(window=10, bucket=1, max_keys=2)
+    detector.observe(0.0, ip="a")
+    detector.observe(1.0, ip="b")
+    detector.observe(2.0, ip="c")
+    assert list(detector.ips) == ["b", "c"]
+    detector.observe(30.0, ip="d")  # b and c have been idle for a full window
+    assert list(detector.ips) == ["d"]
+    assert detector.stats()["evicted"] == 3
+
+
+def test_process_extracts_keys_from_raw_lines():
+    detector = WindowDetector(user_failures=3)
+    records = [{"raw": FAILED, "timestamp": f"2025-06-16T10:20:0{i}"} for i in range(3)]
+    records.append({"raw": "Accepted password for root from 10.0.0.7 port 4100 ssh2", "timestamp": "2025-06-16T10:20:05"})
+    detector.process_batch(records)
+
+    assert records[0]["window"] == {"ip_events": 1, "ip_failures": 1, "ip_probes": 0, "user_failures": 1}
+    assert records[2]["alerts"] == [{"type": "user_brute_force", "key": "root", "count": 3, "window_seconds": 60}]
+    # The successful login right after the burst carries the user's failure count
+    assert records[3]["window"]["user_failures"] == 3
+    assert detector.process({"raw": "Received SIGHUP; restarting."}).get("window") is None
+
+
+def test_replay_of_openssh_sample_flags_known_attackers():
+    path = os.path.join(os.path.dirname(__file__), "..", "data", "OpenSSH_2k.log")
+    detector = WindowDetector()
+    with open(path) as f:
+        records = detector.process_batch([{"raw": line.rstrip("\n")} for line in f])
+    flagged = {alert["key"] for record in records for alert in record.get("alerts", ()) if alert["type"] == "brute_force"}
+    assert "183.62.140.253" in flagged